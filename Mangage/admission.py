@@ -0,0 +1,382 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from config import RESERVATION_LEDGER_TTL, RESERVATION_LEDGER_MAX_SLOTS, RESERVATION_MEAL_DURATION
+from Mangage.templates import SPARQLTemplate, PREFIXES, iri, string, date_, integer
+from Mangage.triples import TripleWriter
+from Mangage.timeline import minutes_of, normalize_time
+
+logger = logging.getLogger(__name__)
+
+# Guests and capacity of one slot: every active (not cancelled) reservation
+SLOT_STATE = SPARQLTemplate("""
+    SELECT ?capacity ?reservation ?guests ?touriste
+    WHERE {
+        OPTIONAL { ${restaurant:iri} eco:capaciteMax ?capacity . }
+        OPTIONAL {
+            ?reservation a eco:ReservationRestaurant .
+            ?reservation eco:reservePour ${restaurant:iri} .
+            ?reservation eco:dateReservation ${date:date} .
+            ?reservation eco:heureReservation ${heure} .
+            ?reservation eco:nombrePersonnes ?guests .
+            ?reservation eco:statut ?statut .
+            OPTIONAL { ?reservation eco:reservePar ?touriste . }
+            FILTER(STR(?statut) != "annulee")
+        }
+    }
+""", name='slot_state')
+
+# The capacity row, then per booked slot of a date range the guests and
+# reservations; dates are compared on their lexical (ISO) form, typed or not
+SLOT_OCCUPANCY = SPARQLTemplate("""
+    SELECT ?capacity ?date ?heure ?reserved ?reservations
+    WHERE {
+        { ${restaurant:iri} eco:capaciteMax ?capacity . }
+        UNION
+        {
+            SELECT ?date ?heure (SUM(?guests) AS ?reserved) (COUNT(?reservation) AS ?reservations)
+            WHERE {
+                ?reservation a eco:ReservationRestaurant .
+                ?reservation eco:reservePour ${restaurant:iri} .
+                ?reservation eco:dateReservation ?date .
+                ?reservation eco:heureReservation ?heure .
+                ?reservation eco:nombrePersonnes ?guests .
+                ?reservation eco:statut ?statut .
+                FILTER(STR(?statut) != "annulee")
+                FILTER(STR(?date) >= ${start} && STR(?date) <= ${end})
+            }
+            GROUP BY ?date ?heure
+        }
+    }
+    ORDER BY ?date ?heure
+""", name='slot_occupancy')
+
+# Range of GET /restaurant/<uri>/availability when `to` is not given
+AVAILABILITY_DEFAULT_DAYS = 30
+
+RESERVATION_EXISTS = SPARQLTemplate("""
+    SELECT (1 AS ?found)
+    WHERE { ${reservation:iri} a eco:ReservationRestaurant . }
+""", name='reservation_exists')
+
+# The insert applies only if the slot still has room for the party and the
+# tourist has no other active reservation whose meal overlaps this one that
+# day (times stored as "HH:MM" are compared as minutes; any other stored form
+# only matches the same string); both are checked by the store in the same
+# update, so concurrent workers cannot overbook.
+_ADMIT = """
+INSERT {{
+{triples}}}
+WHERE {{
+    {{
+        SELECT (SUM(?guests) AS ?taken)
+        WHERE {{
+            ?other a eco:ReservationRestaurant .
+            ?other eco:reservePour {restaurant} .
+            ?other eco:dateReservation {date} .
+            ?other eco:heureReservation {heure} .
+            ?other eco:nombrePersonnes ?guests .
+            ?other eco:statut ?statut .
+            FILTER(STR(?statut) != "annulee")
+        }}
+    }}
+    OPTIONAL {{ {restaurant} eco:capaciteMax ?capacity . }}
+    FILTER(!BOUND(?capacity) || xsd:decimal(STR(?capacity)) <= 0
+           || COALESCE(?taken, 0) + {guests} <= xsd:decimal(STR(?capacity)))
+    FILTER NOT EXISTS {{
+        ?mine a eco:ReservationRestaurant .
+        ?mine eco:reservePar {touriste} .
+        ?mine eco:dateReservation {date} .
+        ?mine eco:heureReservation ?mineHeure .
+        ?mine eco:statut ?mineStatut .
+        FILTER(STR(?mineStatut) != "annulee")
+        FILTER(STR(?mineHeure) = {heure}
+               || ABS(xsd:integer(SUBSTR(STR(?mineHeure), 1, 2)) * 60
+                      + xsd:integer(SUBSTR(STR(?mineHeure), 4, 2)) - {minutes}) < {duration})
+    }}
+}}
+"""
+
+Slot = namedtuple('Slot', ['restaurant', 'date', 'heure'])
+
+
+def parse_date(value):
+    """date of a date or YYYY-MM-DD string; raises ValueError"""
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {value!r}") from None
+
+
+class SlotLedger:
+    """Active reservations of one (restaurant, date, heure) slot: uri -> (guests, touriste)"""
+
+    __slots__ = ('capacity', 'reservations', 'loaded_at')
+
+    def __init__(self, capacity, reservations):
+        # None or 0: no capacity limit
+        self.capacity = capacity
+        self.reservations = reservations
+        self.loaded_at = time.monotonic()
+
+    @property
+    def reserved(self):
+        return sum(guests for guests, _ in self.reservations.values())
+
+    def remaining(self):
+        """Seats left, None when the restaurant has no capacity limit"""
+        if not self.capacity:
+            return None
+        return max(self.capacity - self.reserved, 0)
+
+    def fits(self, guests):
+        return not self.capacity or self.reserved + guests <= self.capacity
+
+
+class ReservationAdmission:
+    """
+    Admission control for restaurant reservations.
+    Each slot has an in-memory ledger loaded with one query, and slots are
+    guarded by striped locks, so requests for different slots never wait on
+    each other. A full slot is refused from memory, after reloading its
+    ledger if it was loaded before the request (another worker may have
+    cancelled a reservation since). Otherwise the reservation is inserted by
+    one conditional update and read back. If another worker filled the slot
+    first, the ledger is reloaded and the request refused. Ledgers older than
+    RESERVATION_LEDGER_TTL seconds are reloaded, to pick up bookings made by
+    other processes. With a TimelineIndex, a tourist whose meals would overlap
+    is also refused from memory, confirmed the same way.
+    """
+
+    def __init__(self, manager, timeline=None, ttl=RESERVATION_LEDGER_TTL,
+                 max_slots=RESERVATION_LEDGER_MAX_SLOTS, stripes=64):
+        self.manager = manager
+        self.timeline = timeline
+        self.ttl = ttl
+        self.max_slots = max_slots
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._ledgers = {}
+        self._slots_by_reservation = {}
+        # Guards the two dicts above (never held while querying the store)
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def slot(restaurant, day, heure):
+        """Normalized slot key; raises ValueError on an invalid URI, date or time"""
+        iri(restaurant)
+        return Slot(restaurant, parse_date(day).isoformat(), normalize_time(heure))
+
+    def _lock_for(self, slot):
+        return self._locks[hash(slot) % len(self._locks)]
+
+    def _load(self, slot):
+        rows = self.manager.execute_prepared(SLOT_STATE, {
+            'restaurant': slot.restaurant, 'date': slot.date, 'heure': slot.heure
+        }, use_cache=False)
+        if isinstance(rows, dict):
+            raise RuntimeError(rows['error'])
+        capacity = None
+        reservations = {}
+        for row in rows:
+            if capacity is None and 'capacity' in row:
+                try:
+                    capacity = int(float(row['capacity']['value']))
+                except ValueError:
+                    pass
+            if 'reservation' in row:
+                try:
+                    guests = int(float(row['guests']['value']))
+                except ValueError:
+                    continue
+                touriste = row['touriste']['value'] if 'touriste' in row else None
+                reservations[row['reservation']['value']] = (guests, touriste)
+        ledger = SlotLedger(capacity, reservations)
+        with self._index_lock:
+            self._forget_slot(slot)
+            if len(self._ledgers) >= self.max_slots:
+                self._evict()
+            self._ledgers[slot] = ledger
+            for uri in reservations:
+                self._slots_by_reservation[uri] = slot
+        return ledger
+
+    def _evict(self):
+        # Expired ledgers first, then the oldest half
+        now = time.monotonic()
+        stale = [slot for slot, ledger in self._ledgers.items() if now - ledger.loaded_at > self.ttl]
+        if not stale:
+            by_age = sorted(self._ledgers, key=lambda slot: self._ledgers[slot].loaded_at)
+            stale = by_age[:len(by_age) // 2 or 1]
+        for slot in stale:
+            self._forget_slot(slot)
+
+    def _forget_slot(self, slot):
+        ledger = self._ledgers.pop(slot, None)
+        if ledger is not None:
+            for uri in ledger.reservations:
+                if self._slots_by_reservation.get(uri) == slot:
+                    del self._slots_by_reservation[uri]
+
+    def ledger(self, slot, refresh=False):
+        """Ledger of a slot, loaded (one query) when missing, expired or `refresh`"""
+        ledger = self._ledgers.get(slot)
+        if refresh or ledger is None or time.monotonic() - ledger.loaded_at > self.ttl:
+            ledger = self._load(slot)
+        return ledger
+
+    def _refusal(self, ledger, guests, reason):
+        remaining = ledger.remaining()
+        if reason == 'full':
+            message = f"Not enough capacity. {remaining} seats available, but {guests} requested"
+        else:
+            message = "The tourist already has a reservation at this time"
+        return {
+            "success": False,
+            "reason": reason,
+            "message": message,
+            "current_reserved": ledger.reserved,
+            "max_capacity": ledger.capacity,
+        }
+
+    def admit(self, reservation):
+        """
+        Insert `reservation` (a ReservationRestaurant) if its slot has room and
+        its tourist is free at that time; its date and time are stored in
+        normalized form (YYYY-MM-DD, HH:MM).
+        Returns {"success": True, ...}, {"success": False, "reason": "full" or
+        "tourist_conflict", ...}, or {"error": ...}; raises ValueError on
+        invalid reservation data.
+        """
+        slot = self.slot(reservation.restaurant, reservation.date_reservation, reservation.heure)
+        guests = int(integer(reservation.nombre_personnes))
+        if guests <= 0:
+            raise ValueError("nombre_personnes must be positive")
+        reservation.date_reservation, reservation.heure = slot.date, slot.heure
+        terms = dict(
+            restaurant=iri(slot.restaurant),
+            date=date_(slot.date),
+            heure=string(slot.heure),
+            minutes=minutes_of(slot.heure),
+            duration=RESERVATION_MEAL_DURATION,
+            guests=guests,
+            touriste=iri(reservation.touriste),
+        )
+
+        started = time.monotonic()
+        with self._lock_for(slot):
+            try:
+                triples = TripleWriter().model(reservation.assign_id()).text()
+                update = PREFIXES + _ADMIT.format(triples=triples, **terms)
+                ledger = self.ledger(slot)
+                if not ledger.fits(guests) and ledger.loaded_at < started:
+                    # Only refuse on a ledger read during this request
+                    ledger = self.ledger(slot, refresh=True)
+                if not ledger.fits(guests):
+                    return self._refusal(ledger, guests, 'full')
+                if self.timeline is not None and self.timeline.conflicts(
+                        reservation.touriste, slot.date, slot.heure, since=started):
+                    return self._refusal(ledger, guests, 'tourist_conflict')
+                result = self.manager.execute_update(update, label='admit_reservation')
+                if 'error' in result:
+                    return result
+                rows = self.manager.execute_prepared(RESERVATION_EXISTS, {'reservation': reservation.uri},
+                                                     use_cache=False)
+                if isinstance(rows, dict):
+                    return rows
+                if rows:
+                    if reservation.statut != 'annulee':
+                        with self._index_lock:
+                            ledger.reservations[reservation.uri] = (guests, reservation.touriste)
+                            if self._ledgers.get(slot) is ledger:
+                                self._slots_by_reservation[reservation.uri] = slot
+                    self.manager.id_index.add_models([reservation])
+                    if self.timeline is not None:
+                        self.timeline.add(reservation)
+                    return {
+                        "success": True,
+                        "current_reserved": ledger.reserved,
+                        "max_capacity": ledger.capacity,
+                    }
+                # Refused by the store: another worker booked first, or the tourist is busy
+                ledger = self.ledger(slot, refresh=True)
+                if self.timeline is not None:
+                    self.timeline.forget(reservation.touriste)
+                return self._refusal(ledger, guests, 'tourist_conflict' if ledger.fits(guests) else 'full')
+            except ValueError:
+                # Invalid reservation data (found while serializing it)
+                raise
+            except Exception as e:
+                logger.exception("Admission of %s failed", reservation.uri)
+                return {"error": str(e)}
+
+    def availability(self, restaurant, start=None, end=None):
+        """
+        Remaining capacity of every booked slot of a restaurant between `start`
+        (default today) and `end` (default AVAILABILITY_DEFAULT_DAYS later).
+        Each call runs one GROUP BY over the restaurant's reservations in the
+        range; only with QUERY_CACHE_ENABLED is the result cached (until the
+        next reservation write). Slots not listed have no reservation. Returns
+        a dict or {"error": ...}; raises ValueError on an invalid URI or range.
+        """
+        iri(restaurant)
+        start = parse_date(start) if start else date.today()
+        end = parse_date(end) if end else start + timedelta(days=AVAILABILITY_DEFAULT_DAYS)
+        if end < start:
+            raise ValueError("'to' must not be before 'from'")
+        rows = self.manager.execute_prepared(SLOT_OCCUPANCY, {
+            'restaurant': restaurant, 'start': start.isoformat(), 'end': end.isoformat()
+        })
+        if isinstance(rows, dict):
+            return rows
+
+        capacity = None
+        slots = []
+        for row in rows:
+            if capacity is None and 'capacity' in row:
+                try:
+                    capacity = int(float(row['capacity']['value']))
+                except ValueError:
+                    pass
+            if 'date' not in row:
+                continue
+            reserved = int(float(row['reserved']['value']))
+            slots.append({
+                "date": row['date']['value'],
+                "heure": row['heure']['value'],
+                "reserved": reserved,
+                "reservations": int(row['reservations']['value']),
+            })
+        for slot in slots:
+            slot["remaining"] = max(capacity - slot["reserved"], 0) if capacity else None
+        return {
+            "restaurant": restaurant,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "max_capacity": capacity,
+            "slots": slots,
+        }
+
+    def invalidate(self, *uris):
+        """
+        Drop the ledgers (and tourist timelines) holding these reservations,
+        after a status change or a delete; they are reloaded on next use.
+        """
+        with self._index_lock:
+            for uri in uris:
+                slot = self._slots_by_reservation.get(uri)
+                if slot is not None:
+                    self._forget_slot(slot)
+        if self.timeline is not None:
+            self.timeline.invalidate(*uris)
+
+    def clear(self):
+        with self._index_lock:
+            self._ledgers.clear()
+            self._slots_by_reservation.clear()
+        if self.timeline is not None:
+            self.timeline.clear()
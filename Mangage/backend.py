@@ -0,0 +1,72 @@
+import threading
+
+from config import SPARQL_BACKEND
+
+
+class BackendError(Exception):
+    """A SPARQL backend rejected a request (message is returned in {"error": ...})"""
+
+
+class SPARQLBackend:
+    """
+    Store a SPARQLManager talks to.
+    Implementations return SPARQL 1.1 JSON result documents and raise on
+    failure; SPARQLManager turns exceptions into {"error": str} results.
+    """
+
+    def query_json(self, query, timeout=None):
+        """Run a SELECT/ASK query and return the SPARQL JSON results document"""
+        raise NotImplementedError
+
+    def query_tsv(self, query, timeout=None):
+        """Run a SELECT query and return the text/tab-separated-values result"""
+        raise NotImplementedError
+
+    def iter_bindings(self, query, timeout=None):
+        """Run a SELECT query and return (vars, iterator of binding dicts) without materializing the result"""
+        raise NotImplementedError
+
+    def update(self, query, timeout=None):
+        """Run a SPARQL update; returns the net change in the number of triples,
+        or None when the store does not report it"""
+        raise NotImplementedError
+
+    def upload(self, data, content_type='text/turtle', timeout=None):
+        """Add RDF data to the default graph"""
+        raise NotImplementedError
+
+    def iter_ntriples(self):
+        """Yield the default graph as N-Triples byte chunks"""
+        raise NotImplementedError
+
+    def response_size(self):
+        """Bytes of the last query response read by this thread (None when not measurable)"""
+        return None
+
+    def close(self):
+        pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name=SPARQL_BACKEND):
+    """Instantiate a backend by name: 'fuseki' (HTTP) or 'rdflib' (in-process)"""
+    if name == 'fuseki':
+        from Mangage.http_transport import get_transport
+        return get_transport()
+    if name == 'rdflib':
+        from Mangage.rdflib_backend import RdflibBackend
+        return RdflibBackend()
+    raise ValueError(f"Unknown SPARQL backend: {name}")
+
+
+def get_backend():
+    """Return the process-wide backend selected by SPARQL_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
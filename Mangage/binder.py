@@ -0,0 +1,182 @@
+from collections import namedtuple
+
+from config import NAMESPACE
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+# One field of a bound document: JSON key, result column, full predicate URI,
+# converter (None keeps the value as returned) and whether it is multi-valued
+Field = namedtuple('Field', ['name', 'column', 'predicate', 'convert', 'multi'], defaults=(None, None, False))
+
+# Default for unbound fields that leaves them out of the document
+OMIT = object()
+
+
+def local_name(uri):
+    """Last segment of a URI (after '#', or after the last '/')"""
+    return uri.rsplit('#', 1)[-1] if '#' in uri else uri.rsplit('/', 1)[-1]
+
+
+def _integer(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return value
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _boolean(value):
+    return value if isinstance(value, bool) else str(value).lower() in ('true', '1')
+
+
+CONVERTERS = {
+    'integer': _integer,
+    'int': _integer,
+    'decimal': _float,
+    'float': _float,
+    'double': _float,
+    'boolean': _boolean,
+}
+
+
+def _value(cell):
+    # SPARQL JSON cells are {"type", "value"} objects; TSV rows hold plain values
+    return cell['value'] if isinstance(cell, dict) else cell
+
+
+class RowBinder:
+    """
+    Turns SELECT rows into entity documents ({'uri': ..., field: value}).
+    Fields, result columns, predicate URIs and converters are computed once
+    from the model's Property metadata, so binding is a single pass over rows.
+
+    model:   model class whose `properties` describe the fields
+    key:     'attr' (Python attribute) or 'predicate' (RDF local name) for JSON keys
+    only:    restrict to these JSON keys
+    columns: JSON key -> result column, for queries that alias variables
+    extra:   additional Field tuples (e.g. a class name taken from ?type)
+    nested:  JSON key -> RowBinder of a joined entity found in the same rows
+    default: value of unbound fields (OMIT leaves them out); multi-valued fields default to []
+    typed:   convert values by the properties' datatypes (False keeps them as returned)
+    """
+
+    def __init__(self, model, key='attr', only=None, columns=None, extra=(), nested=None,
+                 subject='s', default=OMIT, typed=True):
+        columns = columns or {}
+        fields = []
+        for prop in model.properties:
+            name = prop.attr if key == 'attr' else prop.predicate
+            if only is not None and name not in only:
+                continue
+            fields.append(Field(name, columns.get(name, prop.predicate), NAMESPACE + prop.predicate,
+                                CONVERTERS.get(prop.datatype) if typed else None, prop.multi))
+        self.fields = tuple(fields) + tuple(extra)
+        self.subject = subject
+        self.nested = dict(nested or {})
+        self.default = default
+        self._by_predicate = {field.predicate: field for field in self.fields if field.predicate}
+        self._template = {}
+        if default is not OMIT:
+            self._template = {field.name: default for field in self.fields if not field.multi}
+            self._template.update((name, None) for name in self.nested)
+        self._multi = tuple(field.name for field in self.fields if field.multi)
+
+    def new(self, uri):
+        """Empty document for `uri`"""
+        document = {'uri': uri}
+        document.update(self._template)
+        if self.default is not OMIT:
+            for name in self._multi:
+                document[name] = []
+        return document
+
+    def _set(self, document, field, value):
+        if field.multi:
+            values = document.get(field.name)
+            if values is None:
+                values = document[field.name] = []
+            # Projected rows concatenate multi-valued properties with spaces
+            for item in (value.split() if isinstance(value, str) else (value,)):
+                if field.convert:
+                    item = field.convert(item)
+                if item not in values:
+                    values.append(item)
+        else:
+            document[field.name] = field.convert(value) if field.convert else value
+
+    def fill(self, document, row):
+        """Copy the bound columns of one row into `document`"""
+        for field in self.fields:
+            cell = row.get(field.column)
+            if cell is not None:
+                self._set(document, field, _value(cell))
+        for name, binder in self.nested.items():
+            cell = row.get(binder.subject)
+            if cell is None:
+                continue
+            uri = _value(cell)
+            child = document.get(name)
+            if child is None or child['uri'] != uri:
+                child = document[name] = binder.new(uri)
+            binder.fill(child, row)
+        return document
+
+    def document(self, row):
+        """Document of a row that holds a whole entity (e.g. a projected_select row)"""
+        return self.fill(self.new(_value(row[self.subject])), row)
+
+    def bind(self, rows):
+        """Group tabular rows by subject into documents, in first-seen order"""
+        documents = {}
+        subject = self.subject
+        for row in rows:
+            cell = row.get(subject)
+            if cell is None:
+                continue
+            uri = _value(cell)
+            document = documents.get(uri)
+            if document is None:
+                document = documents[uri] = self.new(uri)
+            self.fill(document, row)
+        return list(documents.values())
+
+    def bind_triples(self, rows, uri=None, s='s', p='p', o='o'):
+        """
+        Group ?s ?p ?o rows into documents; predicates are matched by full URI
+        and rows of other predicates are ignored. With `uri`, rows are the
+        ?p ?o rows of that single entity.
+        """
+        documents = {}
+        by_predicate = self._by_predicate
+        for row in rows:
+            predicate = row.get(p)
+            field = by_predicate.get(_value(predicate)) if predicate is not None else None
+            if field is None or row.get(o) is None:
+                continue
+            subject = uri or _value(row[s])
+            document = documents.get(subject)
+            if document is None:
+                document = documents[subject] = self.new(subject)
+            self._set(document, field, _value(row[o]))
+        return list(documents.values())
+
+    def bind_entity(self, rows, uri):
+        """Document of `uri` from its ?p ?o rows (e.g. get_by_uri), or None when no field is bound"""
+        documents = self.bind_triples(rows, uri=uri)
+        return documents[0] if documents else None
+
+
+def join(documents, link, related, name):
+    """Embed in each document the related document whose URI is in its `link` field"""
+    by_uri = {document['uri']: document for document in related}
+    for document in documents:
+        target = by_uri.get(document.get(link))
+        if target is not None:
+            document[name] = target
+    return documents
@@ -0,0 +1,105 @@
+import json
+import zlib
+from functools import lru_cache
+
+from config import NAMESPACE, EXPORT_PAGE_SIZE
+from Mangage.binder import RowBinder
+from Mangage.pagination import encode_cursor
+from Mangage.sparql_manager import projected_select, model_class, known_classes
+
+
+@lru_cache(maxsize=None)
+def document_binder(model):
+    """RowBinder of projected_select rows of `model` without its private properties (built once per class)"""
+    return RowBinder(model, only=[prop.attr for prop in model.properties if prop.predicate not in model.private])
+
+
+def private_predicates():
+    """Full URIs of the predicates any model declares private"""
+    from models import MODELS
+    return {NAMESPACE + predicate for model in MODELS.values() for predicate in model.private}
+
+
+def without_predicates(chunks, predicates):
+    """N-Triples byte chunks minus the triples whose predicate is in `predicates` (full URIs)"""
+    predicates = {f"<{predicate}>".encode('utf-8') for predicate in predicates}
+    pending = b''
+    for chunk in chunks:
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        kept = [line for line in lines if _predicate(line) not in predicates]
+        if kept:
+            yield b'\n'.join(kept) + b'\n'
+    if pending and _predicate(pending) not in predicates:
+        yield pending
+
+
+def _predicate(line):
+    # Subjects (IRIs, blank nodes) and predicates contain no spaces
+    parts = line.lstrip().split(b' ', 2)
+    return parts[1] if len(parts) > 1 else None
+
+
+def iter_ndjson(manager, classes=None, page_size=EXPORT_PAGE_SIZE):
+    """
+    Stream entities as NDJSON lines, one document per entity and class.
+    Each class is read page by page (keyset pagination) and every page is
+    decoded while it streams in, so no page is ever held in memory.
+    """
+    for class_name in classes or sorted(known_classes()):
+        cursor = None
+        while True:
+            count = 0
+            last = None
+            for document in iter_documents(manager, class_name, limit=page_size, cursor=cursor):
+                count += 1
+                last = document['uri']
+                document['class'] = class_name
+                yield (json.dumps(document, ensure_ascii=False) + '\n').encode('utf-8')
+            if count < page_size:
+                break
+            cursor = encode_cursor(last)
+
+
+def iter_documents(manager, class_name, limit=None, cursor=None, label=None):
+    """Typed documents of `class_name`, decoded from the streamed projected SELECT one entity at a time"""
+    model = model_class(class_name)
+    if model is None:
+        raise ValueError(f"No model declared for class {class_name}")
+    rows = manager.iter_query(projected_select(class_name, limit=limit, cursor=cursor),
+                              label=label or f"export:{class_name}")
+    if isinstance(rows, dict):
+        raise RuntimeError(f"Reading {class_name} failed: {rows['error']}")
+    binder = document_binder(model)
+    try:
+        for row in rows:
+            yield binder.document(dict(zip(rows.vars, row)))
+    finally:
+        rows.close()
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into a gzip stream, chunk by chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_dataset(manager, fmt='ntriples', classes=None, compress=True, private=False):
+    """
+    Byte chunks of a dataset export: 'ntriples' (whole store) or 'ndjson' (model entities).
+    Private properties (see BaseModel.private) are left out of N-Triples unless
+    `private` is True, and always out of NDJSON documents.
+    """
+    if fmt == 'ntriples':
+        chunks = manager.backend.iter_ntriples()
+        if not private:
+            chunks = without_predicates(chunks, private_predicates())
+    elif fmt == 'ndjson':
+        chunks = iter_ndjson(manager, classes)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return gzip_chunks(chunks) if compress else chunks
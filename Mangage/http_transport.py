@@ -0,0 +1,159 @@
+import base64
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    FUSEKI_QUERY_ENDPOINT, FUSEKI_UPDATE_ENDPOINT, FUSEKI_DATA_ENDPOINT, FUSEKI_USER, FUSEKI_PASSWORD,
+    FUSEKI_POOL_CONNECTIONS, FUSEKI_POOL_MAXSIZE, FUSEKI_CONNECT_TIMEOUT, FUSEKI_READ_TIMEOUT
+)
+from Mangage.backend import SPARQLBackend, BackendError
+from Mangage.streaming import BindingsDecoder
+
+
+class FusekiTransport(SPARQLBackend):
+    """
+    Keep-alive HTTP transport shared by every SPARQLManager.
+    One bounded connection pool is shared by all threads; each thread gets
+    its own lightweight Session mounted on that pool.
+    """
+
+    def __init__(self, query_url=FUSEKI_QUERY_ENDPOINT, update_url=FUSEKI_UPDATE_ENDPOINT,
+                 data_url=FUSEKI_DATA_ENDPOINT, user=FUSEKI_USER, password=FUSEKI_PASSWORD,
+                 pool_connections=FUSEKI_POOL_CONNECTIONS, pool_maxsize=FUSEKI_POOL_MAXSIZE,
+                 connect_timeout=FUSEKI_CONNECT_TIMEOUT, read_timeout=FUSEKI_READ_TIMEOUT):
+        self.query_url = query_url
+        self.update_url = update_url
+        self.data_url = data_url
+        self.timeout = (connect_timeout, read_timeout)
+
+        # pool_block=True keeps the pool bounded: extra threads wait for a free connection
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        # Build the Basic auth header once instead of on every request
+        credentials = f"{user}:{password}".encode('utf-8')
+        self._auth_header = 'Basic ' + base64.b64encode(credentials).decode('ascii')
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            session.headers['Authorization'] = self._auth_header
+            self._local.session = session
+        return session
+
+    def query(self, query, accept='application/sparql-results+json', timeout=None):
+        """POST a SPARQL query and return the raw response"""
+        response = self._session().post(
+            self.query_url,
+            data={'query': query},
+            headers={'Accept': accept},
+            timeout=timeout or self.timeout
+        )
+        response.raise_for_status()
+        return response
+
+    def query_json(self, query, timeout=None):
+        response = self.query(query, timeout=timeout)
+        self._local.response_size = len(response.content)
+        return response.json()
+
+    def query_tsv(self, query, timeout=None):
+        response = self.query(query, accept='text/tab-separated-values', timeout=timeout)
+        self._local.response_size = len(response.content)
+        response.encoding = 'utf-8'
+        return response.text
+
+    def iter_bindings(self, query, timeout=None, chunk_size=16 * 1024):
+        """Stream a SELECT result, decoding bindings as the response body arrives"""
+        response = self._session().post(
+            self.query_url,
+            data={'query': query},
+            headers={'Accept': 'application/sparql-results+json'},
+            timeout=timeout or self.timeout,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+            decoder = BindingsDecoder(response.iter_content(chunk_size=chunk_size))
+        except Exception:
+            response.close()
+            raise
+
+        def bindings():
+            try:
+                yield from decoder
+            finally:
+                response.close()
+
+        return decoder.vars, bindings()
+
+    def response_size(self):
+        return getattr(self._local, 'response_size', None)
+
+    def update(self, query, timeout=None):
+        """POST a SPARQL update"""
+        response = self._session().post(
+            self.update_url,
+            data=query.encode('utf-8'),
+            headers={'Content-Type': 'application/sparql-update; charset=UTF-8'},
+            timeout=timeout or self.timeout
+        )
+        self._check(response)
+
+    def upload(self, data, content_type='text/turtle', timeout=None):
+        """POST RDF to the default graph through the Graph Store Protocol"""
+        response = self._session().post(
+            self.data_url,
+            params={'default': ''},
+            data=data.encode('utf-8'),
+            headers={'Content-Type': f'{content_type}; charset=UTF-8'},
+            timeout=timeout or self.timeout
+        )
+        self._check(response)
+
+    def iter_ntriples(self, chunk_size=64 * 1024):
+        """Stream the default graph as N-Triples through a Graph Store GET"""
+        response = self._session().get(
+            self.data_url,
+            params={'default': ''},
+            headers={'Accept': 'application/n-triples'},
+            timeout=self.timeout,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+    @staticmethod
+    def _check(response):
+        if response.status_code not in [200, 201, 204]:
+            raise BackendError(f"Fuseki returned {response.status_code}: {response.text}")
+
+    def close(self):
+        self._adapter.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide FusekiTransport, creating it on first use"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = FusekiTransport()
+    return _transport
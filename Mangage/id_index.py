@@ -0,0 +1,147 @@
+import logging
+import threading
+
+from config import NAMESPACE
+from Mangage.backend import get_backend
+from Mangage.templates import SPARQLTemplate
+
+logger = logging.getLogger(__name__)
+
+IDS_OF_CLASS = SPARQLTemplate("""
+    SELECT ?uri ?id
+    WHERE {
+        ?uri a ${class:iri} .
+        ?uri eco:id ?id .
+    }
+""", name='ids_of_class')
+
+URI_BY_ID = SPARQLTemplate("""
+    SELECT ?uri
+    WHERE {
+        ?uri a ${class:iri} .
+        ?uri eco:id ${id:integer} .
+    }
+    LIMIT 1
+""", name='uri_by_id')
+
+ID_OF_URI = SPARQLTemplate("""
+    SELECT ?id
+    WHERE { ${uri:iri} eco:id ?id . }
+    LIMIT 1
+""", name='id_of_uri')
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class IdIndex:
+    """
+    In-memory (class name, numeric id) -> URI index for the by-id endpoints.
+    Classes are loaded with one query each (warm), then kept current by the
+    SPARQLManager write paths. A miss falls back to a store lookup, so
+    entities written by other processes are still found; a hit is checked
+    against the eco:id in the store (by uri(), or by the caller reading the
+    entity with verify=False) and dropped when it was deleted or renumbered
+    elsewhere.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._uris = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def warm(self, class_names):
+        """Load every (id, uri) of the classes, one query per class"""
+        for class_name in class_names:
+            try:
+                result = self.backend.query_json(IDS_OF_CLASS.bind(**{'class': f"{NAMESPACE}{class_name}"}))
+            except Exception as e:
+                logger.warning("Could not warm the id index for %s: %s", class_name, e)
+                continue
+            count = 0
+            for row in result['results']['bindings']:
+                entity_id = _as_id(row['id']['value'])
+                if entity_id is not None:
+                    self.add(class_name, entity_id, row['uri']['value'])
+                    count += 1
+            logger.info("id index: %d %s entities", count, class_name)
+
+    def add(self, class_name, entity_id, uri):
+        entity_id = _as_id(entity_id)
+        if entity_id is None:
+            return
+        with self._lock:
+            self._discard(uri)
+            self._uris[(class_name, entity_id)] = uri
+            self._keys[uri] = (class_name, entity_id)
+
+    def add_models(self, models):
+        for model_instance in models:
+            self.add(type(model_instance).__name__, model_instance.id, model_instance.uri)
+
+    def discard(self, uri):
+        with self._lock:
+            self._discard(uri)
+
+    def _discard(self, uri):
+        key = self._keys.pop(uri, None)
+        if key is not None and self._uris.get(key) == uri:
+            del self._uris[key]
+
+    def clear(self):
+        with self._lock:
+            self._uris.clear()
+            self._keys.clear()
+
+    def id_of(self, uri):
+        """eco:id of the entity in the store, None if it has none"""
+        bindings = self.backend.query_json(ID_OF_URI.bind(uri=uri))['results']['bindings']
+        return _as_id(bindings[0]['id']['value']) if bindings else None
+
+    def uri(self, class_name, entity_id, verify=True):
+        """
+        URI of the entity of `class_name` with this id, or None.
+        With verify=False an indexed URI is returned unchecked: the caller
+        must compare it with the entity's eco:id and discard() it on a mismatch.
+        """
+        entity_id = _as_id(entity_id)
+        if entity_id is None:
+            return None
+        uri = self._uris.get((class_name, entity_id))
+        if uri is not None:
+            if not verify or self.id_of(uri) == entity_id:
+                return uri
+            self.discard(uri)
+        result = self.backend.query_json(URI_BY_ID.bind(**{'class': f"{NAMESPACE}{class_name}", 'id': entity_id}))
+        bindings = result['results']['bindings']
+        if not bindings:
+            return None
+        uri = bindings[0]['uri']['value']
+        self.add(class_name, entity_id, uri)
+        return uri
+
+    def __len__(self):
+        return len(self._uris)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_id_index():
+    """Return the process-wide IdIndex shared by every SPARQLManager"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = IdIndex()
+    return _index
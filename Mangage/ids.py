@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import threading
+import uuid
+
+from config import NAMESPACE, ID_ALLOCATOR, ID_BLOCK_SIZE, ID_COUNTER_FILE
+from Mangage.backend import get_backend
+from Mangage.templates import SPARQLTemplate
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Highest numeric id already used by a class, so counters start above existing data
+MAX_ID = SPARQLTemplate("""
+    SELECT (MAX(xsd:integer(STR(?id))) AS ?max)
+    WHERE {
+        ?s a ${class:iri} .
+        ?s eco:id ?id .
+        FILTER(REGEX(STR(?id), "^[0-9]+$"))
+    }
+""", name='max_id')
+
+COUNTER_STATE = SPARQLTemplate("""
+    SELECT ?next ?owner
+    WHERE {
+        ${counter:iri} eco:nextId ?next .
+        OPTIONAL { ${counter:iri} eco:leasedBy ?owner . }
+    }
+""", name='id_counter_state')
+
+# Compare-and-set: only applies while nextId still has the value that was read.
+# The lease token tells the caller whether its update or a concurrent one won.
+LEASE = SPARQLTemplate("""
+    DELETE { ${counter:iri} eco:nextId ?next . ${counter:iri} eco:leasedBy ?owner . }
+    INSERT { ${counter:iri} eco:nextId ${end:integer} . ${counter:iri} eco:leasedBy ${token} . }
+    WHERE {
+        ${counter:iri} eco:nextId ?next .
+        FILTER(?next = ${start:integer})
+        OPTIONAL { ${counter:iri} eco:leasedBy ?owner . }
+    }
+""", name='id_lease')
+
+CREATE_COUNTER = SPARQLTemplate("""
+    INSERT {
+        ${counter:iri} a eco:IdCounter .
+        ${counter:iri} eco:nextId ${end:integer} .
+        ${counter:iri} eco:leasedBy ${token} .
+    }
+    WHERE { FILTER NOT EXISTS { ${counter:iri} eco:nextId ?any . } }
+""", name='id_counter_create')
+
+
+def max_existing_id(class_name, backend=None):
+    """Largest numeric eco:id of the class in the store (0 when none)"""
+    backend = backend or get_backend()
+    result = backend.query_json(MAX_ID.bind(**{'class': f"{NAMESPACE}{class_name}"}))
+    bindings = result['results']['bindings']
+    if bindings and 'max' in bindings[0]:
+        return int(bindings[0]['max']['value'])
+    return 0
+
+
+class IdAllocator:
+    """
+    Hands out increasing integer ids per class name, leasing blocks of
+    `block_size` ids at a time (hi/lo): only the first id of a block needs
+    to reach the shared counter, the rest come from memory.
+    Thread-safe; subclasses implement _lease(class_name, size) -> first id.
+    """
+
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        self.block_size = max(1, int(block_size))
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def next_id(self, class_name):
+        with self._lock:
+            current, end = self._blocks.get(class_name, (0, 0))
+            if current >= end:
+                current = self._lease(class_name, self.block_size)
+                end = current + self.block_size
+            self._blocks[class_name] = (current + 1, end)
+            return current
+
+    def _lease(self, class_name, size):
+        raise NotImplementedError
+
+
+class MemoryIdAllocator(IdAllocator):
+    """Process-local counters starting at 1 (single process, nothing persisted)"""
+
+    def __init__(self, block_size=ID_BLOCK_SIZE):
+        super().__init__(block_size)
+        self._next = {}
+
+    def _lease(self, class_name, size):
+        start = self._next.get(class_name, 1)
+        self._next[class_name] = start + size
+        return start
+
+
+class FileIdAllocator(IdAllocator):
+    """
+    Counters kept in a JSON file, updated under an exclusive file lock and
+    replaced atomically; safe across the processes of one host.
+    A new class starts above the largest id already in the store.
+    """
+
+    def __init__(self, path=ID_COUNTER_FILE, block_size=ID_BLOCK_SIZE, seed=max_existing_id):
+        super().__init__(block_size)
+        self.path = path
+        self.seed = seed
+
+    def _lease(self, class_name, size):
+        with open(f"{self.path}.lock", 'a+b') as lock_file:
+            _lock_file(lock_file)
+            try:
+                counters = {}
+                if os.path.exists(self.path):
+                    with open(self.path, encoding='utf-8') as f:
+                        counters = json.load(f)
+                start = counters.get(class_name)
+                if start is None:
+                    start = self.seed(class_name) + 1
+                counters[class_name] = start + size
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(counters, f, indent=2, sort_keys=True)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            finally:
+                _unlock_file(lock_file)
+        return start
+
+
+class StoreIdAllocator(IdAllocator):
+    """
+    Counters stored in the triplestore as eco:IdCounter nodes, advanced with a
+    compare-and-set update; safe across processes and hosts sharing the store.
+    A lease costs two requests (update, then read back the winner).
+    """
+
+    def __init__(self, block_size=ID_BLOCK_SIZE, backend=None, max_attempts=20):
+        super().__init__(block_size)
+        self._backend = backend
+        self.max_attempts = max_attempts
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _state(self, counter):
+        bindings = self.backend.query_json(COUNTER_STATE.bind(counter=counter))['results']['bindings']
+        if not bindings:
+            return None, None
+        owner = bindings[0].get('owner')
+        return int(bindings[0]['next']['value']), owner['value'] if owner else None
+
+    def _lease(self, class_name, size):
+        counter = f"{NAMESPACE}IdCounter_{class_name}"
+        start, _ = self._state(counter)
+        for _ in range(self.max_attempts):
+            token = uuid.uuid4().hex
+            if start is None:
+                start = max_existing_id(class_name, self.backend) + 1
+                self.backend.update(CREATE_COUNTER.bind(counter=counter, end=start + size, token=token))
+            else:
+                self.backend.update(LEASE.bind(counter=counter, start=start, end=start + size, token=token))
+            current, owner = self._state(counter)
+            if owner == token:
+                return start
+            # Another process leased first: retry from the value it left
+            start = current
+        raise RuntimeError(f"Could not lease ids for {class_name} after {self.max_attempts} attempts")
+
+
+def _lock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_ALLOCATORS = {
+    'store': StoreIdAllocator,
+    'file': FileIdAllocator,
+    'memory': MemoryIdAllocator,
+}
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def create_id_allocator(kind=None):
+    kind = (kind or ID_ALLOCATOR).lower()
+    if kind not in _ALLOCATORS:
+        raise ValueError(f"Unknown ID_ALLOCATOR {kind!r} (expected one of {', '.join(_ALLOCATORS)})")
+    return _ALLOCATORS[kind]()
+
+
+def get_id_allocator():
+    """Return the process-wide allocator selected by ID_ALLOCATOR"""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = create_id_allocator()
+    return _allocator
+
+
+def next_id(class_name):
+    return get_id_allocator().next_id(class_name)
@@ -0,0 +1,120 @@
+import contextvars
+import json
+import logging
+import sys
+import time
+import uuid
+
+from config import LOG_LEVEL, LOG_FORMAT
+
+# Correlation id of the request being served, and the SPARQL work it caused
+request_id = contextvars.ContextVar('request_id', default=None)
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+def _extras(record):
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the current request's correlation id"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for development; `extra` fields are appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        extras = [f"{key}={value}" for key, value in _extras(record).items()]
+        return f"{line} {' '.join(extras)}" if extras else line
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, app=None):
+    """
+    Send application logs to stderr, as JSON lines unless fmt is 'text'.
+    `level` also applies to loggers with a lower level of their own, such as
+    the Flask app logger, which switches to DEBUG in debug mode.
+    """
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(level)
+    handler.addFilter(RequestIdFilter())
+    if fmt == 'text':
+        handler.setFormatter(TextFormatter())
+    else:
+        handler.setFormatter(JsonFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    if app is not None:
+        app.logger.setLevel(level)
+
+
+def record_sparql(duration, rows=None):
+    """Add one backend call to the current request's summary (no-op outside requests)"""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats['sparql_calls'] += 1
+        stats['sparql_ms'] += duration * 1000
+        if rows:
+            stats['rows'] += rows
+
+
+def init_request_logging(app):
+    """Assign a correlation id to every request and log one summary line per request"""
+    from flask import g, request
+
+    logger = logging.getLogger('http')
+
+    @app.before_request
+    def _start_request():
+        request_id.set(request.headers.get('X-Request-ID') or uuid.uuid4().hex)
+        _request_stats.set({'sparql_calls': 0, 'sparql_ms': 0.0, 'rows': 0})
+        g.log_started = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        stats = _request_stats.get()
+        started = getattr(g, 'log_started', None)
+        if stats is not None and started is not None and logger.isEnabledFor(logging.INFO):
+            logger.info('request', extra={
+                'method': request.method,
+                'route': request.url_rule.rule if request.url_rule else request.path,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                'sparql_calls': stats['sparql_calls'],
+                'sparql_ms': round(stats['sparql_ms'], 2),
+                'rows': stats['rows'],
+            })
+        if request_id.get():
+            response.headers['X-Request-ID'] = request_id.get()
+        return response
+
+    return app
@@ -0,0 +1,190 @@
+import logging
+import re
+import threading
+import time
+
+from config import SLOW_QUERY_MS, SLOW_QUERY_LOG_FILE, SLOW_QUERY_MAX_CHARS
+from Mangage.log import record_sparql, JsonFormatter, RequestIdFilter
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+slow_query_log = logging.getLogger('sparql.slow')
+if SLOW_QUERY_LOG_FILE:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG_FILE, encoding='utf-8')
+    _handler.addFilter(RequestIdFilter())
+    _handler.setFormatter(JsonFormatter())
+    slow_query_log.addHandler(_handler)
+    slow_query_log.setLevel(logging.WARNING)
+
+
+# String literals (they may hold emails, password hashes...) and runs of whitespace
+_LITERAL_RE = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|\s+')
+
+
+def redact_query(query, max_chars=SLOW_QUERY_MAX_CHARS):
+    """Query text for logs: string literals replaced by "***", whitespace collapsed, truncated"""
+    text = _LITERAL_RE.sub(lambda m: '"***"' if m.group(1) else ' ', query).strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars] + '...'
+    return text
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label combination"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, counts in series:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.label_names, label_values, [('le', bound)])
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, label_values, [('le', '+Inf')])
+            lines.append(f"{self.name}_bucket{labels} {counts[-1]}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {counts[-2]}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter, one series per label combination"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for label_values, value in series:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+QUERY_DURATION = Histogram(
+    'sparql_query_duration_seconds', 'Time spent in the SPARQL backend per query label.',
+    ('kind', 'label'), DURATION_BUCKETS)
+QUERY_ROWS = Histogram(
+    'sparql_query_rows', 'Rows returned by SELECT queries per query label.',
+    ('label',), ROW_BUCKETS)
+RESPONSE_BYTES = Histogram(
+    'sparql_response_bytes', 'Size of SPARQL query responses per query label (HTTP backends only).',
+    ('label',), SIZE_BUCKETS)
+QUERY_ERRORS = Counter(
+    'sparql_query_errors_total', 'SPARQL requests that failed per query label.',
+    ('kind', 'label'))
+SLOW_QUERIES = Counter(
+    'sparql_slow_queries_total', f'SPARQL requests slower than SLOW_QUERY_MS ({SLOW_QUERY_MS} ms).',
+    ('kind', 'label'))
+HTTP_DURATION = Histogram(
+    'http_request_duration_seconds', 'Flask request latency per route.',
+    ('method', 'route', 'status'), DURATION_BUCKETS)
+
+
+def observe_query(kind, label, query, started, rows=None, size=None, error=False):
+    """Record one backend call that began at time.perf_counter() value `started`"""
+    duration = time.perf_counter() - started
+    record_sparql(duration, rows)
+    QUERY_DURATION.observe(duration, kind, label)
+    if rows is not None:
+        QUERY_ROWS.observe(rows, label)
+    if size is not None:
+        RESPONSE_BYTES.observe(size, label)
+    if error:
+        QUERY_ERRORS.inc(kind, label)
+    if SLOW_QUERY_MS and duration * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(kind, label)
+        slow_query_log.warning("slow %s query %s", kind, label, extra={
+            'kind': kind,
+            'label': label,
+            'duration_ms': round(duration * 1000, 2),
+            'rows': rows,
+            'bytes': size,
+            'query': redact_query(query),
+        })
+
+
+def cache_lines(stats):
+    """Result cache counters (see QueryCache.stats) as Prometheus samples"""
+    lines = []
+    for key, kind, help_text in (
+        ('hits', 'counter', 'Result cache hits.'),
+        ('misses', 'counter', 'Result cache misses.'),
+        ('evictions', 'counter', 'Result cache LRU evictions.'),
+        ('expirations', 'counter', 'Result cache TTL expirations.'),
+        ('invalidations', 'counter', 'Result cache entries dropped by writes.'),
+        ('size', 'gauge', 'Entries in the result cache.'),
+    ):
+        name = f"sparql_cache_{key}" + ('_total' if kind == 'counter' else '')
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {stats[key]}"]
+    return lines
+
+
+def render_metrics(cache_stats=None):
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in (QUERY_DURATION, QUERY_ROWS, RESPONSE_BYTES, QUERY_ERRORS, SLOW_QUERIES, HTTP_DURATION):
+        lines += metric.render()
+    if cache_stats is not None:
+        lines += cache_lines(cache_stats)
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Time every Flask request into HTTP_DURATION, labelled by route rule"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        started = getattr(g, 'request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_DURATION.observe(time.perf_counter() - started, request.method, route, response.status_code)
+        return response
+
+    return app
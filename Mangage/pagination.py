@@ -0,0 +1,65 @@
+import base64
+import binascii
+
+
+def encode_cursor(uri):
+    """Opaque, URL-safe cursor for a subject URI (URIs contain '#')"""
+    return base64.urlsafe_b64encode(uri.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Subject URI encoded in a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(var, cursor):
+    """FILTER keeping only subjects after the cursor (empty when there is no cursor)"""
+    if not cursor:
+        return ""
+    after = decode_cursor(cursor).replace('\\', '\\\\').replace('"', '\\"')
+    return f'FILTER(STR(?{var}) > "{after}")'
+
+
+def keyset_order(var, limit):
+    """ORDER BY / LIMIT solution modifiers for a keyset page"""
+    return f"ORDER BY STR(?{var}) LIMIT {int(limit)}"
+
+
+def keyset_subquery(var, pattern, limit, cursor=None):
+    """
+    Sub-SELECT restricting ?var to one page of the subjects matching `pattern`.
+    Returns an empty string when limit is None so unpaged queries stay as they were.
+    """
+    if limit is None:
+        return ""
+    return f"""{{
+                SELECT DISTINCT ?{var} WHERE {{
+                    {pattern}
+                    {keyset_filter(var, cursor)}
+                }}
+                {keyset_order(var, limit)}
+            }}"""
+
+
+def next_cursor(rows, limit, var='s'):
+    """
+    Cursor of the page after `rows`, or None on the last page.
+    `rows` may hold several rows per subject as long as they are ordered by subject.
+    Rows are SPARQL JSON bindings or plain values (result_format='tsv').
+    """
+    if limit is None or not isinstance(rows, list):
+        return None
+    seen = 0
+    last = None
+    for row in rows:
+        value = row.get(var)
+        if isinstance(value, dict):
+            value = value.get('value')
+        if value is not None and value != last:
+            seen += 1
+            last = value
+    return encode_cursor(last) if last is not None and seen >= limit else None
@@ -0,0 +1,144 @@
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import NAMESPACE, QUERY_CACHE_ENABLED, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL
+
+# Whitespace outside of string literals is not significant in SPARQL
+_TOKEN_RE = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|\s+')
+# "?s a <ns#Class>", "?s a eco:Class", "?s rdf:type ns:Class" ...
+_TYPE_RE = re.compile(
+    r'(?:\sa|rdf:type|<http://www\.w3\.org/1999/02/22-rdf-syntax-ns#type>)\s+'
+    r'(?:<' + re.escape(NAMESPACE) + r'(\w+)>|\w*:(\w+))'
+)
+_NS_URI_RE = re.compile(r'<' + re.escape(NAMESPACE) + r'([^>\s]+)>')
+
+
+def normalize_query(query):
+    """Collapse insignificant whitespace so equivalent queries share a cache key"""
+    return _TOKEN_RE.sub(lambda m: m.group(1) or ' ', query).strip()
+
+
+def class_from_uri(uri):
+    """Guess the class of an entity from the NAMESPACE + Class_suffix URI convention"""
+    local = uri[len(NAMESPACE):] if uri.startswith(NAMESPACE) else uri.rsplit('#', 1)[-1]
+    return local.split('_', 1)[0]
+
+
+def detect_classes(query, known_classes):
+    """Return the known classes a query refers to, by rdf:type pattern or subject URI"""
+    classes = set()
+    for full, prefixed in _TYPE_RE.findall(query):
+        classes.add(full or prefixed)
+    for local in _NS_URI_RE.findall(query):
+        cls = local.split('_', 1)[0]
+        if cls in known_classes:
+            classes.add(cls)
+    return classes & known_classes
+
+
+class QueryCache:
+    """
+    Thread-safe LRU + TTL cache for SELECT/ASK results.
+    Each entry is tagged with the classes its query touches so writes can
+    drop only the affected entries. Untagged entries are dropped on any write.
+    Every invalidation advances `generation`: a result fetched before it is
+    not stored (see put). Values are copied in and out, so callers may
+    modify what they get.
+    Invalidation only reaches this process; other processes keep their
+    entries until the TTL expires.
+    """
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES, ttl=QUERY_CACHE_TTL, enabled=QUERY_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key, value, tags, generation=None):
+        """
+        Store `value`; with `generation` (read before the fetch started), the
+        value is dropped if an invalidation happened in between
+        """
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, classes=None):
+        """Drop entries tagged with any of `classes`; drop everything if classes is empty/None"""
+        with self._lock:
+            self.generation += 1
+            if not classes:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            classes = set(classes)
+            stale = [key for key, (_, _, tags) in self._entries.items()
+                     if not tags or tags & classes]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        self.invalidate(None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    """Return the process-wide QueryCache shared by every SPARQLManager"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache()
+    return _cache
@@ -0,0 +1,155 @@
+import atexit
+import os
+import tempfile
+import threading
+
+from rdflib import Graph, BNode, Literal
+
+from config import RDFLIB_ONTOLOGY, RDFLIB_SNAPSHOT
+from Mangage.backend import SPARQLBackend, BackendError
+from Mangage.tsv import format_term
+
+_FORMATS = {
+    'text/turtle': 'turtle',
+    'application/n-triples': 'nt',
+    'application/rdf+xml': 'xml',
+    'application/ld+json': 'json-ld',
+}
+
+
+def _term(term):
+    """SPARQL JSON binding of an rdflib term"""
+    if isinstance(term, Literal):
+        binding = {'type': 'literal', 'value': str(term)}
+        if term.language:
+            binding['xml:lang'] = term.language
+        elif term.datatype:
+            binding['datatype'] = str(term.datatype)
+        return binding
+    if isinstance(term, BNode):
+        return {'type': 'bnode', 'value': str(term)}
+    return {'type': 'uri', 'value': str(term)}
+
+
+class RdflibBackend(SPARQLBackend):
+    """
+    In-process store on an rdflib Graph, for edge deployments and tests
+    that should not need a Fuseki container.
+    Loads the N-Triples snapshot if it exists (it already contains the
+    ontology), the ontology otherwise. The snapshot is written back by
+    save(), and at exit when a snapshot path is set.
+    Queries are serialized with a lock; timeouts are not enforced.
+    """
+
+    def __init__(self, ontology_path=RDFLIB_ONTOLOGY, snapshot_path=RDFLIB_SNAPSHOT):
+        self.graph = Graph()
+        self.snapshot_path = snapshot_path
+        self._lock = threading.RLock()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.graph.parse(snapshot_path, format='nt')
+        elif ontology_path and os.path.exists(ontology_path):
+            self.graph.parse(ontology_path, format='xml')
+        if snapshot_path:
+            atexit.register(self.save)
+
+    def query_json(self, query, timeout=None):
+        with self._lock:
+            try:
+                result = self.graph.query(query)
+            except Exception as e:
+                raise BackendError(f"rdflib query failed: {e}") from e
+            if result.type == 'ASK':
+                return {'head': {}, 'boolean': bool(result.askAnswer)}
+            if result.type != 'SELECT':
+                raise BackendError(f"Unsupported query form: {result.type}")
+            names = [str(var) for var in result.vars]
+            bindings = []
+            for row in result:
+                bindings.append({name: _term(value) for name, value in zip(names, row) if value is not None})
+        return {'head': {'vars': names}, 'results': {'bindings': bindings}}
+
+    def query_tsv(self, query, timeout=None):
+        names, bindings = self.iter_bindings(query, timeout=timeout)
+        lines = ['\t'.join(f"?{name}" for name in names)]
+        for binding in bindings:
+            cells = []
+            for name in names:
+                cell = binding.get(name)
+                cells.append(format_term(cell['type'], cell['value'], cell.get('datatype'), cell.get('xml:lang'))
+                             if cell else '')
+            lines.append('\t'.join(cells))
+        return '\n'.join(lines) + '\n'
+
+    def iter_bindings(self, query, timeout=None):
+        # rdflib evaluates the query eagerly; only the JSON conversion is deferred
+        with self._lock:
+            try:
+                result = self.graph.query(query)
+                rows = list(result)
+            except Exception as e:
+                raise BackendError(f"rdflib query failed: {e}") from e
+            if result.type != 'SELECT':
+                raise BackendError(f"Unsupported query form: {result.type}")
+            names = [str(var) for var in result.vars]
+        bindings = ({name: _term(value) for name, value in zip(names, row) if value is not None} for row in rows)
+        return names, bindings
+
+    def update(self, query, timeout=None):
+        with self._lock:
+            before = len(self.graph)
+            try:
+                self.graph.update(query)
+            except Exception as e:
+                raise BackendError(f"rdflib update failed: {e}") from e
+            return len(self.graph) - before
+
+    def upload(self, data, content_type='text/turtle', timeout=None):
+        fmt = _FORMATS.get(content_type.split(';')[0].strip())
+        if fmt is None:
+            raise BackendError(f"Unsupported content type: {content_type}")
+        # Parse into a scratch graph first so a malformed chunk adds nothing
+        parsed = Graph()
+        try:
+            parsed.parse(data=data, format=fmt)
+        except Exception as e:
+            raise BackendError(f"rdflib could not parse upload: {e}") from e
+        with self._lock:
+            self.graph += parsed
+
+    def _write_ntriples(self, f, batch_size=10000):
+        """Write the graph as N-Triples to a binary file; the caller holds the lock"""
+        lines = []
+        for s, p, o in self.graph:
+            lines.append(f"{s.n3()} {p.n3()} {o.n3()} .\n")
+            if len(lines) >= batch_size:
+                f.write(''.join(lines).encode('utf-8'))
+                lines = []
+        if lines:
+            f.write(''.join(lines).encode('utf-8'))
+
+    def iter_ntriples(self, chunk_size=64 * 1024):
+        # The graph is dumped to a temporary file under the lock, so the export is
+        # a consistent snapshot, then streamed from it without blocking other requests
+        with tempfile.TemporaryFile() as f:
+            with self._lock:
+                self._write_ntriples(f)
+            f.seek(0)
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def save(self, path=None):
+        """Write the graph as N-Triples to `path` (default: the snapshot path)"""
+        path = path or self.snapshot_path
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                self._write_ntriples(f)
+            os.replace(tmp_path, path)
+
+    def close(self):
+        self.save()
@@ -0,0 +1,171 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from config import RESERVATION_EXPIRY_INTERVAL, RESERVATION_PENDING_TIMEOUT, RESERVATION_EXPIRY_BATCH
+from Mangage.templates import SPARQLTemplate, PREFIXES, iri, string
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_STATUSES = ('en_attente', 'confirmee', 'annulee')
+
+# Pending reservations whose time has passed, or created before ${created_before}.
+# Dates, times (HH:MM) and creation timestamps are compared on their ISO forms.
+STALE_PENDING = SPARQLTemplate("""
+    SELECT ?reservation
+    WHERE {
+        ?reservation a eco:ReservationRestaurant .
+        ?reservation eco:statut ?statut .
+        FILTER(STR(?statut) = "en_attente")
+        ?reservation eco:dateReservation ?date .
+        OPTIONAL { ?reservation eco:heureReservation ?heure . }
+        OPTIONAL { ?reservation eco:dateCreation ?created . }
+        FILTER(STR(?date) < ${today}
+               || (STR(?date) = ${today} && BOUND(?heure) && STR(?heure) < ${now})
+               || (BOUND(?created) && STR(?created) < ${created_before}))
+    }
+    LIMIT ${limit:integer}
+""", name='stale_pending_reservations')
+
+# Reservations of a batch whose status will change; `condition` restricts
+# the statuses replaced
+_CHANGING = """
+SELECT DISTINCT ?reservation
+WHERE {{
+    VALUES ?reservation {{ {uris} }}
+    ?reservation a eco:ReservationRestaurant .
+    ?reservation eco:statut ?statut .
+    FILTER(STR(?statut) != {statut})
+    {condition}
+}}
+"""
+
+# One update for a whole batch, applied to the reservations selected above
+_SET_STATUS = """
+DELETE {{ ?reservation eco:statut ?statut . }}
+INSERT {{ ?reservation eco:statut {statut} . }}
+WHERE {{
+    VALUES ?reservation {{ {uris} }}
+    ?reservation a eco:ReservationRestaurant .
+    ?reservation eco:statut ?statut .
+    FILTER(STR(?statut) != {statut})
+    {condition}
+}}
+"""
+
+
+def set_statuses(manager, uris, statut, only_from=None, batch_size=RESERVATION_EXPIRY_BATCH):
+    """
+    Set the status of many reservations, one query and one update per
+    `batch_size` URIs: the query selects the reservations whose status
+    differs, and only those are updated. With `only_from`, only reservations
+    currently in that status change.
+    Returns {"success": True, "changed": count} or {"error": ...}; raises
+    ValueError on an invalid status or URI.
+    """
+    if statut not in RESERVATION_STATUSES:
+        raise ValueError(f"Invalid status. Must be one of: {list(RESERVATION_STATUSES)}")
+    uris = list(dict.fromkeys(uris))
+    terms = [iri(uri) for uri in uris]
+    condition = f'FILTER(STR(?statut) = {string(only_from)})' if only_from else ''
+    changed = 0
+    for start in range(0, len(terms), batch_size):
+        rows = manager.execute_query(PREFIXES + _CHANGING.format(
+            uris=' '.join(terms[start:start + batch_size]),
+            statut=string(statut),
+            condition=condition,
+        ), label='changing_reservation_statuses', use_cache=False)
+        if isinstance(rows, dict):
+            return rows
+        changing = [iri(row['reservation']['value']) for row in rows]
+        if not changing:
+            continue
+        update = PREFIXES + _SET_STATUS.format(
+            statut=string(statut),
+            uris=' '.join(changing),
+            condition=condition,
+        )
+        result = manager.execute_update(update, label='set_reservation_statuses')
+        if 'error' in result:
+            return result
+        changed += len(changing)
+    return {"success": True, "changed": changed}
+
+
+class ReservationExpiry:
+    """
+    Cancels stale pending reservations in the background, so they stop
+    holding seats: those whose time has passed, and, when
+    RESERVATION_PENDING_TIMEOUT is set (0, the default, disables it), those
+    still pending that many hours after creation. Every
+    RESERVATION_EXPIRY_INTERVAL seconds once start() is called (by the app
+    entrypoint, not on import), stale reservations are selected and cancelled
+    in batches (see set_statuses), and the admission ledgers holding them
+    are invalidated.
+    Only reservations still pending are changed, so running it in several
+    processes is harmless.
+    """
+
+    def __init__(self, manager, admission=None, interval=RESERVATION_EXPIRY_INTERVAL,
+                 timeout=RESERVATION_PENDING_TIMEOUT, batch_size=RESERVATION_EXPIRY_BATCH):
+        self.manager = manager
+        self.admission = admission
+        self.interval = interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stale(self, now):
+        created_before = (now - timedelta(hours=self.timeout)).isoformat() if self.timeout else ''
+        rows = self.manager.execute_prepared(STALE_PENDING, {
+            'today': now.date().isoformat(),
+            'now': now.strftime('%H:%M'),
+            'created_before': created_before,
+            'limit': self.batch_size,
+        }, use_cache=False)
+        if isinstance(rows, dict):
+            raise RuntimeError(rows['error'])
+        return [row['reservation']['value'] for row in rows]
+
+    def run_once(self, now=None):
+        """Cancel every stale pending reservation; returns how many were cancelled"""
+        now = now or datetime.now()
+        cancelled = 0
+        while True:
+            uris = self._stale(now)
+            if not uris:
+                break
+            result = set_statuses(self.manager, uris, 'annulee', only_from='en_attente',
+                                  batch_size=self.batch_size)
+            if self.admission is not None:
+                self.admission.invalidate(*uris)
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+            cancelled += result['changed']
+            if len(uris) < self.batch_size:
+                break
+        if cancelled:
+            logger.info("Cancelled %d stale pending reservations", cancelled)
+        return cancelled
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Reservation expiry failed")
+
+    def start(self):
+        """Start the background thread (no-op when interval <= 0 or already running)"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='reservation-expiry', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
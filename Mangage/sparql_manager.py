@@ -1,96 +1,477 @@
-from SPARQLWrapper import SPARQLWrapper, JSON, POST, BASIC
-import requests
-from config import FUSEKI_QUERY_ENDPOINT, FUSEKI_UPDATE_ENDPOINT, FUSEKI_USER, FUSEKI_PASSWORD, NAMESPACE
+import inspect
+import logging
+import math
+import sys
+import time
+
+from config import NAMESPACE, BULK_CHUNK_SIZE
+from Mangage.backend import get_backend
+from Mangage.query_cache import get_query_cache, normalize_query, detect_classes, class_from_uri
+from Mangage.pagination import keyset_filter, keyset_order, keyset_subquery
+from Mangage.metrics import observe_query
+from Mangage.templates import SPARQLTemplate, escape, iri
+from Mangage.streaming import QueryRows, compact_rows
+from Mangage.tsv import parse_tsv
+from Mangage.triples import TripleWriter, insert_data, ntriples
+from Mangage.id_index import get_id_index
+from Mangage.user_index import get_user_index
+
+logger = logging.getLogger(__name__)
+
+# Prepared queries of the hot read paths (see Mangage.templates)
+GET_BY_URI = SPARQLTemplate("""
+    SELECT ?p ?o
+    WHERE { ${uri:iri} ?p ?o . }
+""", name='get_by_uri')
+
+ENTITY_EXISTS = SPARQLTemplate("""
+    SELECT (1 AS ?found)
+    WHERE { ${uri:iri} ?p ?o . }
+    LIMIT 1
+""", name='entity_exists')
+
+SEARCH_BY_NAME = SPARQLTemplate("""
+    SELECT ?s ?type ?p ?o
+    WHERE {
+        ?s eco:nom ?nom .
+        ?s a ?type .
+        ?s ?p ?o .
+        FILTER(CONTAINS(LCASE(STR(?nom)), LCASE(${name})))
+    }
+""", name='search_by_name')
+
+TOURISTES_BY_DESTINATION = SPARQLTemplate("""
+    SELECT ?touriste ?nom ?age
+    WHERE {
+        ?touriste a eco:Touriste .
+        ?touriste eco:nom ?nom .
+        OPTIONAL { ?touriste eco:age ?age . }
+        ?touriste eco:sejourneDans ?hebergement .
+        ?hebergement eco:situeDans ${destination:iri} .
+    }
+""", name='get_touristes_by_destination')
+
+ACTIVITIES_BY_DIFFICULTY = SPARQLTemplate("""
+    SELECT ?activite ?nom ?duree ?prix
+    WHERE {
+        ?activite a eco:Activite .
+        ?activite eco:nom ?nom .
+        ?activite eco:difficulte ${difficulty} .
+        OPTIONAL { ?activite eco:dureeHeures ?duree . }
+        OPTIONAL { ?activite eco:prix ?prix . }
+    }
+""", name='get_activities_by_difficulty')
+
+CERTIFIED_ENTITIES = SPARQLTemplate("""
+    SELECT ?entity ?type ?nom
+    WHERE {
+        ?entity eco:aCertification ${certification:iri} .
+        ?entity a ?type .
+        OPTIONAL { ?entity eco:nom ?nom . }
+    }
+""", name='get_certified_entities')
+
+EVENTS_BY_DATE_RANGE = SPARQLTemplate("""
+    SELECT ?event ?nom ?date ?prix
+    WHERE {
+        ?event a eco:Evenement .
+        ?event eco:nom ?nom .
+        ?event eco:eventDate ?date .
+        OPTIONAL { ?event eco:eventPrix ?prix . }
+        FILTER(?date >= ${start:date} && ?date <= ${end:date})
+    }
+""", name='get_events_by_date_range')
+
+def model_class(class_name):
+    """Model class declared in models/ for an RDF class name (or None)"""
+    from models import MODELS
+    return MODELS.get(class_name)
+
+def known_classes():
+    """Names of every model class, used to tag cached queries"""
+    from models import MODELS
+    return frozenset(MODELS)
+
+def build_model(class_name, record):
+    """
+    Instantiate the model of `class_name` from a JSON record.
+    Keys are constructor arguments; keys shadowing a builtin (e.g. 'type')
+    are passed as their underscored parameter ('type_').
+    """
+    model = model_class(class_name)
+    if model is None:
+        raise ValueError(f"No model declared for class {class_name}")
+    params = inspect.signature(model.__init__).parameters
+    kwargs = {}
+    for key, value in record.items():
+        if key not in params and f"{key}_" in params:
+            key = f"{key}_"
+        kwargs[key] = value
+    return model(**kwargs)
+
+def owned_predicates(class_name):
+    """Predicates whose objects are owned by (and deleted with) an entity of `class_name`.
+    Unknown classes use every owned predicate declared in models/."""
+    from models import MODELS
+    model = MODELS.get(class_name)
+    if model is not None:
+        return model.owns
+    return tuple(sorted({predicate for model in MODELS.values() for predicate in model.owns}))
+
+def projected_select(class_name, where_extra="", limit=None, cursor=None):
+    """
+    Build one SELECT returning a row per entity of `class_name`, with a column
+    per property declared on the model. Multi-valued properties are returned
+    as space-separated URIs. With a limit, returns the keyset page after `cursor`.
+    """
+    model = model_class(class_name)
+    if model is None:
+        raise ValueError(f"No model declared for class {class_name}")
+    columns = []
+    optionals = []
+    for prop in model.properties:
+        var = f"?v_{prop.predicate}"
+        if prop.multi:
+            columns.append(f'(GROUP_CONCAT(DISTINCT STR({var}); separator=" ") AS ?{prop.predicate})')
+        else:
+            columns.append(f"(SAMPLE({var}) AS ?{prop.predicate})")
+        optionals.append(f"OPTIONAL {{ ?s <{NAMESPACE}{prop.predicate}> {var} . }}")
+    nl = "\n            "
+    return f"""
+        SELECT ?s {' '.join(columns)}
+        WHERE {{
+            ?s a <{NAMESPACE}{class_name}> .
+            {where_extra}
+            {keyset_filter('s', cursor)}
+            {nl.join(optionals)}
+        }}
+        GROUP BY ?s
+        {keyset_order('s', limit) if limit is not None else ''}
+        """
+
+def _filter_term(value):
+    """SPARQL term of a search filter value: strings as plain literals, numbers
+    and booleans as such; raises ValueError on anything else"""
+    if isinstance(value, str):
+        return f'"{escape(value)}"'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float) and math.isfinite(value):
+        return repr(value)
+    raise ValueError(f"Invalid filter value: {value!r}")
 
 class SPARQLManager:
-    def __init__(self):
-        self.query_endpoint = SPARQLWrapper(FUSEKI_QUERY_ENDPOINT)
-        
-        self.query_endpoint.setHTTPAuth(BASIC)
-        self.query_endpoint.setCredentials(FUSEKI_USER, FUSEKI_PASSWORD)
-        self.query_endpoint.setReturnFormat(JSON)
+    def __init__(self, backend=None, cache=None, id_index=None, user_index=None):
+        # All managers share one backend (see SPARQL_BACKEND), one result cache,
+        # one (class, id) -> uri index and one email -> account index
+        # (compared with None: an empty cache or index is falsy)
+        self.backend = backend if backend is not None else get_backend()
+        self.cache = cache if cache is not None else get_query_cache()
+        self.id_index = id_index if id_index is not None else get_id_index()
+        self.user_index = user_index if user_index is not None else get_user_index()
     
-    def execute_query(self, query):
-        """Execute SPARQL SELECT query"""
-        try:
-            self.query_endpoint.setQuery(query)
-            results = self.query_endpoint.query().convert()
-            return results['results']['bindings']
-        except Exception as e:
-            return {"error": str(e)}
+    def _cached(self, kind, query, fetch, use_cache=True):
+        """Read-through lookup in the shared result cache"""
+        if not (use_cache and self.cache.enabled):
+            return fetch()
+        key = (kind, normalize_query(query))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        # Read before fetching, so a write that lands meanwhile keeps the result out
+        generation = self.cache.generation
+        result = fetch()
+        if not (isinstance(result, dict) and 'error' in result):
+            self.cache.put(key, result, detect_classes(query, known_classes()), generation)
+        return result
+    
+    def _classes_for(self, uri):
+        """Classes to invalidate when `uri` changes (an empty set means everything)"""
+        cls = class_from_uri(uri)
+        return {cls} if cls in known_classes() else set()
     
-    def execute_ask(self, query):
+    def execute_query(self, query, timeout=None, use_cache=True, label=None, result_format='json'):
+        """Execute SPARQL SELECT query.
+        `label` names the query in metrics and the slow-query log
+        (default: the calling function).
+        With result_format='tsv' the result is fetched as tab-separated values
+        and each row is a dict of typed values ({'nom': 'x', 'age': 30}, None
+        when unbound) instead of a SPARQL JSON binding; use it for flat tabular queries.
+        'tsv-text' keeps every literal as its lexical string ({'age': '30'}),
+        like the values of JSON bindings."""
+        label = label or sys._getframe(1).f_code.co_name
+        if result_format not in ('json', 'tsv', 'tsv-text'):
+            raise ValueError(f"Unknown result format: {result_format}")
+        def fetch():
+            started = time.perf_counter()
+            try:
+                if result_format != 'json':
+                    names, values = parse_tsv(self.backend.query_tsv(query, timeout=timeout),
+                                              typed=result_format == 'tsv')
+                    rows = [dict(zip(names, row)) for row in values]
+                else:
+                    rows = self.backend.query_json(query, timeout=timeout)['results']['bindings']
+            except Exception as e:
+                observe_query('select', label, query, started, error=True)
+                return {"error": str(e)}
+            observe_query('select', label, query, started, rows=len(rows), size=self.backend.response_size())
+            return rows
+        return self._cached('select' if result_format == 'json' else f'select-{result_format}', query, fetch, use_cache)
+    
+    def execute_ask(self, query, timeout=None, use_cache=True, label=None):
         """Execute SPARQL ASK query - returns True/False"""
-        try:
-            from SPARQLWrapper import JSON as SPARQL_JSON
-            sparql = SPARQLWrapper(FUSEKI_QUERY_ENDPOINT)
-            sparql.setHTTPAuth(BASIC)
-            sparql.setCredentials(FUSEKI_USER, FUSEKI_PASSWORD)
-            sparql.setQuery(query)
-            sparql.setReturnFormat(SPARQL_JSON)
-            results = sparql.query().convert()
+        label = label or sys._getframe(1).f_code.co_name
+        def fetch():
+            started = time.perf_counter()
+            try:
+                results = self.backend.query_json(query, timeout=timeout)
+            except Exception as e:
+                observe_query('ask', label, query, started, error=True)
+                logger.warning("ASK query failed: %s", e, extra={'label': label})
+                return {"error": str(e)}
+            observe_query('ask', label, query, started, size=self.backend.response_size())
             return results.get('boolean', False)
+        result = self._cached('ask', query, fetch, use_cache)
+        return False if isinstance(result, dict) else result
+    
+    def execute_update(self, query, timeout=None, invalidate=None, label=None, delta=False):
+        """Execute SPARQL INSERT/DELETE/UPDATE query.
+        `invalidate` lists the classes whose cached results become stale;
+        by default they are detected from the update text.
+        With delta=True the result holds the net change in the number of
+        triples as 'triple_delta', when the backend reports it."""
+        label = label or sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            change = self.backend.update(query, timeout=timeout)
+            observe_query('update', label, query, started)
+            if delta and change is not None:
+                return {"success": True, "triple_delta": change}
+            return {"success": True}
         except Exception as e:
-            print(f"Error executing ASK query: {e}")
-            return False
+            observe_query('update', label, query, started, error=True)
+            return {"error": str(e)}
+        finally:
+            if invalidate is None:
+                invalidate = detect_classes(query, known_classes())
+            self.cache.invalidate(invalidate)
     
-    def execute_update(self, query):
-        """Execute SPARQL INSERT/DELETE/UPDATE query using requests directly"""
+    def execute_prepared(self, template, values, timeout=None, use_cache=True, label=None):
+        """
+        Bind `values` into a SPARQLTemplate and run it as a SELECT, ASK or update.
+        Invalid or missing values are returned as {"error": ...} without
+        reaching the backend (ASK templates return False).
+        """
+        label = label or template.name or sys._getframe(1).f_code.co_name
         try:
-            # Encode query as UTF-8 bytes to handle special characters
-            query_bytes = query.encode('utf-8')
-            response = requests.post(
-                FUSEKI_UPDATE_ENDPOINT,
-                data=query_bytes,
-                headers={'Content-Type': 'application/sparql-update; charset=UTF-8'},
-                auth=(FUSEKI_USER, FUSEKI_PASSWORD)
-            )
-            if response.status_code in [200, 201, 204]:
-                return {"success": True}
-            else:
-                return {"error": f"Fuseki returned {response.status_code}: {response.text}"}
+            query = template.bind(**values)
+        except ValueError as e:
+            return False if template.form == 'ASK' else {"error": str(e)}
+        if template.is_update:
+            return self.execute_update(query, timeout=timeout, label=label)
+        if template.form == 'ASK':
+            return self.execute_ask(query, timeout=timeout, use_cache=use_cache, label=label)
+        return self.execute_query(query, timeout=timeout, use_cache=use_cache, label=label)
+
+    def iter_query(self, query, timeout=None, label=None):
+        """
+        Execute a SPARQL SELECT and stream its rows as they are decoded.
+        Returns a QueryRows whose `vars` lists the columns and whose rows are
+        tuples of values in that order (None when unbound), or {"error": ...}
+        if the query could not be started. Results are never cached; the query
+        is recorded in metrics once the rows are exhausted or closed.
+        """
+        label = label or sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            names, bindings = self.backend.iter_bindings(query, timeout=timeout)
         except Exception as e:
+            observe_query('select', label, query, started, error=True)
             return {"error": str(e)}
+        def rows():
+            count = 0
+            failed = False
+            try:
+                for row in compact_rows(names, bindings):
+                    count += 1
+                    yield row
+            except Exception:
+                failed = True
+                raise
+            finally:
+                close = getattr(bindings, 'close', None)
+                if close is not None:
+                    close()
+                observe_query('select', label, query, started, rows=count, error=failed)
+        return QueryRows(names, rows())
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the shared result cache"""
+        return self.cache.stats()
     
     # CREATE
     def create(self, model_instance):
         """Insert a new entity"""
+        return self.create_many([model_instance])
+    
+    def create_many(self, models):
+        """Insert several entities in a single INSERT DATA request"""
+        models = list(models)
         try:
-            triples = model_instance.to_sparql_insert()
-            query = f"""
-            PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-            PREFIX eco: <{NAMESPACE}>
-            
-            INSERT DATA {{
-            {triples}
-            }}
-            """
-            print(f"Executing SPARQL update:\n{query}")  # Debug log
+            uris = ", ".join(model_instance.assign_id().uri for model_instance in models)
+            query = insert_data(models)
+            logger.debug("create %s", uris, extra={'query': query})
             result = self.execute_update(query)
-            print(f"SPARQL update result: {result}")  # Debug log
+            if 'error' in result:
+                logger.error("create %s failed: %s", uris, result['error'])
+            else:
+                self.id_index.add_models(models)
             return result
         except Exception as e:
             error_msg = f"Error in create: {str(e)}"
-            print(error_msg, exc_info=True)  # Debug log
+            logger.exception(error_msg)
             return {'error': error_msg}
     
+    def replace(self, model_instance):
+        """
+        Replace all triples of an existing entity (and its owned children) by
+        those of `model_instance`, with the same URI, in one update request.
+        References to the entity are kept.
+        """
+        try:
+            uri = model_instance.assign_id().uri
+            triples = TripleWriter().model(model_instance).text()
+        except Exception as e:
+            error_msg = f"Error in replace: {str(e)}"
+            logger.exception(error_msg)
+            return {'error': error_msg}
+        operations = []
+        for predicate in owned_predicates(type(model_instance).__name__):
+            operations.append(f"""DELETE {{ ?child ?p ?o . }}
+        WHERE {{ <{uri}> <{NAMESPACE}{predicate}> ?child . ?child ?p ?o . }}""")
+        operations.append(f"DELETE WHERE {{ <{uri}> ?p ?o . }}")
+        operations.append(f"INSERT DATA {{\n{triples}}}")
+        separator = " ;\n        "
+        query = separator.join(operations)
+        result = self.execute_update(query, invalidate=self._classes_for(uri) | {type(model_instance).__name__})
+        self.user_index.discard(uri)
+        if result.get('success'):
+            self.id_index.add_models([model_instance])
+        return result
+    
+    def iter_bulk_create(self, models, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Upload entities through the Graph Store data endpoint, `chunk_size`
+        entities per request. `models` may be any iterable (e.g. a generator
+        over a streamed request). Yields one report per chunk.
+        """
+        chunk = []
+        index = 0
+        for model_instance in models:
+            chunk.append(model_instance)
+            if len(chunk) >= chunk_size:
+                yield self._upload_chunk(chunk, index, index * chunk_size)
+                index += 1
+                chunk = []
+        if chunk:
+            yield self._upload_chunk(chunk, index, index * chunk_size)
+    
+    def bulk_create(self, models, chunk_size=BULK_CHUNK_SIZE):
+        """Insert many entities in a few large uploads instead of one INSERT DATA each"""
+        chunks = list(self.iter_bulk_create(models, chunk_size))
+        return {
+            "success": all(chunk['success'] for chunk in chunks),
+            "created": sum(chunk['count'] for chunk in chunks if chunk['success']),
+            "failed": sum(chunk['count'] for chunk in chunks if not chunk['success']),
+            "chunks": chunks
+        }
+    
+    def _upload_chunk(self, chunk, index, first):
+        """Upload one chunk as a single N-Triples document"""
+        report = {"chunk": index, "first": first, "count": len(chunk)}
+        try:
+            payload = ntriples(model_instance.assign_id() for model_instance in chunk)
+        except Exception as e:
+            report.update(success=False, error=f"Error serializing chunk: {e}")
+            return report
+        started = time.perf_counter()
+        try:
+            self.backend.upload(payload, content_type='application/n-triples')
+            observe_query('upload', 'bulk_create', payload[:1000], started)
+            report['success'] = True
+            self.id_index.add_models(chunk)
+        except Exception as e:
+            observe_query('upload', 'bulk_create', payload[:1000], started, error=True)
+            report.update(success=False, error=str(e))
+        finally:
+            self.cache.invalidate({type(model_instance).__name__ for model_instance in chunk} | detect_classes(payload, known_classes()))
+        return report
+    
     # READ
     def get_by_uri(self, uri):
         """Get entity by URI"""
-        query = f"""
-        PREFIX eco: <{NAMESPACE}>
-        
-        SELECT ?p ?o
-        WHERE {{
-            <{uri}> ?p ?o .
-        }}
+        return self.execute_prepared(GET_BY_URI, {'uri': uri})
+    
+    def uri_for_id(self, class_name, entity_id, verify=True):
+        """URI of the `class_name` entity with this numeric id, None if there is none"""
+        try:
+            return self.id_index.uri(class_name, entity_id, verify=verify)
+        except Exception as e:
+            logger.exception("id lookup %s/%s failed", class_name, entity_id)
+            return {"error": str(e)}
+    
+    def id_for_uri(self, uri):
+        """Numeric eco:id of the entity at `uri`, None if it has none"""
+        try:
+            return self.id_index.id_of(uri)
+        except Exception as e:
+            logger.exception("id lookup of %s failed", uri)
+            return {"error": str(e)}
+    
+    def get_by_id(self, class_name, entity_id):
         """
-        return self.execute_query(query)
+        (uri, ?p ?o rows) of the `class_name` entity with this numeric id,
+        (None, []) when there is none, or {"error": ...}
+        """
+        id_predicate = f"{NAMESPACE}id"
+        for _ in range(2):
+            uri = self.uri_for_id(class_name, entity_id, verify=False)
+            if uri is None:
+                return None, []
+            if isinstance(uri, dict):
+                return uri
+            results = self.get_by_uri(uri)
+            if isinstance(results, dict):
+                return results
+            if any(row['p']['value'] == id_predicate and row['o']['value'] == str(entity_id) for row in results):
+                return uri, results
+            # Deleted or renumbered by another process since it was indexed:
+            # look the id up in the store again
+            self.id_index.discard(uri)
+        return None, []
     
-    def get_all(self, class_name):
-        """Get all entities of a class"""
+    def get_all(self, class_name, projected=False, limit=None, cursor=None):
+        """Get all entities of a class.
+        By default returns one ?s ?p ?o row per triple; with projected=True
+        returns one row per entity with a column per model property.
+        With a limit, only the `limit` entities after `cursor` are returned
+        (see Mangage.pagination.next_cursor)."""
+        if projected:
+            return self.execute_query(projected_select(class_name, limit=limit, cursor=cursor),
+                                      label=f"get_all:{class_name}")
+        if limit is not None:
+            subjects = keyset_subquery('s', f"?s a <{NAMESPACE}{class_name}> .", limit, cursor)
+            return self.execute_query(f"""
+            SELECT ?s ?p ?o
+            WHERE {{
+                {subjects}
+                ?s ?p ?o .
+            }}
+            ORDER BY STR(?s)
+            """, label=f"get_all:{class_name}")
         try:
-            print(f"Getting all entities of type: {class_name}")  # Debug log
             query = f"""
             PREFIX eco: <{NAMESPACE}>
             PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
@@ -102,42 +483,41 @@ class SPARQLManager:
                 ?s ?p ?o .
             }}
             """
-            print(f"Executing SPARQL query:\n{query}")  # Debug log
-            
-            results = self.execute_query(query)
-            print(f"SPARQL query results: {results}")  # Debug log
+            results = self.execute_query(query, label=f"get_all:{class_name}")
             
             if not results:
-                print("No results returned from SPARQL query")  # Debug log
+                logger.debug("get_all %s: no results", class_name)
                 return []
                 
             if isinstance(results, dict) and 'error' in results:
-                print(f"Error in SPARQL query: {results['error']}")  # Debug log
+                logger.error("get_all %s failed: %s", class_name, results['error'])
                 return results
                 
+            logger.debug("get_all %s: %d rows", class_name, len(results))
             return results
             
         except Exception as e:
             error_msg = f"Error in get_all: {str(e)}"
-            print(error_msg, exc_info=True)  # Debug log
+            logger.exception(error_msg)
             return {'error': error_msg}
     
-    def search(self, class_name=None, filters=None):
-        """Search entities with filters"""
-        where_clause = ""
+    def search(self, class_name=None, filters=None, projected=False):
+        """Search entities with filters (projected=True: one row per entity)"""
+        try:
+            filter_clause = ""
+            for key, value in (filters or {}).items():
+                filter_clause += f'?s {iri(NAMESPACE + str(key))} {_filter_term(value)} .\n'
+            if projected and class_name:
+                return self.execute_query(projected_select(class_name, filter_clause), label=f"search:{class_name}")
+            class_term = iri(NAMESPACE + class_name) if class_name else None
+        except ValueError as e:
+            return {"error": str(e)}
         
-        if class_name:
-            where_clause += f"?s a <{NAMESPACE}{class_name}> .\n"
+        if class_term:
+            where_clause = f"?s a {class_term} .\n"
         else:
-            where_clause += "?s a ?type .\n"
-        
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, str):
-                    where_clause += f'?s <{NAMESPACE}{key}> "{value}" .\n'
-                else:
-                    where_clause += f'?s <{NAMESPACE}{key}> {value} .\n'
-        
+            where_clause = "?s a ?type .\n"
+        where_clause += filter_clause
         where_clause += "?s ?p ?o ."
         
         query = f"""
@@ -166,58 +546,107 @@ class SPARQLManager:
             <{uri}> <{property_uri}> {old_value} .
         }}
         """
+        self.user_index.discard(uri)
         return self.execute_update(query)
     
-    def update_property(self, uri, property_name, new_value, is_string=True):
-        """Update property with automatic formatting - handles both update and insert"""
-        # Format value based on type
+    @staticmethod
+    def format_value(new_value, is_string=True):
+        """Format a Python value as a SPARQL literal"""
         if new_value is None:
-            value_str = '""^^xsd:string'
+            return '""^^xsd:string'
         elif is_string:
-            # Escape special characters
-            escaped_value = str(new_value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-            value_str = f'"{escaped_value}"^^xsd:string'
+            return f'"{escape(new_value)}"^^xsd:string'
         elif isinstance(new_value, float):
-            value_str = f'"{new_value}"^^xsd:float'
+            return f'"{new_value}"^^xsd:float'
         elif isinstance(new_value, int):
-            value_str = f'"{new_value}"^^xsd:integer'
+            return f'"{new_value}"^^xsd:integer'
         else:
-            value_str = f'"{new_value}"'
+            return f'"{new_value}"'
+    
+    def update_property(self, uri, property_name, new_value, is_string=True):
+        """Update property with automatic formatting - handles both update and insert"""
+        return self.update_properties(uri, {property_name: new_value}, is_string=is_string)
+    
+    def update_properties(self, uri, values, is_string=None):
+        """
+        Replace several properties of an entity in one atomic update request.
+        `values` maps property names to new values. With is_string=None each
+        value is formatted as a string only if it is a str.
+        """
+        if not values:
+            return {"success": True}
         
-        # First, try to delete existing value (if any), then insert new value
+        deletes = []
+        inserts = []
+        for property_name, new_value in values.items():
+            as_string = isinstance(new_value, str) if is_string is None else is_string
+            deletes.append(f"DELETE WHERE {{ <{uri}> <{NAMESPACE}{property_name}> ?old . }}")
+            inserts.append(f"<{uri}> <{NAMESPACE}{property_name}> {self.format_value(new_value, as_string)} .")
+        
+        # Delete existing values (if any), then insert the new ones
+        separator = " ;\n        "
+        newline = "\n            "
         query = f"""
         PREFIX eco: <{NAMESPACE}>
         PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
         
-        DELETE {{
-            <{uri}> <{NAMESPACE}{property_name}> ?old .
-        }}
-        WHERE {{
-            OPTIONAL {{ <{uri}> <{NAMESPACE}{property_name}> ?old . }}
-        }} ;
+        {separator.join(deletes)} ;
         
         INSERT DATA {{
-            <{uri}> <{NAMESPACE}{property_name}> {value_str} .
+            {newline.join(inserts)}
         }}
         """
-        return self.execute_update(query)
+        if 'id' in values:
+            self.id_index.discard(uri)
+        self.user_index.discard(uri)
+        return self.execute_update(query, invalidate=self._classes_for(uri))
     
     # DELETE
-    def delete(self, uri):
-        """Delete an entity and all its properties"""
-        # First, check if the entity exists
-        existing_entity = self.get_by_uri(uri)
-        if not existing_entity:
+    def delete(self, uri, incoming=True, owned=None):
+        """
+        Delete an entity in one update request: its owned children (objects of
+        the model's `owns` predicates), the references pointing to it when
+        `incoming` is True, and its own triples.
+        An entity without triples is reported as not found (checked first,
+        since not every backend reports what an update removed). When the
+        backend does report it (rdflib), the result holds 'removed_triples'.
+        """
+        found = self.execute_prepared(ENTITY_EXISTS, {'uri': uri}, use_cache=False)
+        if isinstance(found, dict):
+            return found
+        if not found:
             return {"success": False, "error": "Entity not found"}
-
+        if owned is None:
+            owned = owned_predicates(class_from_uri(uri))
+        
+        operations = []
+        # Owned children go first, while the link to them still exists
+        for predicate in owned:
+            operations.append(f"""DELETE {{ ?child ?p ?o . }}
+        WHERE {{ <{uri}> <{NAMESPACE}{predicate}> ?child . ?child ?p ?o . }}""")
+        if incoming:
+            operations.append(f"DELETE WHERE {{ ?s ?p <{uri}> . }}")
+        operations.append(f"DELETE WHERE {{ <{uri}> ?p ?o . }}")
+        
+        separator = " ;\n        "
         query = f"""
         PREFIX eco: <{NAMESPACE}>
         
-        DELETE WHERE {{
-            <{uri}> ?p ?o .
-        }}
+        {separator.join(operations)}
         """
-        return self.execute_update(query)
+        # Referencing entities may belong to any class, so a cascade clears the whole cache
+        result = self.execute_update(query, invalidate=set() if incoming or owned else self._classes_for(uri),
+                                     delta=True)
+        if not result.get('success'):
+            return result
+        self.id_index.discard(uri)
+        self.user_index.discard(uri)
+        if 'triple_delta' in result:
+            removed = -result.pop('triple_delta')
+            if removed == 0:
+                return {"success": False, "error": "Entity not found", "removed_triples": 0}
+            result['removed_triples'] = removed
+        return result
     
     def delete_property(self, uri, property_name):
         """Delete a specific property"""
@@ -228,39 +657,17 @@ class SPARQLManager:
             <{uri}> <{NAMESPACE}{property_name}> ?o .
         }}
         """
-        return self.execute_update(query)
+        self.user_index.discard(uri)
+        return self.execute_update(query, invalidate=self._classes_for(uri))
     
     # ADVANCED SEARCH
     def search_by_name(self, name):
         """Search entities by name"""
-        query = f"""
-        PREFIX eco-tourism: <{NAMESPACE}>
-        
-        SELECT ?s ?type ?p ?o
-        WHERE {{
-            ?s <{NAMESPACE}nom> ?nom .
-            ?s a ?type .
-            ?s ?p ?o .
-            FILTER(CONTAINS(LCASE(?nom), LCASE("{name}")))
-        }}
-        """
-        return self.execute_query(query)
+        return self.execute_prepared(SEARCH_BY_NAME, {'name': name})
     
     def get_touristes_by_destination(self, destination_uri):
         """Get tourists in a destination"""
-        query = f"""
-        PREFIX eco-tourism: <{NAMESPACE}>
-        
-        SELECT ?touriste ?nom ?age
-        WHERE {{
-            ?touriste a <{NAMESPACE}Touriste> .
-            ?touriste <{NAMESPACE}nom> ?nom .
-            OPTIONAL {{ ?touriste <{NAMESPACE}age> ?age . }}
-            ?touriste <{NAMESPACE}sejourneDans> ?hebergement .
-            ?hebergement <{NAMESPACE}situeDans> <{destination_uri}> .
-        }}
-        """
-        return self.execute_query(query)
+        return self.execute_prepared(TOURISTES_BY_DESTINATION, {'destination': destination_uri})
     
     def get_eco_hebergements(self):
         """Get eco-friendly accommodations"""
@@ -279,19 +686,7 @@ class SPARQLManager:
     
     def get_activities_by_difficulty(self, difficulty):
         """Get activities by difficulty level"""
-        query = f"""
-        PREFIX eco-tourism: <{NAMESPACE}>
-        
-        SELECT ?activite ?nom ?duree ?prix
-        WHERE {{
-            ?activite a <{NAMESPACE}Activite> .
-            ?activite <{NAMESPACE}nom> ?nom .
-            ?activite <{NAMESPACE}difficulte> "{difficulty}"^^xsd:string .
-            OPTIONAL {{ ?activite <{NAMESPACE}dureeHeures> ?duree . }}
-            OPTIONAL {{ ?activite <{NAMESPACE}prix> ?prix . }}
-        }}
-        """
-        return self.execute_query(query)
+        return self.execute_prepared(ACTIVITIES_BY_DIFFICULTY, {'difficulty': difficulty})
     
     def get_bio_products(self):
         """Get organic products"""
@@ -325,32 +720,8 @@ class SPARQLManager:
     
     def get_certified_entities(self, certification_uri):
         """Get entities with specific certification"""
-        query = f"""
-        PREFIX eco-tourism: <{NAMESPACE}>
-        
-        SELECT ?entity ?type ?nom
-        WHERE {{
-            ?entity <{NAMESPACE}aCertification> <{certification_uri}> .
-            ?entity a ?type .
-            OPTIONAL {{ ?entity <{NAMESPACE}nom> ?nom . }}
-        }}
-        """
-        return self.execute_query(query)
+        return self.execute_prepared(CERTIFIED_ENTITIES, {'certification': certification_uri})
     
     def get_events_by_date_range(self, start_date, end_date):
         """Get events in date range"""
-        query = f"""
-        PREFIX eco-tourism: <{NAMESPACE}>
-        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-        
-        SELECT ?event ?nom ?date ?prix
-        WHERE {{
-            ?event a <{NAMESPACE}Evenement> .
-            ?event <{NAMESPACE}nom> ?nom .
-            ?event <{NAMESPACE}eventDate> ?date .
-            OPTIONAL {{ ?event <{NAMESPACE}eventPrix> ?prix . }}
-            FILTER(?date >= "{start_date}"^^xsd:date && ?date <= "{end_date}"^^xsd:date)
-        }}
-        """
-        return self.execute_query(query)
-
+        return self.execute_prepared(EVENTS_BY_DATE_RANGE, {'start': start_date, 'end': end_date})
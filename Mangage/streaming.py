@@ -0,0 +1,99 @@
+import codecs
+import json
+
+# Consumed text kept in the buffer before it is dropped
+_COMPACT_AT = 64 * 1024
+
+
+class BindingsDecoder:
+    """
+    Incremental decoder for application/sparql-results+json.
+    Reads the head variables, then decodes one binding object at a time
+    from a stream of byte chunks, so the full result is never held in memory.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self.vars = self._read_value_after('"vars"')
+        self._seek('"bindings"')
+        self._seek('[')
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _seek(self, token):
+        """Move past the next occurrence of `token`"""
+        while True:
+            index = self._buf.find(token, self._pos)
+            if index >= 0:
+                self._pos = index + len(token)
+                return
+            # Keep a tail in case the token straddles two chunks
+            self._pos = max(self._pos, len(self._buf) - len(token))
+            if not self._fill():
+                raise ValueError(f"Malformed SPARQL JSON results: {token} not found")
+
+    def _skip(self, chars):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in chars:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def _decode(self):
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                self._pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def _read_value_after(self, key):
+        self._seek(key)
+        self._skip(' \t\r\n:')
+        return self._decode()
+
+    def __iter__(self):
+        while True:
+            self._skip(' \t\r\n,')
+            if self._pos >= len(self._buf):
+                raise ValueError("Malformed SPARQL JSON results: unterminated bindings")
+            if self._buf[self._pos] == ']':
+                return
+            yield self._decode()
+            if self._pos > _COMPACT_AT:
+                self._buf = self._buf[self._pos:]
+                self._pos = 0
+
+
+class QueryRows:
+    """Rows of a streamed SELECT: `vars` lists the columns, iterating yields one tuple per row"""
+
+    def __init__(self, vars, rows):
+        self.vars = list(vars)
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def close(self):
+        close = getattr(self._rows, 'close', None)
+        if close is not None:
+            close()
+
+
+def compact_rows(vars, bindings):
+    """Binding dicts as tuples of values in `vars` order (None for unbound variables)"""
+    for binding in bindings:
+        yield tuple(binding[var]['value'] if var in binding else None for var in vars)
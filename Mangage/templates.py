@@ -0,0 +1,142 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from config import NAMESPACE
+from Mangage.query_cache import normalize_query
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# Declared on every template, so template text can use eco:, xsd: and rdf: names
+PREFIXES = (
+    f"PREFIX eco: <{NAMESPACE}> "
+    f"PREFIX xsd: <{XSD}> "
+    "PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> "
+)
+
+# ${name} or ${name:type}; the default type is string
+_PLACEHOLDER_RE = re.compile(r'\$\{(\w+)(?::(\w+))?\}')
+_FORM_RE = re.compile(r'\b(SELECT|ASK|CONSTRUCT|DESCRIBE|INSERT|DELETE)\b', re.IGNORECASE)
+# Characters RDF forbids in IRIs (plus whitespace)
+_BAD_IRI_RE = re.compile(r'[\s<>"{}|^`\\]')
+
+
+def iri(value):
+    value = str(value)
+    if not value or _BAD_IRI_RE.search(value):
+        raise ValueError(f"Invalid IRI: {value!r}")
+    return f"<{value}>"
+
+
+def escape(value):
+    """Escape a string for use inside a quoted SPARQL / N-Triples literal"""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t'))
+
+
+def string(value):
+    return f'"{escape(value)}"^^<{XSD}string>'
+
+
+def integer(value):
+    """Integer literal; integral decimals such as 3.0 or '3.0' are accepted, 2.5 is not"""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid integer: {value!r}")
+    try:
+        number = Decimal(str(value).strip())
+        if not number.is_finite() or number != number.to_integral_value():
+            raise InvalidOperation
+        return str(int(number))
+    except InvalidOperation:
+        raise ValueError(f"Invalid integer: {value!r}") from None
+
+
+def decimal(value):
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid decimal: {value!r}")
+    try:
+        number = Decimal(str(value).strip())
+        if not number.is_finite():
+            raise InvalidOperation
+        return f'"{number:f}"^^<{XSD}decimal>'
+    except InvalidOperation:
+        raise ValueError(f"Invalid decimal: {value!r}") from None
+
+
+def boolean(value):
+    if isinstance(value, str):
+        value = value.strip().lower() in ('true', '1', 'yes')
+    return 'true' if value else 'false'
+
+
+def date_(value):
+    try:
+        value = value if isinstance(value, date) else date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid date (expected YYYY-MM-DD): {value!r}") from None
+    return f'"{value.isoformat()}"^^<{XSD}date>'
+
+
+def datetime_(value):
+    try:
+        value = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Invalid dateTime: {value!r}") from None
+    return f'"{value.isoformat()}"^^<{XSD}dateTime>'
+
+
+FORMATTERS = {
+    'iri': iri,
+    'string': string,
+    'integer': integer,
+    'decimal': decimal,
+    'boolean': boolean,
+    'date': date_,
+    'datetime': datetime_,
+}
+
+
+class SPARQLTemplate:
+    """
+    SPARQL query parsed and normalized once, then bound many times.
+    Placeholders are written ${name:type} where type is one of FORMATTERS
+    (default string); every bound value is validated and escaped, so the
+    same template always yields the same text for the same values.
+    """
+
+    def __init__(self, text, name=None):
+        self.name = name
+        form = _FORM_RE.search(_PLACEHOLDER_RE.sub('', text))
+        if form is None:
+            raise ValueError("Template is not a SPARQL query or update")
+        self.form = form.group(1).upper()
+        text = normalize_query(PREFIXES + text)
+        self._segments = []
+        self._params = []
+        position = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            kind = match.group(2) or 'string'
+            if kind not in FORMATTERS:
+                raise ValueError(f"Unknown placeholder type {kind!r} in ${{{match.group(1)}}}")
+            self._segments.append(text[position:match.start()])
+            self._params.append((match.group(1), FORMATTERS[kind]))
+            position = match.end()
+        self._segments.append(text[position:])
+        self.params = tuple(dict.fromkeys(name for name, _ in self._params))
+
+    @property
+    def is_update(self):
+        return self.form in ('INSERT', 'DELETE')
+
+    def bind(self, **values):
+        """Query text with every placeholder replaced; raises ValueError on missing or invalid values"""
+        parts = [self._segments[0]]
+        for (name, formatter), segment in zip(self._params, self._segments[1:]):
+            if name not in values or values[name] is None:
+                raise ValueError(f"Missing value for ${{{name}}}")
+            parts.append(formatter(values[name]))
+            parts.append(segment)
+        return ''.join(parts)
+
+    def __repr__(self):
+        return f"SPARQLTemplate({self.name or self.form}, params={self.params})"
@@ -0,0 +1,203 @@
+import bisect
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+
+from config import NAMESPACE, RESERVATION_MEAL_DURATION, RESERVATION_LEDGER_TTL, RESERVATION_TIMELINE_MAX_TOURISTS
+from Mangage.binder import RDF_TYPE
+from Mangage.templates import SPARQLTemplate, iri
+
+TOURISTE_RESERVATIONS = SPARQLTemplate("""
+    SELECT ?s ?p ?o WHERE {
+        ?s a eco:ReservationRestaurant .
+        ?s eco:reservePar ${touriste:iri} .
+        ?s ?p ?o .
+    }
+""", name='touriste_reservations')
+
+_TIME_RE = re.compile(r'^\s*(\d{1,2})(?:\s*[:hH]\s*(\d{2})?)?(?::\d{2})?\s*$')
+
+
+def minutes_of(heure):
+    """Minutes after midnight of a time ("19:00", "19h30", "7"); raises ValueError"""
+    match = _TIME_RE.match(str(heure))
+    if match:
+        hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+        if hours < 24 and minutes < 60:
+            return hours * 60 + minutes
+    raise ValueError(f"Invalid time (expected HH:MM): {heure!r}")
+
+
+def normalize_time(heure):
+    """Canonical "HH:MM" form of a time; raises ValueError"""
+    return "%02d:%02d" % divmod(minutes_of(heure), 60)
+
+
+def start_of(day, heure):
+    """datetime at which a reservation starts; raises ValueError"""
+    if not isinstance(day, date):
+        day = date.fromisoformat(str(day).strip())
+    return datetime(day.year, day.month, day.day) + timedelta(minutes=minutes_of(heure))
+
+
+# One active reservation of a tourist: [start, end) and its URI
+Booking = namedtuple('Booking', ['start', 'end', 'uri'])
+
+
+class TouristTimeline:
+    """
+    Reservations of one tourist. Documents are kept as bound by the endpoint
+    binder; active ones with a valid date and time are also kept as bookings
+    sorted by start, so an overlap check is a binary search.
+    """
+
+    __slots__ = ('documents', 'bookings', 'starts', 'loaded_at')
+
+    def __init__(self):
+        self.documents = {}
+        self.bookings = []
+        self.starts = []
+        self.loaded_at = time.monotonic()
+
+    def add(self, document, duration):
+        self.documents[document['uri']] = document
+        if document.get('statut') == 'annulee':
+            return
+        try:
+            start = start_of(document['dateReservation'], document['heureReservation'])
+        except (KeyError, ValueError):
+            return
+        booking = Booking(start, start + duration, document['uri'])
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.bookings.insert(i, booking)
+
+    def overlapping(self, start, end, duration):
+        """Bookings intersecting [start, end): every booking lasts `duration`,
+        so only those starting in (start - duration, end) can overlap"""
+        i = bisect.bisect_right(self.starts, start - duration)
+        found = []
+        while i < len(self.bookings) and self.starts[i] < end:
+            if self.bookings[i].end > start:
+                found.append(self.bookings[i])
+            i += 1
+        return found
+
+    def upcoming(self, now, duration):
+        """Documents of active reservations not finished at `now`, by start time"""
+        i = bisect.bisect_right(self.starts, now - duration)
+        return [self.documents[booking.uri] for booking in self.bookings[i:]]
+
+
+class TimelineIndex:
+    """
+    Per-tourist reservation timelines, each loaded with one query and kept
+    current by the reservation write paths (add after an admission,
+    invalidate after a status change or a delete). A meal lasts
+    RESERVATION_MEAL_DURATION minutes: two reservations of a tourist conflict
+    when their meals overlap, not only when their times are equal.
+    Timelines older than `ttl` are reloaded, to pick up other processes'
+    writes; at most `max_tourists` are kept (least recently used dropped).
+    """
+
+    def __init__(self, manager, binder, duration=RESERVATION_MEAL_DURATION, ttl=RESERVATION_LEDGER_TTL,
+                 max_tourists=RESERVATION_TIMELINE_MAX_TOURISTS):
+        self.manager = manager
+        self.binder = binder
+        self.duration = timedelta(minutes=duration)
+        self.ttl = ttl
+        self.max_tourists = max_tourists
+        self._timelines = OrderedDict()
+        self._tourist_of = {}
+        self._lock = threading.Lock()
+
+    def _load(self, tourist):
+        rows = self.manager.execute_prepared(TOURISTE_RESERVATIONS, {'touriste': tourist}, use_cache=False)
+        if isinstance(rows, dict):
+            raise RuntimeError(rows['error'])
+        timeline = TouristTimeline()
+        for document in self.binder.bind_triples(rows):
+            timeline.add(document, self.duration)
+        with self._lock:
+            self._forget(tourist)
+            self._timelines[tourist] = timeline
+            for uri in timeline.documents:
+                self._tourist_of[uri] = tourist
+            while len(self._timelines) > self.max_tourists:
+                self._forget(next(iter(self._timelines)))
+        return timeline
+
+    def _forget(self, tourist):
+        timeline = self._timelines.pop(tourist, None)
+        if timeline is not None:
+            for uri in timeline.documents:
+                if self._tourist_of.get(uri) == tourist:
+                    del self._tourist_of[uri]
+
+    def timeline(self, tourist, refresh=False):
+        """
+        Timeline of a tourist, loaded (one query) when missing, expired or
+        `refresh`; raises ValueError on an invalid URI
+        """
+        iri(tourist)
+        with self._lock:
+            timeline = self._timelines.get(tourist)
+            if timeline is not None:
+                self._timelines.move_to_end(tourist)
+        if refresh or timeline is None or time.monotonic() - timeline.loaded_at > self.ttl:
+            timeline = self._load(tourist)
+        return timeline
+
+    def conflicts(self, tourist, day, heure, exclude=None, since=None):
+        """
+        URIs of the tourist's active reservations overlapping a meal at `day` `heure`.
+        With `since` (a time.monotonic() value), a conflict found in a timeline
+        loaded before it is confirmed on a reloaded timeline.
+        """
+        start = start_of(day, heure)
+        timeline = self.timeline(tourist)
+        bookings = timeline.overlapping(start, start + self.duration, self.duration)
+        if bookings and since is not None and timeline.loaded_at < since:
+            bookings = self.timeline(tourist, refresh=True).overlapping(start, start + self.duration, self.duration)
+        return [booking.uri for booking in bookings if booking.uri != exclude]
+
+    def reservations(self, tourist, upcoming=False):
+        """Documents of a tourist's reservations; `upcoming`: active and not finished, by time"""
+        timeline = self.timeline(tourist)
+        if upcoming:
+            return timeline.upcoming(datetime.now(), self.duration)
+        return list(timeline.documents.values())
+
+    def add(self, reservation):
+        """Record a ReservationRestaurant just written, if its tourist's timeline is loaded"""
+        with self._lock:
+            timeline = self._timelines.get(reservation.touriste)
+            if timeline is None:
+                return
+            rows = [{'p': RDF_TYPE, 'o': f"{NAMESPACE}{type(reservation).__name__}"}]
+            for prop in type(reservation).properties:
+                value = getattr(reservation, prop.attr)
+                if value is not None and value != '':
+                    rows.append({'p': NAMESPACE + prop.predicate, 'o': value})
+            document = self.binder.bind_entity(rows, reservation.uri)
+            timeline.add(document, self.duration)
+            self._tourist_of[reservation.uri] = reservation.touriste
+
+    def invalidate(self, *uris):
+        """Drop the timelines holding these reservations; they are reloaded on next use"""
+        with self._lock:
+            for uri in uris:
+                tourist = self._tourist_of.get(uri)
+                if tourist is not None:
+                    self._forget(tourist)
+
+    def forget(self, tourist):
+        with self._lock:
+            self._forget(tourist)
+
+    def clear(self):
+        with self._lock:
+            self._timelines.clear()
+            self._tourist_of.clear()
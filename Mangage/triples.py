@@ -0,0 +1,108 @@
+from Mangage.templates import XSD, iri, string, integer, decimal, boolean, date_, datetime_
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+def _double(datatype):
+    def term(value):
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid {datatype}: {value!r}")
+        try:
+            number = float(str(value).strip())
+        except ValueError:
+            raise ValueError(f"Invalid {datatype}: {value!r}") from None
+        return f'"{number!r}"^^<{XSD}{datatype}>'
+    return term
+
+
+# Property datatype -> N-Triples term of a Python value (validated, escaped once)
+TERMS = {
+    'uri': iri,
+    'string': string,
+    'integer': lambda value: f'"{integer(value)}"^^<{XSD}integer>',
+    'decimal': decimal,
+    'float': _double('float'),
+    'double': _double('double'),
+    'boolean': lambda value: f'"{boolean(value)}"^^<{XSD}boolean>',
+    'date': date_,
+    'dateTime': datetime_,
+}
+
+
+def term(value, datatype='string'):
+    """N-Triples term of `value` for a Property datatype"""
+    return TERMS[datatype](value)
+
+
+def terms(value, datatype='string'):
+    """N-Triples terms of a property value: none for None, '' and empty lists, one per item of a list"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [obj for item in value for obj in terms(item, datatype)]
+    return [term(value, datatype)]
+
+
+class TripleWriter:
+    """
+    Collects the triples of one or many entities as N-Triples lines, joined
+    once at the end, so serialization stays linear in the number of triples.
+    Full IRIs and typed literals only: the output is valid N-Triples, Turtle,
+    and INSERT DATA content, without prefixes.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def add(self, subject, predicate, obj):
+        """Add one triple; `obj` is an already formatted term"""
+        self.lines.append(f"<{subject}> <{predicate}> {obj} .")
+
+    def type(self, subject, class_uri):
+        self.add(subject, RDF_TYPE, f"<{class_uri}>")
+
+    def value(self, subject, predicate, value, datatype='string'):
+        """Add a property value; None, '' and empty lists add nothing"""
+        for obj in terms(value, datatype):
+            self.add(subject, predicate, obj)
+
+    def model(self, model_instance):
+        """Add the triples of a model (see BaseModel.write_triples)"""
+        model_instance.write_triples(self)
+        return self
+
+    def models(self, model_instances):
+        for model_instance in model_instances:
+            model_instance.write_triples(self)
+        return self
+
+    def __len__(self):
+        return len(self.lines)
+
+    def text(self):
+        return "\n".join(self.lines) + "\n" if self.lines else ""
+
+
+def ntriples(model_instances):
+    """N-Triples document of many models"""
+    return TripleWriter().models(model_instances).text()
+
+
+def insert_data(model_instances):
+    """A single INSERT DATA update adding many models"""
+    return f"INSERT DATA {{\n{ntriples(model_instances)}}}"
+
+
+def iter_ntriples(model_instances, batch_size=1000):
+    """N-Triples of many models as UTF-8 chunks of `batch_size` entities"""
+    writer = TripleWriter()
+    count = 0
+    for model_instance in model_instances:
+        model_instance.write_triples(writer)
+        count += 1
+        if count >= batch_size:
+            yield writer.text().encode('utf-8')
+            writer = TripleWriter()
+            count = 0
+    if writer.lines:
+        yield writer.text().encode('utf-8')
@@ -0,0 +1,98 @@
+import re
+
+from Mangage.templates import XSD, escape
+
+# Python value of a typed literal, by datatype (other datatypes stay strings)
+_INTEGER_TYPES = ('integer', 'int', 'long', 'short', 'byte', 'nonNegativeInteger', 'positiveInteger',
+                  'nonPositiveInteger', 'negativeInteger', 'unsignedInt', 'unsignedLong',
+                  'unsignedShort', 'unsignedByte')
+CONVERTERS = {XSD + name: int for name in _INTEGER_TYPES}
+CONVERTERS.update({XSD + name: float for name in ('decimal', 'float', 'double')})
+CONVERTERS[XSD + 'boolean'] = lambda value: value in ('true', '1')
+
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+_ESCAPE_RE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+
+
+def _unescape_match(match):
+    code = match.group(1) or match.group(2)
+    if code:
+        return chr(int(code, 16))
+    return _ESCAPES.get(match.group(3), match.group(3))
+
+
+def term_value(cell, typed=True):
+    """
+    Python value of one TSV cell (an RDF term in Turtle syntax).
+    IRIs and plain literals become strings, numeric and boolean literals
+    (typed or abbreviated) become int/float/bool, an empty cell is None.
+    With typed=False every literal is returned as its lexical string, as in
+    SPARQL JSON results.
+    """
+    if not cell:
+        return None
+    first = cell[0]
+    if first == '<':
+        return cell[1:-1]
+    if first == '"':
+        end = cell.rfind('"')
+        lexical = cell[1:end]
+        if '\\' in lexical:
+            lexical = _ESCAPE_RE.sub(_unescape_match, lexical)
+        if typed and cell.startswith('^^<', end + 1):
+            converter = CONVERTERS.get(cell[end + 4:-1])
+            if converter is not None:
+                try:
+                    return converter(lexical)
+                except ValueError:
+                    return lexical
+        return lexical
+    if first == '_':
+        return cell[2:]
+    if not typed:
+        return cell
+    # Turtle abbreviations: true/false, 42, 1.5, 1.0e3
+    if cell == 'true':
+        return True
+    if cell == 'false':
+        return False
+    try:
+        return int(cell)
+    except ValueError:
+        try:
+            return float(cell)
+        except ValueError:
+            return cell
+
+
+def parse_tsv(text, typed=True):
+    """Column names and rows (tuples of term_value) of a text/tab-separated-values SPARQL result"""
+    lines = text.split('\n')
+    names = [name.lstrip('?$') for name in lines[0].rstrip('\r').split('\t')] if lines[0] else []
+    # Cells repeat a lot (types, shared objects, small numbers): decode each distinct cell once
+    seen = {}
+    def value(cell):
+        try:
+            return seen[cell]
+        except KeyError:
+            result = seen[cell] = term_value(cell, typed)
+            return result
+    rows = []
+    for line in lines[1:]:
+        if line:
+            rows.append(tuple(map(value, line.rstrip('\r').split('\t'))))
+    return names, rows
+
+
+def format_term(kind, value, datatype=None, language=None):
+    """Turtle syntax of one RDF term, as written in a TSV cell"""
+    if kind == 'uri':
+        return f"<{value}>"
+    if kind == 'bnode':
+        return f"_:{value}"
+    escaped = escape(value)
+    if language:
+        return f'"{escaped}"@{language}'
+    if datatype and datatype != XSD + 'string':
+        return f'"{escaped}"^^<{datatype}>'
+    return f'"{escaped}"'
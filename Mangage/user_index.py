@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from config import AUTH_USER_INDEX_TTL
+from Mangage.backend import get_backend
+from Mangage.binder import local_name
+from Mangage.templates import SPARQLTemplate
+
+logger = logging.getLogger(__name__)
+
+# Accounts are the entities with an email and a password
+_ACCOUNT_FIELDS = """
+        ?user eco:password ?password .
+        OPTIONAL { ?user eco:nom ?nom . }
+        OPTIONAL { ?user eco:age ?age . }
+        OPTIONAL { ?user eco:nationalite ?nationalite . }
+        OPTIONAL { ?user a ?type . FILTER(?type = eco:Touriste || ?type = eco:Guide) }
+        OPTIONAL { ?user eco:emailVerified ?verified . }
+"""
+
+ACCOUNTS = SPARQLTemplate("""
+    SELECT ?user ?email ?password ?nom ?age ?nationalite ?type ?verified
+    WHERE {
+        ?user eco:email ?email .
+""" + _ACCOUNT_FIELDS + """
+    }
+""", name='accounts')
+
+ACCOUNT_BY_EMAIL = SPARQLTemplate("""
+    SELECT ?user ?password ?nom ?age ?nationalite ?type ?verified
+    WHERE {
+        ?user eco:email ${email} .
+""" + _ACCOUNT_FIELDS + """
+    }
+""", name='account_by_email')
+
+# type: 'Touriste', 'Guide' or None; password: SHA-256 hex digest
+UserRecord = namedtuple('UserRecord', ['uri', 'email', 'password', 'type', 'nom', 'age', 'nationalite', 'verified'])
+
+
+def _record(row, email):
+    def value(name):
+        cell = row.get(name)
+        return cell['value'] if cell else None
+    user_type = value('type')
+    return UserRecord(
+        uri=value('user'),
+        email=email,
+        password=value('password'),
+        type=local_name(user_type) if user_type else None,
+        nom=value('nom'),
+        age=value('age'),
+        nationalite=value('nationalite'),
+        verified=value('verified') in ('true', '1'),
+    )
+
+
+def _records(bindings, email=None):
+    """One record per email (the first account found, a Touriste/Guide preferred)"""
+    records = {}
+    for row in bindings:
+        record = _record(row, email if email is not None else row['email']['value'])
+        current = records.get(record.email)
+        if current is None or (current.type is None and record.type is not None):
+            records[record.email] = record
+    return records
+
+
+class UserIndex:
+    """
+    In-memory email -> UserRecord index for the auth routes, loaded with one
+    query (warm) and kept current by them (put/update) and by the
+    SPARQLManager write paths (discard).
+    While the index is fresh (warmed less than AUTH_USER_INDEX_TTL seconds
+    ago) an unknown email is reported absent without a query, so duplicate
+    checks cost no round trip; after that a miss reloads the whole index,
+    which picks up accounts created by other processes. Likewise a record
+    read from the store more than AUTH_USER_INDEX_TTL seconds ago is looked
+    up again before it is returned, to pick up accounts changed or deleted
+    elsewhere. Discarding an account also ends the freshness, since its
+    email may have changed. Password checks do not trust the index: they
+    read the account with refresh().
+    """
+
+    def __init__(self, backend=None, ttl=AUTH_USER_INDEX_TTL):
+        self._backend = backend
+        self.ttl = ttl
+        self._records = {}
+        self._emails = {}
+        # email -> time.monotonic() at which its record was read from the store
+        self._checked_at = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def warm(self):
+        """Load every account (one query); returns False if the store could not be read"""
+        try:
+            result = self.backend.query_json(ACCOUNTS.bind())
+        except Exception as e:
+            logger.warning("Could not warm the user index: %s", e)
+            return False
+        records = _records(result['results']['bindings'])
+        with self._lock:
+            self._records = records
+            self._emails = {record.uri: email for email, record in records.items()}
+            self._loaded_at = time.monotonic()
+            self._checked_at = dict.fromkeys(records, self._loaded_at)
+        logger.info("user index: %d accounts", len(records))
+        return True
+
+    def _fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.ttl
+
+    def find(self, email):
+        """Record of the account with this email, or None"""
+        record = self._records.get(email)
+        if record is not None:
+            if time.monotonic() - self._checked_at.get(email, 0) <= self.ttl:
+                return record
+            return self.refresh(email)
+        if not self._fresh():
+            if not self.warm():
+                return self.refresh(email)
+            return self._records.get(email)
+        return None
+
+    def refresh(self, email):
+        """Look the account up in the store and update the index; returns the record or None"""
+        result = self.backend.query_json(ACCOUNT_BY_EMAIL.bind(email=email))
+        record = _records(result['results']['bindings'], email).get(email)
+        with self._lock:
+            self._remove(email)
+            if record is not None:
+                self._add(record)
+        return record
+
+    def put(self, record):
+        with self._lock:
+            self._remove(record.email)
+            self._add(record)
+
+    def update(self, email, **changes):
+        """Change fields of an indexed account (after an auth write)"""
+        with self._lock:
+            record = self._records.get(email)
+            if record is not None:
+                self._records[email] = record._replace(**changes)
+
+    def discard(self, uri):
+        """Forget the account of an entity that was modified or deleted elsewhere"""
+        with self._lock:
+            email = self._emails.pop(uri, None)
+            if email is not None:
+                self._records.pop(email, None)
+                self._checked_at.pop(email, None)
+                self._loaded_at = None
+
+    def _add(self, record):
+        self._records[record.email] = record
+        self._emails[record.uri] = record.email
+        self._checked_at[record.email] = time.monotonic()
+
+    def _remove(self, email):
+        self._checked_at.pop(email, None)
+        record = self._records.pop(email, None)
+        if record is not None and self._emails.get(record.uri) == email:
+            del self._emails[record.uri]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._emails.clear()
+            self._checked_at.clear()
+            self._loaded_at = None
+
+    def __len__(self):
+        return len(self._records)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_user_index():
+    """Return the process-wide UserIndex shared by every SPARQLManager"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = UserIndex()
+    return _index
@@ -132,7 +132,7 @@ class AISalhi:
 **EVENEMENT CLASSES:**
 20. **Evenement**
     - Properties: nom (string), event_date (date)
-    - event_duree_heures (integer)
+    - event_duree_heures (decimal)
     - event_prix (float)
     - a_lieu_dans (URI to Ville)
 
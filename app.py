@@ -1,8 +1,21 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, Response, stream_with_context
 from flask_cors import CORS
 from Mangage import SPARQLManager
 from models import *
-from config import NAMESPACE
+from config import (
+    NAMESPACE, MAX_PAGE_SIZE, BULK_CHUNK_SIZE, BULK_MAX_CONTENT_LENGTH, BULK_MAX_REJECTED, PRICE_MATRIX_MAX_CELLS
+)
+from Mangage.pagination import keyset_subquery, next_cursor, decode_cursor
+from Mangage.sparql_manager import model_class, build_model
+from Mangage.admission import ReservationAdmission
+from Mangage.timeline import TimelineIndex
+from Mangage.reservation_status import RESERVATION_STATUSES, ReservationExpiry, set_statuses
+from Mangage.templates import SPARQLTemplate
+from Mangage.export import export_dataset, iter_documents
+from Mangage.binder import RowBinder, Field, RDF_TYPE, local_name
+from Mangage.metrics import init_metrics, render_metrics
+from Mangage.log import configure_logging, init_request_logging
+from utils.pricing import PRICING
 from ai import GeminiAgent, AISalhi, AIBSilaAgent
 from ai.group_ai_agent import GroupAIAgent
 from auth_routes import auth_bp, token_required
@@ -10,6 +23,8 @@ from email_service import init_mail
 from routes.energie_renouvelable_routes import energie_bp
 from routes.empreinte_carbone_routes import empreinte_carbone_bp
 from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import get_input_stream
+import json
 import re
 import os
 import sys
@@ -57,8 +72,23 @@ def handle_file_too_large(e):
 
 # Initialize Flask-Mail
 init_mail(app)
+init_metrics(app)
+# Structured logs with a correlation id and one summary line per request
+configure_logging(app=app)
+init_request_logging(app)
 
 manager = SPARQLManager()
+# Classes served by the /<kind>/id/<id> endpoints: one query each loads their (id -> uri) index
+manager.id_index.warm(['CertificationEco', 'Evenement'])
+# Accounts by email for the auth routes: one query loads the index
+manager.user_index.warm()
+# Reservations keyed by predicate name, as stored ('reservePar', 'dateReservation', ...)
+RESERVATION_TRIPLES = RowBinder(ReservationRestaurant, key='predicate', extra=(Field('type', None, RDF_TYPE),))
+# Per-tourist reservation timelines (meal overlaps) and per-slot ledgers (capacity)
+timelines = TimelineIndex(manager, RESERVATION_TRIPLES)
+admission = ReservationAdmission(manager, timelines)
+# Cancels stale pending reservations in the background (started by the entrypoint below)
+reservation_expiry = ReservationExpiry(manager, admission)
 # Initialize AI Agents
 ai_agent = GeminiAgent(manager)  # Original AI agent
 aisalhi_agent = AISalhi(manager)  # Advanced AISalhi agent
@@ -138,75 +168,88 @@ def home():
         "documentation": "https://github.com/your-repo/docs"
     })
 
-# Helper function to parse SPARQL SELECT results into user objects
-def parse_users_from_query_results(results):
-    """Parse SPARQL SELECT query results into structured user objects (OPTIMIZED)"""
-    users_dict = {}
-    
-    for result in results:
-        user_uri = result.get('user', {}).get('value', '')
-        
-        if user_uri not in users_dict:
-            users_dict[user_uri] = {
-                'uri': user_uri,
-                'nom': None,
-                'email': None,
-                'age': None,
-                'nationalite': None,
-                'type': None
-            }
-        
-        # Get user properties from SELECT columns
-        if result.get('nom'):
-            users_dict[user_uri]['nom'] = result['nom'].get('value')
-        
-        if result.get('email'):
-            users_dict[user_uri]['email'] = result['email'].get('value')
-        
-        if result.get('age'):
-            age_value = result['age'].get('value')
-            users_dict[user_uri]['age'] = age_value
-        
-        if result.get('nationalite'):
-            users_dict[user_uri]['nationalite'] = result['nationalite'].get('value')
-        
-        if result.get('type'):
-            type_uri = result['type'].get('value')
-            # Extract type name from URI (e.g., "http://example.org/eco-tourism#Touriste" -> "Touriste")
-            if '#' in type_uri:
-                users_dict[user_uri]['type'] = type_uri.split('#')[1]
-    
-    return list(users_dict.values())
+# Row binders of the tabular list queries (see Mangage.binder)
+# /users and /hebergements return literals as strings (e.g. "age": "30"), as they always have
+USER_ROWS = RowBinder(
+    User, only=('nom', 'email', 'age', 'nationalite'), subject='user', default=None, typed=False,
+    extra=(Field('type', 'type', RDF_TYPE, local_name),)
+)
+
+TRANSPORT_ROWS = RowBinder(
+    Transport, only=('nom', 'type', 'emission_co2_per_km'), subject='transport', default=None,
+    columns={'emission_co2_per_km': 'emission'},
+    nested={'empreinte': RowBinder(EmpreinteCarbone, only=('valeur_co2_kg',), subject='empreinteURI',
+                                   columns={'valeur_co2_kg': 'valeurCO2kg'})}
+)
+
+HEBERGEMENT_ROWS = RowBinder(
+    Hebergement, key='predicate', only=('nom', 'type', 'prix', 'nbChambres', 'niveauEco'),
+    subject='hebUri', default='', typed=False,
+    columns={'nom': 'hebNom', 'type': 'hebType', 'prix': 'hebPrix', 'nbChambres': 'hebChambres', 'niveauEco': 'hebEco'},
+    nested={'destination': RowBinder(Destination, key='predicate', only=('nom', 'pays', 'climat'),
+                                     subject='destUri', default='', typed=False,
+                                     columns={'nom': 'destNom', 'pays': 'destPays', 'climat': 'destClimat'})}
+)
+
+def is_projected_request():
+    """True when the client asked for one row per entity (?projected=true)"""
+    return request.args.get('projected', '').lower() in ('1', 'true', 'yes')
+
+def get_page_params():
+    """
+    Read ?limit= and ?cursor= from the request. Returns (None, None) when the
+    client did not ask for a page, so endpoints keep their unpaged behaviour.
+    Raises ValueError on invalid values.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor') or None
+    if limit is None:
+        if cursor:
+            raise ValueError("cursor requires limit")
+        return None, None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    if cursor:
+        decode_cursor(cursor)
+    return limit, cursor
+
+def get_all_response(class_name, projected=False):
+    """get_all(class_name) as a response, paged as {results, next_cursor} when ?limit= is given.
+    With ?stream=true, the entities are streamed as a JSON array of typed documents."""
+    try:
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        if limit:
+            return jsonify({"error": "stream cannot be combined with limit"}), 400
+        return stream_documents_response(class_name)
+    result = manager.get_all(class_name, projected=projected, limit=limit, cursor=cursor)
+    if limit and isinstance(result, list):
+        return jsonify({"results": result, "next_cursor": next_cursor(result, limit)})
+    return jsonify(result)
 
-# Legacy helper function (kept for backward compatibility if needed)
-def parse_users_from_sparql(results):
-    """Parse SPARQL triple results into structured user objects (LEGACY)"""
-    users_dict = {}
-    
-    for result in results:
-        uri = result.get('s', {}).get('value', '')
-        predicate = result.get('p', {}).get('value', '')
-        obj = result.get('o', {}).get('value', '')
-        
-        if uri not in users_dict:
-            users_dict[uri] = {'uri': uri}
-        
-        # Extract property name from URI
-        if '#' in predicate:
-            prop_name = predicate.split('#')[1]
-            
-            if prop_name == 'type' and 'eco-tourism#' in obj:
-                users_dict[uri]['type'] = obj.split('#')[1]
-            elif prop_name in ['nom', 'email', 'age', 'nationalite']:
-                users_dict[uri][prop_name] = obj
-    
-    # Filter only users with type Touriste or Guide
-    filtered_users = []
-    for user in users_dict.values():
-        if user.get('type') in ['Touriste', 'Guide']:
-            filtered_users.append(user)
-    
-    return filtered_users
+def stream_documents_response(class_name):
+    """JSON array of every entity of `class_name`, written as rows arrive from the store"""
+    def body():
+        yield '['
+        try:
+            for index, document in enumerate(iter_documents(manager, class_name, label=f"stream:{class_name}")):
+                yield (',' if index else '') + json.dumps(document, ensure_ascii=False)
+        except Exception:
+            # Headers are already sent: leave the array unterminated so clients see a failed body
+            app.logger.exception("streaming %s failed", class_name)
+            return
+        yield ']'
+    return Response(stream_with_context(body()), mimetype='application/json')
+
+def coalesce(value, default):
+    """`value`, or `default` when the column was unbound (keeps falsy values such as 0)"""
+    return default if value is None else value
 
 def clean_uri_name(name):
     """Clean name for use in URI - remove spaces and special chars"""
@@ -230,150 +273,36 @@ def clean_uri_name(name):
     cleaned = cleaned.strip('_')
     return cleaned if cleaned else "Unknown"
 
-def parse_transports_from_query_results(results):
-    """Parse SPARQL SELECT query results into structured transport objects with empreinte data"""
-    from models.empreinte_carbone import EmpreinteCarbone
-    
-    transports_dict = {}
-    
-    for result in results:
-        transport_uri = result.get('transport', {}).get('value', '')
-        
-        if transport_uri not in transports_dict:
-            transports_dict[transport_uri] = {
-                'uri': transport_uri,
-                'nom': None,
-                'type': None,
-                'emission_co2_per_km': None,
-                'empreinte': None
-            }
-        
-        # Get transport properties
-        if result.get('nom'):
-            transports_dict[transport_uri]['nom'] = result['nom'].get('value')
-        
-        if result.get('type'):
-            transports_dict[transport_uri]['type'] = result['type'].get('value')
-        
-        if result.get('emission'):
-            emission_value = result['emission'].get('value')
-            transports_dict[transport_uri]['emission_co2_per_km'] = float(emission_value) if emission_value else 0.0
-        
-        # Get empreinte data if present
-        if result.get('empreinteURI') and result.get('valeurCO2kg'):
-            empreinte_uri = result['empreinteURI'].get('value')
-            valeur_co2_kg_str = result['valeurCO2kg'].get('value')
-            valeur_co2_kg = float(valeur_co2_kg_str) if valeur_co2_kg_str else 0.0
-            
-            transports_dict[transport_uri]['empreinte'] = {
-                'uri': empreinte_uri,
-                'valeur_co2_kg': valeur_co2_kg,
-                'is_faible': valeur_co2_kg <= 1.0,
-                'category': EmpreinteCarbone.get_category(valeur_co2_kg),
-                'category_color': EmpreinteCarbone.get_category_color(valeur_co2_kg)
-            }
-    
-    return list(transports_dict.values())
-
-def parse_transports_from_sparql(results):
-    """Parse SPARQL triple results into structured transport objects with empreinte data (legacy)"""
+def describe_empreinte(empreinte):
+    """Add the CO2 category to an empreinte bound by TRANSPORT_ROWS (None when it has no value)"""
     from models.empreinte_carbone import EmpreinteCarbone
     
-    transports_dict = {}
-    empreintes_dict = {}
-    
-    for result in results:
-        uri = result.get('s', {}).get('value', '')
-        predicate = result.get('p', {}).get('value', '')
-        obj = result.get('o', {}).get('value', '')
-        
-        # Extract property name from URI
-        if '#' in predicate:
-            prop_name = predicate.split('#')[1]
-            
-            # Check if this is an EmpreinteCarbone entity
-            if 'Empreinte_' in uri:
-                if uri not in empreintes_dict:
-                    empreintes_dict[uri] = {'uri': uri}
-                
-                if prop_name == 'valeurCO2kg':
-                    empreintes_dict[uri]['valeur_co2_kg'] = float(obj) if obj else 0.0
-                elif prop_name == 'type' and 'EmpreinteCarboneFaible' in obj:
-                    empreintes_dict[uri]['is_faible'] = True
-            else:
-                # This is a Transport entity
-                if uri not in transports_dict:
-                    transports_dict[uri] = {'uri': uri}
-                
-                # Get the type property value (stored as string in RDF)
-                if prop_name == 'type':
-                    transports_dict[uri]['type'] = obj
-                elif prop_name in ['nom', 'emissionCO2PerKm', 'aEmpreinte']:
-                    if prop_name == 'emissionCO2PerKm':
-                        transports_dict[uri]['emission_co2_per_km'] = float(obj) if obj else 0.0
-                    elif prop_name == 'aEmpreinte':
-                        transports_dict[uri]['a_empreinte'] = obj
-                    else:
-                        transports_dict[uri][prop_name] = obj
-    
-    # Enrich transports with empreinte data
-    for transport in transports_dict.values():
-        if transport.get('a_empreinte') and transport['a_empreinte'] in empreintes_dict:
-            empreinte_data = empreintes_dict[transport['a_empreinte']]
-            transport['empreinte'] = {
-                'uri': empreinte_data.get('uri'),
-                'valeur_co2_kg': empreinte_data.get('valeur_co2_kg', 0.0),
-                'is_faible': empreinte_data.get('is_faible', False),
-                'category': EmpreinteCarbone.get_category(empreinte_data.get('valeur_co2_kg')),
-                'category_color': EmpreinteCarbone.get_category_color(empreinte_data.get('valeur_co2_kg'))
-            }
-    
-    return list(transports_dict.values())
-
-# Helper function to parse joined Hebergement and Destination data
-def parse_hebergements_with_destinations(hebergement_results):
-    hebergement_dict = {}
-    destination_dict = {}
-    
-    for result in hebergement_results:
-        s = result.get('s', {}).get('value', '')
-        p = result.get('p', {}).get('value', '')
-        o = result.get('o', {}).get('value', '')
-        
-        if s.startswith(f'{NAMESPACE}Hebergement'):
-            if s not in hebergement_dict:
-                hebergement_dict[s] = {'uri': s}
-            prop_name = p.split('#')[1]
-            if prop_name in ['nom', 'type', 'prix', 'nbChambres', 'niveauEco', 'id']:
-                hebergement_dict[s][prop_name] = o
-            elif prop_name == 'situeDans':
-                hebergement_dict[s]['destinationUri'] = o
-        elif s.startswith(f'{NAMESPACE}Destination'):
-            if s not in destination_dict:
-                destination_dict[s] = {'uri': s}
-            prop_name = p.split('#')[1]
-            if prop_name in ['nom', 'pays', 'climat', 'id']:
-                destination_dict[s][prop_name] = o
-    
-    # Join the data
-    joined_results = []
-    for h in hebergement_dict.values():
-        dest_uri = h.get('destinationUri')
-        if dest_uri and dest_uri in destination_dict:
-            h['destination'] = destination_dict[dest_uri]
-        joined_results.append(h)
-    
-    return joined_results
+    if not empreinte or empreinte.get('valeur_co2_kg') is None:
+        return None
+    valeur_co2_kg = float(empreinte['valeur_co2_kg'] or 0.0)
+    empreinte.update({
+        'valeur_co2_kg': valeur_co2_kg,
+        'is_faible': valeur_co2_kg <= 1.0,
+        'category': EmpreinteCarbone.get_category(valeur_co2_kg),
+        'category_color': EmpreinteCarbone.get_category_color(valeur_co2_kg)
+    })
+    return empreinte
 
 # USERS MANAGEMENT ENDPOINT
 @app.route('/users', methods=['GET'])
 def get_all_users():
     """Get all users (Touristes and Guides) in a structured format - OPTIMIZED"""
     try:
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        user_pattern = "?user a ?type . FILTER (?type = eco:Touriste || ?type = eco:Guide)"
         # Custom SPARQL query to get both Touristes and Guides in ONE query
         query = f"""
         PREFIX eco: <{NAMESPACE}>
         SELECT ?user ?nom ?email ?age ?nationalite ?type WHERE {{
+            {keyset_subquery('user', user_pattern, limit, cursor)}
             ?user a ?type .
             FILTER (?type = eco:Touriste || ?type = eco:Guide)
             OPTIONAL {{ ?user eco:nom ?nom . }}
@@ -381,17 +310,23 @@ def get_all_users():
             OPTIONAL {{ ?user eco:age ?age . }}
             OPTIONAL {{ ?user eco:nationalite ?nationalite . }}
         }}
+        {'ORDER BY STR(?user)' if limit else ''}
         """
         
-        results = manager.execute_query(query)
-        users = parse_users_from_query_results(results)
+        results = manager.execute_query(query, result_format='tsv-text')
+        if isinstance(results, dict):
+            return jsonify(results), 500
+        users = USER_ROWS.bind(results)
         
-        return jsonify({
+        response = {
             'users': users,
             'total': len(users)
-        })
+        }
+        if limit:
+            response['next_cursor'] = next_cursor(results, limit, 'user')
+        return jsonify(response)
     except Exception as e:
-        print(f"Error in get_all_users: {str(e)}")
+        app.logger.exception("Error in get_all_users: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # TOURISTE
@@ -418,17 +353,15 @@ def get_touriste(uri):
 
 @app.route('/touriste', methods=['GET'])
 def get_all_touristes():
-    result = manager.get_all('Touriste')
-    return jsonify(result)
+    return get_all_response('Touriste')
 
 @app.route('/touriste/<path:uri>', methods=['PUT'])
 def update_touriste(uri):
     data = request.json
-    results = []
-    for key, value in data.items():
-        result = manager.update_property(uri, key, value, isinstance(value, str))
-        results.append(result)
-    return jsonify({"updates": results})
+    # All properties are replaced in a single atomic update request;
+    # the response still lists one result per property
+    result = manager.update_properties(uri, data)
+    return jsonify({"updates": [result] * len(data)})
 
 @app.route('/touriste/<path:uri>', methods=['DELETE'])
 def delete_touriste(uri):
@@ -452,8 +385,7 @@ def create_guide():
 
 @app.route('/guide', methods=['GET'])
 def get_all_guides():
-    result = manager.get_all('Guide')
-    return jsonify(result)
+    return get_all_response('Guide')
 
 @app.route('/guide/<path:uri>', methods=['GET'])
 def get_guide(uri):
@@ -463,11 +395,10 @@ def get_guide(uri):
 @app.route('/guide/<path:uri>', methods=['PUT'])
 def update_guide(uri):
     data = request.json
-    results = []
-    for key, value in data.items():
-        result = manager.update_property(uri, key, value, isinstance(value, str))
-        results.append(result)
-    return jsonify({"updates": results})
+    # All properties are replaced in a single atomic update request;
+    # the response still lists one result per property
+    result = manager.update_properties(uri, data)
+    return jsonify({"updates": [result] * len(data)})
 
 @app.route('/guide/<path:uri>', methods=['DELETE'])
 def delete_guide(uri):
@@ -647,8 +578,7 @@ def get_destination(uri):
 @app.route('/destinations', methods=['GET'])
 def get_all_destinations():
     """Read all Destinations"""
-    result = manager.get_all('Destination')
-    return jsonify(result), 200
+    return get_all_response('Destination')
 
 @app.route('/destination/<path:uri>', methods=['PUT'])
 def update_destination(uri):
@@ -657,12 +587,10 @@ def update_destination(uri):
     if not data:
         return jsonify({"error": "Data required for update"}), 400
     
-    updates = []
-    for key, value in data.items():
-        if key in ['nom', 'pays', 'climat']:
-            result = manager.update_property(uri, key, value, isinstance(value, str))
-            updates.append(result)
-    return jsonify({"updates": updates}), 200
+    allowed = ['nom', 'pays', 'climat']
+    values = {key: value for key, value in data.items() if key in allowed}
+    result = manager.update_properties(uri, values)
+    return jsonify({"updates": [result] * len(values)}), 200
 
 @app.route('/destination/<path:uri>', methods=['DELETE'])
 def delete_destination(uri):
@@ -685,8 +613,7 @@ def create_ville():
 
 @app.route('/ville', methods=['GET'])
 def get_all_villes():
-    result = manager.get_all('Ville')
-    return jsonify(result)
+    return get_all_response('Ville')
 
 # HEBERGEMENT
 @app.route('/hebergement', methods=['POST'])
@@ -721,9 +648,10 @@ def get_hebergement(uri):
 def get_all_hebergements():
     """Read all Hebergements with joined Destination data"""
     try:
-        print("=" * 70)
-        print("GET /hebergements endpoint called")
-        
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
         # Simple query to get all hebergements with their destinations
         query = f"""
             PREFIX eco: <{NAMESPACE}>
@@ -731,6 +659,7 @@ def get_all_hebergements():
             SELECT ?hebUri ?hebNom ?hebType ?hebPrix ?hebChambres ?hebEco 
                    ?destUri ?destNom ?destPays ?destClimat
             WHERE {{
+                {keyset_subquery('hebUri', '?hebUri a eco:Hebergement .', limit, cursor)}
                 ?hebUri a eco:Hebergement .
                 
                 OPTIONAL {{ ?hebUri eco:nom ?hebNom }}
@@ -747,61 +676,36 @@ def get_all_hebergements():
                     OPTIONAL {{ ?destUri eco:climat ?destClimat }}
                 }}
             }}
+            {'ORDER BY STR(?hebUri)' if limit else ''}
         """
         
-        print("Executing query...")
-        results = manager.execute_query(query)
-        print(f"Query returned {len(results)} rows")
+        results = manager.execute_query(query, result_format='tsv-text')
+        if isinstance(results, dict):
+            return jsonify({"status": "error", "message": results['error']}), 500
         
         if not results:
-            print("No hebergements found")
+            app.logger.debug("No hebergements found")
+            if limit:
+                return jsonify({"status": "success", "data": [], "next_cursor": None}), 200
             return jsonify({"status": "success", "data": []}), 200
         
-        # Group results by hebergement URI
-        hebergements_dict = {}
+        hebergements_list = HEBERGEMENT_ROWS.bind(results)
+        for hebergement in hebergements_list:
+            if hebergement['destination'] and not hebergement['destination']['nom']:
+                hebergement['destination']['nom'] = 'Non spécifié'
         
-        for row in results:
-            heb_uri = row.get('hebUri', {}).get('value', '')
-            
-            if not heb_uri:
-                continue
-            
-            if heb_uri not in hebergements_dict:
-                # Initialize hebergement
-                hebergements_dict[heb_uri] = {
-                    'uri': heb_uri,
-                    'nom': row.get('hebNom', {}).get('value', ''),
-                    'type': row.get('hebType', {}).get('value', ''),
-                    'prix': row.get('hebPrix', {}).get('value', ''),
-                    'nbChambres': row.get('hebChambres', {}).get('value', ''),
-                    'niveauEco': row.get('hebEco', {}).get('value', ''),
-                    'destination': None
-                }
-                
-                # Add destination if exists
-                dest_uri = row.get('destUri', {}).get('value', '')
-                if dest_uri:
-                    hebergements_dict[heb_uri]['destination'] = {
-                        'uri': dest_uri,
-                        'nom': row.get('destNom', {}).get('value', 'Non spécifié'),
-                        'pays': row.get('destPays', {}).get('value', ''),
-                        'climat': row.get('destClimat', {}).get('value', '')
-                    }
-        
-        hebergements_list = list(hebergements_dict.values())
-        
-        print(f"Processed {len(hebergements_list)} hebergements")
-        if hebergements_list:
-            print(f"First hebergement sample: {hebergements_list[0]}")
+        app.logger.debug("get_all_hebergements: %d hebergements from %d rows", len(hebergements_list), len(results))
         
+        if limit:
+            return jsonify({
+                "status": "success",
+                "data": hebergements_list,
+                "next_cursor": next_cursor(results, limit, 'hebUri')
+            }), 200
         return jsonify({"status": "success", "data": hebergements_list}), 200
         
     except Exception as e:
-        print("=" * 70)
-        print(f"ERROR in get_all_hebergements: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print("=" * 70)
+        app.logger.exception("Error in get_all_hebergements: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/hebergement/<path:uri>', methods=['PUT'])
@@ -811,12 +715,10 @@ def update_hebergement(uri):
     if not data:
         return jsonify({"error": "Data required for update"}), 400
     
-    updates = []
-    for key, value in data.items():
-        if key in ['nom', 'type', 'prix', 'nb_chambres', 'niveau_eco', 'situe_dans', 'utilise_energie']:
-            result = manager.update_property(uri, key, value, isinstance(value, str))
-            updates.append(result)
-    return jsonify({"updates": updates}), 200
+    allowed = ['nom', 'type', 'prix', 'nb_chambres', 'niveau_eco', 'situe_dans', 'utilise_energie']
+    values = {key: value for key, value in data.items() if key in allowed}
+    result = manager.update_properties(uri, values)
+    return jsonify({"updates": [result] * len(values)}), 200
 
 @app.route('/hebergement/<path:uri>', methods=['DELETE'])
 def delete_hebergement(uri):
@@ -841,8 +743,8 @@ def create_activite():
 
 @app.route('/activite', methods=['GET'])
 def get_all_activites():
-    result = manager.get_all('Activite')
-    return jsonify(result)
+    # ?projected=true returns one row per activite instead of one row per triple
+    return get_all_response('Activite', projected=is_projected_request())
 
 @app.route('/activite/<path:uri>', methods=['DELETE'])
 def delete_activite(uri):
@@ -852,11 +754,10 @@ def delete_activite(uri):
 @app.route('/activite/<path:uri>', methods=['PUT'])
 def update_activite(uri):
     data = request.json
-    results = []
-    for key, value in data.items():
-        result = manager.update_property(uri, key, value, isinstance(value, str))
-        results.append(result)
-    return jsonify({"updates": results})
+    # All properties are replaced in a single atomic update request;
+    # the response still lists one result per property
+    result = manager.update_properties(uri, data)
+    return jsonify({"updates": [result] * len(data)})
 
 # ZONE NATURELLE
 @app.route('/zone-naturelle', methods=['POST'])
@@ -872,8 +773,8 @@ def create_zone_naturelle():
 
 @app.route('/zone-naturelle', methods=['GET'])
 def get_all_zones_naturelles():
-    result = manager.get_all('ZoneNaturelle')
-    return jsonify(result)
+    # ?projected=true returns one row per zone instead of one row per triple
+    return get_all_response('ZoneNaturelle', projected=is_projected_request())
 
 @app.route('/zone-naturelle/<path:uri>', methods=['GET'])
 def get_zone_naturelle(uri):
@@ -883,11 +784,10 @@ def get_zone_naturelle(uri):
 @app.route('/zone-naturelle/<path:uri>', methods=['PUT'])
 def update_zone_naturelle(uri):
     data = request.json
-    results = []
-    for key, value in data.items():
-        result = manager.update_property(uri, key, value, isinstance(value, str))
-        results.append(result)
-    return jsonify({"updates": results})
+    # All properties are replaced in a single atomic update request;
+    # the response still lists one result per property
+    result = manager.update_properties(uri, data)
+    return jsonify({"updates": [result] * len(data)})
 
 @app.route('/zone-naturelle/<path:uri>', methods=['DELETE'])
 def delete_zone_naturelle(uri):
@@ -910,11 +810,16 @@ def create_transport():
 @app.route('/transport', methods=['GET'])
 def get_all_transports():
     """Get all transports in a structured format with empreinte data"""
+    try:
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
         # Custom SPARQL query to get transports WITH empreinte data
         query = f"""
         PREFIX eco: <{NAMESPACE}>
         SELECT ?transport ?nom ?type ?emission ?empreinteURI ?valeurCO2kg WHERE {{
+            {keyset_subquery('transport', '?transport a eco:Transport .', limit, cursor)}
             ?transport a eco:Transport .
             OPTIONAL {{ ?transport eco:nom ?nom . }}
             OPTIONAL {{ ?transport eco:type ?type . }}
@@ -924,34 +829,36 @@ def get_all_transports():
                 ?empreinteURI eco:valeurCO2kg ?valeurCO2kg .
             }}
         }}
+        {'ORDER BY STR(?transport)' if limit else ''}
         """
         
-        results = manager.execute_query(query)
-        transports = parse_transports_from_query_results(results)
+        results = manager.execute_query(query, result_format='tsv')
+        if isinstance(results, dict):
+            return jsonify(results), 500
+        transports = TRANSPORT_ROWS.bind(results)
+        for transport_data in transports:
+            transport_data['empreinte'] = describe_empreinte(transport_data['empreinte'])
         
         # Add pricing info to each transport
-        for transport_data in transports:
-            transport = Transport(
-                uri=transport_data['uri'],
-                nom=transport_data.get('nom'),
-                type_=transport_data.get('type'),
-                emission_co2_per_km=transport_data.get('emission_co2_per_km')
-            )
+        for transport_data, transport in zip(transports, Transport.from_documents(transports)):
             transport_data['price_per_km'] = transport.get_price_per_km()
         
-        return jsonify({
+        response = {
             'transports': transports,
             'total': len(transports)
-        })
+        }
+        if limit:
+            response['next_cursor'] = next_cursor(results, limit, 'transport')
+        return jsonify(response)
     except Exception as e:
-        print(f"Error in get_all_transports: {str(e)}")
+        app.logger.exception("Error in get_all_transports: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/transport/<path:uri>', methods=['PUT'])
 def update_transport(uri):
     data = request.json
-    # Delete existing entity
-    manager.delete(uri)
+    # Delete existing entity (keep references to it, they survive the re-create)
+    manager.delete(uri, incoming=False)
     # Create updated entity
     trans = Transport(
         uri=uri,
@@ -1006,16 +913,20 @@ def compare_transport_prices():
         if not transports_data or distance <= 0:
             return jsonify({'error': 'transports array and distance_km required'}), 400
         
+        types = [t_data.get('type') for t_data in transports_data]
+        prices = PRICING.matrix(types, [t_data.get('emission', 0) for t_data in transports_data], [distance])
         comparisons = []
-        for t_data in transports_data:
-            transport = Transport(
-                type_=t_data.get('type'),
-                emission_co2_per_km=t_data.get('emission', 0)
-            )
-            price = transport.calculate_price(distance)
+        for i, transport_type in enumerate(types):
             comparisons.append({
-                'type': t_data.get('type'),
-                'pricing': price
+                'type': transport_type,
+                'pricing': {
+                    'total': float(prices['total'][i, 0]),
+                    'base_price': float(prices['base_price'][i, 0]),
+                    'distance_cost': float(prices['distance_cost'][i, 0]),
+                    'carbon_tax': float(prices['carbon_tax'][i, 0]),
+                    'distance_km': distance,
+                    'co2_kg': float(prices['co2_kg'][i, 0])
+                }
             })
         
         # Sort by total price
@@ -1030,6 +941,40 @@ def compare_transport_prices():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/transport/price-matrix', methods=['POST'])
+def transport_price_matrix():
+    """
+    Price every transport for every distance in one vectorized evaluation
+    Request body: { "transports": [{"type": "Train", "emission": 30}, ...], "distances_km": [10, 50, 100] }
+    Each matrix has one row per transport and one column per distance.
+    """
+    data = request.get_json(silent=True) or {}
+    transports_data = data.get('transports')
+    distances = data.get('distances_km')
+    if not isinstance(transports_data, list) or not transports_data \
+            or not isinstance(distances, list) or not distances:
+        return jsonify({'error': 'transports and distances_km arrays required'}), 400
+    if len(transports_data) * len(distances) > PRICE_MATRIX_MAX_CELLS:
+        return jsonify({'error': f'At most {PRICE_MATRIX_MAX_CELLS} transport x distance cells'}), 400
+    if not all(isinstance(t_data, dict) for t_data in transports_data):
+        return jsonify({'error': 'Each transport must be an object'}), 400
+    
+    types = [t_data.get('type') for t_data in transports_data]
+    try:
+        prices = PRICING.matrix(types, [t_data.get('emission', 0) for t_data in transports_data], distances)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'transports': [{'type': t_data.get('type'), 'emission': t_data.get('emission', 0)} for t_data in transports_data],
+        'distances_km': distances,
+        'total': prices['total'].tolist(),
+        'carbon_tax': prices['carbon_tax'].tolist(),
+        'co2_kg': prices['co2_kg'].tolist(),
+        # Row index of the cheapest transport for each distance
+        'cheapest': prices['total'].argmin(axis=0).tolist()
+    })
+
 # RESTAURANT
 @app.route('/restaurant', methods=['POST'])
 def create_restaurant():
@@ -1045,8 +990,7 @@ def create_restaurant():
 
 @app.route('/restaurant', methods=['GET'])
 def get_all_restaurants():
-    result = manager.get_all('Restaurant')
-    return jsonify(result)
+    return get_all_response('Restaurant')
 
 @app.route('/restaurant/<path:uri>', methods=['GET'])
 def get_restaurant(uri):
@@ -1060,6 +1004,17 @@ def get_restaurant(uri):
     result = manager.execute_query(query)
     return jsonify(result)
 
+@app.route('/restaurant/<path:uri>/availability', methods=['GET'])
+def get_restaurant_availability(uri):
+    """Remaining capacity of every booked slot between ?from= and ?to= (YYYY-MM-DD)"""
+    try:
+        result = admission.availability(uri, request.args.get('from'), request.args.get('to'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if 'error' in result:
+        return jsonify(result), 500
+    return jsonify(result)
+
 @app.route('/restaurant/<path:uri>', methods=['PUT'])
 def update_restaurant(uri):
     """Update a restaurant"""
@@ -1134,8 +1089,7 @@ def create_produit():
 
 @app.route('/produit', methods=['GET'])
 def get_all_produits():
-    result = manager.get_all('ProduitLocal')
-    return jsonify(result)
+    return get_all_response('ProduitLocal')
 
 @app.route('/produit/<path:uri>', methods=['GET'])
 def get_produit(uri):
@@ -1230,31 +1184,7 @@ def delete_produit_local(uri):
 
 # CERTIFICATION
 
-def parse_certifications(results):
-    certs = []
-    cert_dict = {}
-    for res in results:
-        uri = res['s']['value']
-        prop = res['p']['value'].split('#')[-1]
-        val = res['o']['value']
-
-        if uri not in cert_dict:
-            cert_dict[uri] = {"uri": uri, "id": None, "label_nom": None, "organisme": None, "annee_obtention": None}
-
-        if prop == "id":
-            cert_dict[uri]["id"] = int(val)
-        elif prop == "labelNom":
-            cert_dict[uri]["label_nom"] = val
-        elif prop == "organisme":
-            cert_dict[uri]["organisme"] = val
-        elif prop == "anneeObtention":
-            cert_dict[uri]["annee_obtention"] = val
-
-    # Convert dict to list
-    for uri, data in cert_dict.items():
-        certs.append(data)
-    
-    return certs
+CERTIFICATION_ROWS = RowBinder(CertificationEco, default=None)
 
 # CERTIFICATION ECO
 @app.route('/certification', methods=['POST'])
@@ -1272,8 +1202,10 @@ def create_certification():
 
 @app.route('/certification', methods=['GET'])
 def get_all_certifications():
-    results = manager.get_all('CertificationEco')
-    parsed = parse_certifications(results)
+    results = manager.get_all('CertificationEco', projected=True)
+    if isinstance(results, dict) and 'error' in results:
+        return jsonify(results), 500
+    parsed = [CERTIFICATION_ROWS.document(row) for row in results]
     return jsonify(parsed)
 
 
@@ -1281,38 +1213,15 @@ def get_all_certifications():
 @app.route('/certification/id/<int:cert_id>', methods=['GET'])
 def get_certification_by_id(cert_id):
     """Get certification by numeric ID"""
-    # Query to find certification by ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri ?p ?o
-    WHERE {{
-        ?uri a eco:CertificationEco .
-        ?uri eco:id {cert_id} .
-        ?uri ?p ?o .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    found = manager.get_by_id('CertificationEco', cert_id)
+    if isinstance(found, dict):
+        return jsonify(found), 500
+    uri, results = found
+    if uri is None:
         return jsonify({"error": "Certification not found"}), 404
     
-    # Parse results into a structured object
-    cert = {"uri": None, "id": cert_id, "label_nom": None, "organisme": None, "annee_obtention": None}
-    
-    for res in results:
-        if not cert["uri"]:
-            cert["uri"] = res['uri']['value']
-        
-        prop = res['p']['value'].split('#')[-1]
-        val = res['o']['value']
-        
-        if prop == "labelNom":
-            cert["label_nom"] = val
-        elif prop == "organisme":
-            cert["organisme"] = val
-        elif prop == "anneeObtention":
-            cert["annee_obtention"] = val
+    cert = CERTIFICATION_ROWS.bind_entity(results, uri) or CERTIFICATION_ROWS.new(uri)
+    cert['id'] = cert_id
     
     return jsonify(cert)
 
@@ -1345,19 +1254,7 @@ def get_certification(uri):
             "tip": "Try using /certification/id/<id> endpoint or ensure the URI is properly encoded"
         }), 404
     
-    cert = {"uri": decoded_uri, "label_nom": None, "organisme": None, "annee_obtention": None}
-    for res in results:
-        prop = res['p']['value'].split('#')[-1]
-        val = res['o']['value']
-        
-        if prop == "labelNom":
-            cert["label_nom"] = val
-        elif prop == "organisme":
-            cert["organisme"] = val
-        elif prop == "anneeObtention":
-            cert["annee_obtention"] = val
-        elif prop == "id":
-            cert["id"] = int(val)
+    cert = CERTIFICATION_ROWS.bind_entity(results, decoded_uri) or CERTIFICATION_ROWS.new(decoded_uri)
     
     return jsonify(cert)
 
@@ -1366,37 +1263,21 @@ def update_certification_by_id(cert_id):
     """Update certification by numeric ID"""
     data = request.json
     
-    # First, find the URI for this ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri
-    WHERE {{
-        ?uri a eco:CertificationEco .
-        ?uri eco:id {cert_id} .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    uri = manager.uri_for_id('CertificationEco', cert_id)
+    if isinstance(uri, dict):
+        return jsonify(uri), 500
+    if uri is None:
         return jsonify({"error": "Certification not found"}), 404
     
-    uri = results[0]['uri']['value']
-    
-    # Delete old data
-    manager.delete(uri)
-    
-    # Create new data with same URI and ID
+    # Same URI and ID; references to it are kept
     cert = CertificationEco(
+        id=cert_id,
         uri=uri,
         label_nom=data.get('label_nom'),
         organisme=data.get('organisme'),
         annee_obtention=data.get('annee_obtention')
     )
-    # Restore the original ID
-    cert.id = cert_id
-    
-    result = manager.create(cert)
+    result = manager.replace(cert)
     if result.get('success'):
         result['uri'] = uri
         result['id'] = cert_id
@@ -1422,42 +1303,34 @@ def update_certification(uri):
             "received_uri": decoded_uri
         }), 400
     
-    # Delete old data
-    delete_result = manager.delete(decoded_uri)
-    
-    # Create new data with same URI
+    # Replace its data, same URI and ID (references to it are kept)
+    existing_id = manager.id_for_uri(decoded_uri)
+    if isinstance(existing_id, dict):
+        return jsonify(existing_id), 500
     cert = CertificationEco(
+        id=existing_id,
         uri=decoded_uri,
         label_nom=data.get('label_nom'),
         organisme=data.get('organisme'),
         annee_obtention=data.get('annee_obtention')
     )
-    result = manager.create(cert)
+    result = manager.replace(cert)
     
     if result.get('success'):
         result['uri'] = decoded_uri
+        result['id'] = cert.id
     
     return jsonify(result)
 
 @app.route('/certification/id/<int:cert_id>', methods=['DELETE'])
 def delete_certification_by_id(cert_id):
     """Delete certification by numeric ID"""
-    # First, find the URI for this ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri
-    WHERE {{
-        ?uri a eco:CertificationEco .
-        ?uri eco:id {cert_id} .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    uri = manager.uri_for_id('CertificationEco', cert_id)
+    if isinstance(uri, dict):
+        return jsonify(uri), 500
+    if uri is None:
         return jsonify({"error": "Certification not found"}), 404
     
-    uri = results[0]['uri']['value']
     result = manager.delete(uri)
     
     if result.get('success'):
@@ -1490,41 +1363,7 @@ def delete_certification(uri):
     
     return jsonify(result)
 
-def parse_evenements_from_sparql(results):
-    evenements_dict = {}
-
-    for result in results:
-        uri = result['s']['value']
-        predicate = result['p']['value'].split('#')[-1]  # dernier segment
-        obj = result['o'].get('value')
-
-        if uri not in evenements_dict:
-            evenements_dict[uri] = {'uri': uri, 'id': None}
-
-        # Mapper les propriétés
-        if predicate == 'id':
-            try:
-                evenements_dict[uri]['id'] = int(float(obj))
-            except (ValueError, TypeError):
-                evenements_dict[uri]['id'] = None
-        elif predicate == 'nom':
-            evenements_dict[uri]['nom'] = obj
-        elif predicate == 'eventDate':
-            evenements_dict[uri]['event_date'] = obj
-        elif predicate == 'eventDureeHeures':
-            try:
-                evenements_dict[uri]['event_duree_heures'] = int(float(obj))
-            except (ValueError, TypeError):
-                evenements_dict[uri]['event_duree_heures'] = None
-        elif predicate == 'eventPrix':
-            try:
-                evenements_dict[uri]['event_prix'] = float(obj)
-            except (ValueError, TypeError):
-                evenements_dict[uri]['event_prix'] = None
-        elif predicate == 'aLieuDans':
-            evenements_dict[uri]['a_lieu_dans'] = obj
-
-    return list(evenements_dict.values())
+EVENEMENT_ROWS = RowBinder(Evenement, default=None)
 
 
 # EVENEMENT
@@ -1545,49 +1384,30 @@ def create_evenement():
 
 @app.route('/evenement', methods=['GET'])
 def get_all_evenements():
-    results = manager.get_all('Evenement')  # retourne les triplets bruts
-    evenements = parse_evenements_from_sparql(results)
+    try:
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results = manager.get_all('Evenement', projected=True, limit=limit, cursor=cursor)  # une ligne par evenement
+    if isinstance(results, dict) and 'error' in results:
+        return jsonify(results), 500
+    evenements = [EVENEMENT_ROWS.document(row) for row in results]
+    if limit:
+        return jsonify({"evenements": evenements, "next_cursor": next_cursor(results, limit)})
     return jsonify(evenements)
 
 @app.route('/evenement/id/<int:event_id>', methods=['GET'])
 def get_evenement_by_id(event_id):
     """Get evenement by numeric ID"""
-    # Query to find evenement by ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri ?p ?o
-    WHERE {{
-        ?uri a eco:Evenement .
-        ?uri eco:id {event_id} .
-        ?uri ?p ?o .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    found = manager.get_by_id('Evenement', event_id)
+    if isinstance(found, dict):
+        return jsonify(found), 500
+    uri, results = found
+    if uri is None:
         return jsonify({"error": "Evenement not found"}), 404
     
-    # Parse results into a structured object
-    event = {"uri": None, "id": event_id, "nom": None, "event_date": None, "event_duree_heures": None, "event_prix": None, "a_lieu_dans": None}
-    
-    for res in results:
-        if not event["uri"]:
-            event["uri"] = res['uri']['value']
-        
-        prop = res['p']['value'].split('#')[-1]
-        val = res['o']['value']
-        
-        if prop == "nom":
-            event["nom"] = val
-        elif prop == "eventDate":
-            event["event_date"] = val
-        elif prop == "eventDureeHeures":
-            event["event_duree_heures"] = int(val)
-        elif prop == "eventPrix":
-            event["event_prix"] = float(val)
-        elif prop == "aLieuDans":
-            event["a_lieu_dans"] = val
+    event = EVENEMENT_ROWS.bind_entity(results, uri) or EVENEMENT_ROWS.new(uri)
+    event['id'] = event_id
     
     return jsonify(event)
 
@@ -1619,23 +1439,7 @@ def get_evenement(uri):
             "tip": "Try using /evenement/id/<id> endpoint or ensure the URI is properly encoded"
         }), 404
     
-    event = {"uri": decoded_uri, "nom": None, "event_date": None, "event_duree_heures": None, "event_prix": None, "a_lieu_dans": None}
-    for res in results:
-        prop = res['p']['value'].split('#')[-1]
-        val = res['o']['value']
-        
-        if prop == "nom":
-            event["nom"] = val
-        elif prop == "eventDate":
-            event["event_date"] = val
-        elif prop == "eventDureeHeures":
-            event["event_duree_heures"] = val
-        elif prop == "eventPrix":
-            event["event_prix"] = val
-        elif prop == "aLieuDans":
-            event["a_lieu_dans"] = val
-        elif prop == "id":
-            event["id"] = int(val)
+    event = EVENEMENT_ROWS.bind_entity(results, decoded_uri) or EVENEMENT_ROWS.new(decoded_uri)
     
     return jsonify(event)
 
@@ -1644,28 +1448,15 @@ def update_evenement_by_id(event_id):
     """Update evenement by numeric ID"""
     data = request.json
     
-    # First, find the URI for this ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri
-    WHERE {{
-        ?uri a eco:Evenement .
-        ?uri eco:id {event_id} .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    uri = manager.uri_for_id('Evenement', event_id)
+    if isinstance(uri, dict):
+        return jsonify(uri), 500
+    if uri is None:
         return jsonify({"error": "Evenement not found"}), 404
     
-    uri = results[0]['uri']['value']
-    
-    # Delete old data
-    manager.delete(uri)
-    
-    # Create new data with same URI and ID
+    # Same URI and ID; references to it are kept
     event = Evenement(
+        id=event_id,
         uri=uri,
         nom=data.get('nom'),
         event_date=data.get('event_date'),
@@ -1673,10 +1464,7 @@ def update_evenement_by_id(event_id):
         event_prix=data.get('event_prix'),
         a_lieu_dans=data.get('a_lieu_dans')
     )
-    # Restore the original ID
-    event.id = event_id
-    
-    result = manager.create(event)
+    result = manager.replace(event)
     if result.get('success'):
         result['uri'] = uri
         result['id'] = event_id
@@ -1702,11 +1490,12 @@ def update_evenement(uri):
             "received_uri": decoded_uri
         }), 400
     
-    # Delete old data
-    manager.delete(decoded_uri)
-    
-    # Create new data with same URI
+    # Replace its data, same URI and ID (references to it are kept)
+    existing_id = manager.id_for_uri(decoded_uri)
+    if isinstance(existing_id, dict):
+        return jsonify(existing_id), 500
     event = Evenement(
+        id=existing_id,
         uri=decoded_uri,
         nom=data.get('nom'),
         event_date=data.get('event_date'),
@@ -1714,32 +1503,23 @@ def update_evenement(uri):
         event_prix=data.get('event_prix'),
         a_lieu_dans=data.get('a_lieu_dans')
     )
-    result = manager.create(event)
+    result = manager.replace(event)
     
     if result.get('success'):
         result['uri'] = decoded_uri
+        result['id'] = event.id
     
     return jsonify(result)
 
 @app.route('/evenement/id/<int:event_id>', methods=['DELETE'])
 def delete_evenement_by_id(event_id):
     """Delete evenement by numeric ID"""
-    # First, find the URI for this ID
-    query = f"""
-    PREFIX eco: <{NAMESPACE}>
-    
-    SELECT ?uri
-    WHERE {{
-        ?uri a eco:Evenement .
-        ?uri eco:id {event_id} .
-    }}
-    """
-    results = manager.execute_query(query)
-    
-    if not results:
+    uri = manager.uri_for_id('Evenement', event_id)
+    if isinstance(uri, dict):
+        return jsonify(uri), 500
+    if uri is None:
         return jsonify({"error": "Evenement not found"}), 404
     
-    uri = results[0]['uri']['value']
     result = manager.delete(uri)
     
     if result.get('success'):
@@ -1778,7 +1558,8 @@ def search():
     data = request.json
     result = manager.search(
         class_name=data.get('class_name'),
-        filters=data.get('filters')
+        filters=data.get('filters'),
+        projected=bool(data.get('projected'))
     )
     return jsonify(result)
 
@@ -1818,6 +1599,112 @@ def search_events():
 def health():
     return jsonify({"status": "running"})
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Query result cache counters (hits, misses, evictions...)"""
+    return jsonify(manager.cache_stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """SPARQL query and Flask route latency histograms in Prometheus text format"""
+    return Response(render_metrics(manager.cache_stats()), mimetype='text/plain; version=0.0.4')
+
+@app.route('/bulk/<class_name>', methods=['POST'])
+@token_required
+def bulk_create(class_name):
+    """
+    Bulk ingest of NDJSON records (one JSON object per line) as <class_name> entities.
+    Records are uploaded in chunks through the Fuseki data endpoint.
+    Query: ?chunk_size=N (default BULK_CHUNK_SIZE)
+    Streams back NDJSON: one line per uploaded chunk, one per rejected record
+    (the first BULK_MAX_REJECTED only; the summary counts them all), then a summary.
+    The body may not exceed BULK_MAX_CONTENT_LENGTH bytes.
+    """
+    if model_class(class_name) is None:
+        return jsonify({"error": f"Unknown class: {class_name}"}), 404
+    try:
+        chunk_size = int(request.args.get('chunk_size', BULK_CHUNK_SIZE))
+        if chunk_size < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "chunk_size must be a positive integer"}), 400
+    
+    # Read the body as a stream, with its own limit: MAX_CONTENT_LENGTH is meant for file uploads
+    too_large = f"Body exceeds {BULK_MAX_CONTENT_LENGTH} bytes"
+    try:
+        stream = get_input_stream(request.environ, max_content_length=BULK_MAX_CONTENT_LENGTH)
+    except RequestEntityTooLarge:
+        return jsonify({"error": too_large}), 413
+    summary = {"class": class_name, "chunks": 0, "created": 0, "failed": 0, "rejected": 0}
+    rejected = []
+    
+    def records():
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Record must be a JSON object")
+                # Checked here, so an invalid value rejects its line and not its whole chunk
+                model_instance = build_model(class_name, record).validate()
+            except Exception as e:
+                summary['rejected'] += 1
+                if summary['rejected'] <= BULK_MAX_REJECTED:
+                    rejected.append({"line": line_number, "error": str(e)})
+                continue
+            yield model_instance
+    
+    def flush_rejected():
+        lines = [json.dumps({"rejected": item}) + "\n" for item in rejected]
+        rejected.clear()
+        return lines
+    
+    def progress():
+        try:
+            for report in manager.iter_bulk_create(records(), chunk_size):
+                summary['chunks'] += 1
+                summary['created' if report['success'] else 'failed'] += report['count']
+                yield from flush_rejected()
+                yield json.dumps(report) + "\n"
+        except RequestEntityTooLarge:
+            summary['error'] = f"{too_large}; the rest was not read"
+        yield from flush_rejected()
+        summary['success'] = summary['failed'] == 0 and summary['rejected'] == 0 and 'error' not in summary
+        yield json.dumps({"summary": summary}) + "\n"
+    
+    return Response(stream_with_context(progress()), mimetype='application/x-ndjson')
+
+@app.route('/export', methods=['GET'])
+@token_required
+def export():
+    """
+    Stream a snapshot of the dataset, without private properties (password hashes).
+    Query: ?format=ntriples (whole store, default) | ndjson (entity documents per class)
+           ?class=Transport,Restaurant (ndjson only, default: every model)
+           ?gzip=false to disable compression
+    """
+    fmt = request.args.get('format', 'ntriples')
+    if fmt not in ('ntriples', 'ndjson'):
+        return jsonify({"error": "format must be 'ntriples' or 'ndjson'"}), 400
+    classes = [c for c in request.args.get('class', '').split(',') if c] or None
+    unknown = [c for c in classes or [] if model_class(c) is None]
+    if unknown:
+        return jsonify({"error": f"Unknown class: {', '.join(unknown)}"}), 404
+    compress = request.args.get('gzip', 'true').lower() != 'false'
+    
+    filename = 'export.nt' if fmt == 'ntriples' else 'export.ndjson'
+    mimetype = 'application/n-triples' if fmt == 'ntriples' else 'application/x-ndjson'
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    return Response(
+        stream_with_context(export_dataset(manager, fmt, classes, compress)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 # ============================================
 # AI AGENT ENDPOINTS
 # ============================================
@@ -1833,19 +1720,17 @@ def ai_chat():
         data = request.get_json(force=True)
         message = data.get('message', '')
         
-        print(f"[AI Chat] Received message: {message}")
+        app.logger.debug("[AI Chat] Received message: %s", message)
     
         if not message:
             return jsonify({"error": "Message is required"}), 400
     
         response = aisalhi_agent.chat_message(message)
-        print(f"[AI Chat] Response generated: {len(response)} chars")
+        app.logger.debug("[AI Chat] Response generated: %d chars", len(response))
         
         return jsonify({"response": response}), 200
     except Exception as e:
-        print(f"[AI Chat] Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("[AI Chat] Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/ask', methods=['POST'])
@@ -1879,7 +1764,7 @@ def ai_sparql():
         result = aisalhi_agent.generate_sparql(query)
         return jsonify(result)
     except Exception as e:
-        print(f"Error in /ai/sparql: {str(e)}")
+        app.logger.exception("Error in /ai/sparql: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/recommend-activities', methods=['POST'])
@@ -1899,7 +1784,7 @@ def ai_recommend_activities():
         result = aisalhi_agent.recommend_activities(data)
         return jsonify({"recommendations": result})
     except Exception as e:
-        print(f"Error in /ai/recommend-activities: {str(e)}")
+        app.logger.exception("Error in /ai/recommend-activities: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/eco-score/<entity_type>/<path:uri>', methods=['GET'])
@@ -1918,7 +1803,7 @@ def ai_reset():
         aisalhi_agent.reset_chat()
         return jsonify({"message": "Chat session reset successfully", "status": "success"})
     except Exception as e:
-        print(f"Error in /ai/reset: {str(e)}")
+        app.logger.exception("Error in /ai/reset: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/ai/analyze-video', methods=['POST', 'OPTIONS'])
@@ -1928,22 +1813,22 @@ def analyze_video():
         return jsonify({"status": "ok"}), 200
         
     try:
-        print("[VIDEO] Starting video analysis endpoint")
+        app.logger.debug("[VIDEO] Starting video analysis endpoint")
         # Get user message if provided
         user_message = request.form.get('message', '')
-        print(f"[VIDEO] User message: {user_message}")
+        app.logger.debug("[VIDEO] User message: %s", user_message)
         
         # Vérifier si un fichier vidéo est présent
         if 'video' not in request.files:
-            print("[VIDEO] Error: No video file in request")
+            app.logger.warning("[VIDEO] Error: No video file in request")
             return jsonify({"error": "Aucun fichier vidéo fourni"}), 400
         
         video_file = request.files['video']
         if video_file.filename == '':
-            print("[VIDEO] Error: Empty filename")
+            app.logger.warning("[VIDEO] Error: Empty filename")
             return jsonify({"error": "Nom de fichier vide"}), 400
         
-        print(f"[VIDEO] Video filename: {video_file.filename}")
+        app.logger.debug("[VIDEO] Video filename: %s", video_file.filename)
         
         # Créer un répertoire temporaire pour stocker la vidéo
         import tempfile
@@ -1954,18 +1839,18 @@ def analyze_video():
         file_ext = os.path.splitext(video_file.filename)[1] or '.webm'
         video_path = os.path.join(temp_dir, f'recording{file_ext}')
         
-        print(f"[VIDEO] Saving to: {video_path}")
+        app.logger.debug("[VIDEO] Saving to: %s", video_path)
         
         # Sauvegarder le fichier vidéo temporairement
         video_file.save(video_path)
         file_size = os.path.getsize(video_path)
         app.logger.info(f"Vidéo sauvegardée: {video_path}, taille: {file_size} bytes")
-        print(f"[VIDEO] File saved, size: {file_size} bytes")
+        app.logger.debug("[VIDEO] File saved, size: %d bytes", file_size)
         
         # Use the AISalhi agent method for video analysis
-        print("[VIDEO] Calling aisalhi_agent.analyze_video_vibe()")
+        app.logger.debug("[VIDEO] Calling aisalhi_agent.analyze_video_vibe()")
         analysis_result = aisalhi_agent.analyze_video_vibe(video_path, user_message)
-        print(f"[VIDEO] Analysis result type: {type(analysis_result)}")
+        app.logger.debug("[VIDEO] Analysis result type: %s", type(analysis_result))
         
         # Nettoyer le fichier temporaire
         try:
@@ -2065,16 +1950,16 @@ def ai_help():
 
 @app.route('/reservation-restaurant', methods=['GET'])
 def get_all_reservations():
-    """Get all restaurant reservations"""
+    """Get all restaurant reservations (?projected=true: one row per reservation)"""
     try:
-        query = f"""
-            PREFIX ns: <{NAMESPACE}>
-            SELECT ?s ?p ?o WHERE {{
-                ?s a ns:ReservationRestaurant .
-                ?s ?p ?o .
-            }}
-        """
-        results = manager.execute_query(query)
+        limit, cursor = get_page_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        results = manager.get_all('ReservationRestaurant', projected=is_projected_request(),
+                                  limit=limit, cursor=cursor)
+        if limit and isinstance(results, list):
+            return jsonify({"reservations": results, "next_cursor": next_cursor(results, limit)})
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -2091,61 +1976,41 @@ def create_reservation_restaurant():
             if not data.get(field):
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        restaurant_uri = data['restaurant']
-        touriste_uri = data['touriste']
-        date_reservation = data['date_reservation']
-        heure = data['heure']
-        nombre_personnes = data['nombre_personnes']
-        
-        # 1. Check if tourist already has a reservation at this time
-        tourist_available = ReservationRestaurant.check_tourist_conflict(
-            manager, 
-            touriste_uri, 
-            date_reservation, 
-            heure
-        )
-        
-        if not tourist_available:
-            return jsonify({
-                "error": "Vous avez déjà une réservation à cette heure",
-                "message": "You already have a reservation at this time"
-            }), 409
-        
-        # 2. Check restaurant capacity
-        capacity_available, current_reserved, max_capacity, capacity_message = ReservationRestaurant.check_restaurant_capacity(
-            manager, 
-            restaurant_uri, 
-            date_reservation, 
-            heure,
-            nombre_personnes
-        )
-        
-        if not capacity_available:
-            return jsonify({
-                "error": "Le restaurant est complet pour ce créneau horaire",
-                "message": capacity_message,
-                "current_reserved": current_reserved,
-                "max_capacity": max_capacity
-            }), 409
-        
-        # Create the reservation
         reservation = ReservationRestaurant(
-            touriste=touriste_uri,
-            restaurant=restaurant_uri,
-            date_reservation=date_reservation,
-            heure=heure,
-            nombre_personnes=nombre_personnes,
+            touriste=data['touriste'],
+            restaurant=data['restaurant'],
+            date_reservation=data['date_reservation'],
+            heure=data['heure'],
+            nombre_personnes=data['nombre_personnes'],
             statut=data.get('statut', 'en_attente'),
             notes_speciales=data.get('notes_speciales'),
             telephone=data.get('telephone'),
             email=data.get('email')
         )
         
-        result = manager.create(reservation)
+        # Capacity and tourist conflict are checked by the same conditional insert
+        try:
+            result = admission.admit(reservation)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         if result.get('error'):
             return jsonify({"error": result['error']}), 500
         
+        if result.get('reason') == 'tourist_conflict':
+            return jsonify({
+                "error": "Vous avez déjà une réservation à cette heure",
+                "message": "You already have a reservation at this time"
+            }), 409
+        
+        if not result['success']:
+            return jsonify({
+                "error": "Le restaurant est complet pour ce créneau horaire",
+                "message": result['message'],
+                "current_reserved": result['current_reserved'],
+                "max_capacity": result['max_capacity']
+            }), 409
+        
         return jsonify({
             "message": "Reservation created successfully",
             "uri": reservation.uri,
@@ -2159,46 +2024,45 @@ def create_reservation_restaurant():
 def get_reservation_restaurant(uri):
     """Get reservation details by URI"""
     try:
-        query = f"""
-            PREFIX ns: <{NAMESPACE}>
-            SELECT ?p ?o WHERE {{
-                <{uri}> ?p ?o .
-            }}
-        """
-        results = manager.execute_query(query)
+        results = manager.get_by_uri(uri)
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/reservations-restaurant/touriste/<path:touriste_uri>', methods=['GET'])
 def get_touriste_reservations(touriste_uri):
-    """Get all reservations for a tourist"""
+    """Get all reservations for a tourist (?upcoming=true: active ones not yet over, by time)"""
     try:
-        query = f"""
-            PREFIX ns: <{NAMESPACE}>
-            SELECT ?s ?p ?o WHERE {{
-                ?s a ns:ReservationRestaurant .
-                ?s ns:reservePar <{touriste_uri}> .
-                ?s ?p ?o .
-            }}
-        """
-        results = manager.execute_query(query)
+        upcoming = request.args.get('upcoming', 'false').lower() == 'true'
+        return jsonify(timelines.reservations(touriste_uri, upcoming=upcoming))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/reservation-restaurant/status', methods=['PUT'])
+def update_reservation_statuses():
+    """Update the status of many reservations: {"uris": [...], "statut": "..."}"""
+    try:
+        data = request.json or {}
+        uris = data.get('uris')
+        new_status = data.get('statut')
         
-        # Parse results into structured reservations
-        reservations_map = {}
-        for result in results:
-            uri = result.get('s', {}).get('value', '')
-            predicate = result.get('p', {}).get('value', '')
-            obj = result.get('o', {}).get('value', '')
-            
-            if uri not in reservations_map:
-                reservations_map[uri] = {'uri': uri}
-            
-            if '#' in predicate:
-                prop_name = predicate.split('#')[1]
-                reservations_map[uri][prop_name] = obj
+        if not isinstance(uris, list) or not uris:
+            return jsonify({"error": "'uris' must be a non-empty list"}), 400
+        if not new_status:
+            return jsonify({"error": "Missing 'statut' field"}), 400
+        
+        try:
+            result = set_statuses(manager, uris, new_status)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        admission.invalidate(*uris)
+        
+        if result.get('error'):
+            return jsonify({"error": result['error']}), 500
         
-        return jsonify(list(reservations_map.values()))
+        return jsonify({"message": "Reservation statuses updated", "statut": new_status, "count": result['changed']})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -2212,11 +2076,11 @@ def update_reservation_status(uri):
         if not new_status:
             return jsonify({"error": "Missing 'statut' field"}), 400
         
-        valid_statuses = ['en_attente', 'confirmee', 'annulee']
-        if new_status not in valid_statuses:
-            return jsonify({"error": f"Invalid status. Must be one of: {valid_statuses}"}), 400
+        if new_status not in RESERVATION_STATUSES:
+            return jsonify({"error": f"Invalid status. Must be one of: {list(RESERVATION_STATUSES)}"}), 400
         
         result = manager.update_property(uri, 'statut', new_status, is_string=True)
+        admission.invalidate(uri)
         
         if result.get('error'):
             return jsonify({"error": result['error']}), 500
@@ -2230,6 +2094,7 @@ def delete_reservation(uri):
     """Delete a reservation"""
     try:
         result = manager.delete(uri)
+        admission.invalidate(uri)
         
         if result.get('error'):
             return jsonify({"error": result['error']}), 500
@@ -2403,7 +2268,7 @@ def groupai_chat():
             'response': response
         })
     except Exception as e:
-        print(f"Error in GroupAI chat: {str(e)}")
+        app.logger.exception("Error in GroupAI chat: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -2423,7 +2288,7 @@ def groupai_sparql():
         
         return jsonify(result)
     except Exception as e:
-        print(f"Error in GroupAI SPARQL: {str(e)}")
+        app.logger.exception("Error in GroupAI SPARQL: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -2482,5 +2347,6 @@ def groupai_help():
     })
 
 if __name__ == '__main__':
+    reservation_expiry.start()
     app.run(host='0.0.0.0', port=8000, debug=True)
 
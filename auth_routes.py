@@ -6,6 +6,8 @@ from flask import Blueprint, request, jsonify
 from models.touriste import Touriste
 from models.guide import Guide
 from Mangage.sparql_manager import SPARQLManager
+from Mangage.templates import SPARQLTemplate, PREFIXES, string
+from Mangage.triples import TripleWriter
 from email_service import send_verification_email, send_password_reset_email, send_welcome_email, verify_token
 import jwt
 import datetime
@@ -20,6 +22,54 @@ JWT_SECRET = "your-secret-key-change-this-in-production"
 JWT_ALGORITHM = "HS256"
 
 manager = SPARQLManager()
+# Accounts by email (see Mangage.user_index): lookups usually need no query
+users = manager.user_index
+
+# Prepared queries: user input (emails, passwords) is always bound as escaped literals
+PROFILE = SPARQLTemplate("""
+    SELECT ?nom ?email ?age ?nationalite WHERE {
+        ${user:iri} eco:nom ?nom .
+        ${user:iri} eco:email ?email .
+        OPTIONAL { ${user:iri} eco:age ?age . }
+        OPTIONAL { ${user:iri} eco:nationalite ?nationalite . }
+    }
+""", name='profile')
+
+MARK_EMAIL_VERIFIED = SPARQLTemplate("""
+    INSERT DATA {
+        ${user:iri} eco:emailVerified true .
+        ${user:iri} eco:verifiedAt ${verified_at:datetime} .
+    }
+""", name='mark_email_verified')
+
+SET_PASSWORD = SPARQLTemplate("""
+    DELETE { ${user:iri} eco:password ?oldPassword . }
+    INSERT { ${user:iri} eco:password ${password} . }
+    WHERE { ${user:iri} eco:password ?oldPassword . }
+""", name='set_password')
+
+RESET_PASSWORD = SPARQLTemplate("""
+    DELETE { ${user:iri} eco:password ?oldPassword . }
+    INSERT {
+        ${user:iri} eco:password ${password} .
+        ${user:iri} eco:passwordResetAt ${reset_at:datetime} .
+    }
+    WHERE { ${user:iri} eco:password ?oldPassword . }
+""", name='reset_password')
+
+# The account is inserted only if no other account has its email; the store
+# checks it in the same update, so concurrent registrations cannot both succeed
+_REGISTER = """
+INSERT {{
+{triples}}}
+WHERE {{
+    FILTER NOT EXISTS {{
+        ?other eco:email ?otherEmail .
+        ?other eco:password ?otherPassword .
+        FILTER(STR(?otherEmail) = {email})
+    }}
+}}
+"""
 
 def hash_password(password):
     """Hash password using SHA-256"""
@@ -73,14 +123,7 @@ def register():
         email = data['email']
         
         # Check if user already exists
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?user WHERE {{
-            ?user eco:email "{email}" .
-        }}
-        """
-        existing = manager.execute_query(query)
-        if existing:
+        if users.find(email):
             return jsonify({'error': 'User with this email already exists'}), 400
         
         # Hash password
@@ -112,8 +155,18 @@ def register():
         user.email = email
         user.password = hashed_password
         
-        # Create in RDF store
-        manager.create(user)
+        # Create in RDF store, unless another worker registered the email first
+        update = PREFIXES + _REGISTER.format(
+            triples=TripleWriter().model(user.assign_id()).text(),
+            email=string(email),
+        )
+        result = manager.execute_update(update, label='register')
+        if result.get('error'):
+            return jsonify({'error': result['error']}), 500
+        record = users.refresh(email)
+        if record is None or record.uri != user.uri:
+            return jsonify({'error': 'User with this email already exists'}), 400
+        manager.id_index.add_models([user])
         
         # Send verification email
         try:
@@ -156,39 +209,22 @@ def login():
         email = data['email']
         hashed_password = hash_password(data['password'])
         
-        # Query user by email and password
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?user ?nom ?age ?nationalite ?type WHERE {{
-            ?user eco:email "{email}" .
-            ?user eco:password "{hashed_password}" .
-            ?user eco:nom ?nom .
-            OPTIONAL {{ ?user eco:age ?age . }}
-            OPTIONAL {{ ?user eco:nationalite ?nationalite . }}
-            ?user a ?type .
-            FILTER(?type = eco:Touriste || ?type = eco:Guide)
-        }}
-        """
-        
-        results = manager.execute_query(query)
-        
-        if not results:
-            return jsonify({'error': 'Invalid email or password'}), 401
-        
-        user_result = results[0]
+        # Passwords are checked against the store, not the index: another
+        # process may have changed this one within the index TTL
+        record = users.refresh(email)
         
-        # Determine user type
-        user_type_uri = user_result.get('type', {}).get('value', '')
-        user_type = 'Guide' if 'Guide' in user_type_uri else 'Touriste'
+        # Only Touristes and Guides with a name can log in
+        if record is None or record.password != hashed_password or not record.type or not record.nom:
+            return jsonify({'error': 'Invalid email or password'}), 401
         
         # Prepare user data
         user_data = {
-            'uri': user_result['user']['value'],
+            'uri': record.uri,
             'email': email,
-            'nom': user_result['nom']['value'],
-            'type': user_type,
-            'age': user_result.get('age', {}).get('value'),
-            'nationalite': user_result.get('nationalite', {}).get('value')
+            'nom': record.nom,
+            'type': record.type,
+            'age': record.age,
+            'nationalite': record.nationalite
         }
         
         # Generate token
@@ -211,19 +247,9 @@ def get_profile():
         user_uri = request.current_user['uri']
         
         # Query user details
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?nom ?email ?age ?nationalite WHERE {{
-            <{user_uri}> eco:nom ?nom .
-            <{user_uri}> eco:email ?email .
-            OPTIONAL {{ <{user_uri}> eco:age ?age . }}
-            OPTIONAL {{ <{user_uri}> eco:nationalite ?nationalite . }}
-        }}
-        """
-        
-        results = manager.execute_query(query)
-        
-        if not results:
+        results = manager.execute_prepared(PROFILE, {'user': user_uri})
+        
+        if not results or isinstance(results, dict):
             return jsonify({'error': 'User not found'}), 404
         
         user_data = results[0]
@@ -268,42 +294,22 @@ def verify_email():
             return jsonify({'error': 'Invalid or expired token'}), 400
         
         # Update user as verified in RDF store
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        
-        SELECT ?user WHERE {{
-            ?user eco:email "{email}" .
-        }}
-        """
-        
-        results = manager.execute_query(query)
+        record = users.find(email)
         
-        if not results:
+        if not record:
             return jsonify({'error': 'User not found'}), 404
         
-        user_uri = results[0]['user']['value']
-        
         # Add verified property
-        update_query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        INSERT DATA {{
-            <{user_uri}> eco:emailVerified true .
-            <{user_uri}> eco:verifiedAt "{datetime.datetime.utcnow().isoformat()}"^^<http://www.w3.org/2001/XMLSchema#dateTime> .
-        }}
-        """
-        
-        manager.execute_update(update_query)
-        
-        # Get user name for welcome email
-        name_query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?nom WHERE {{
-            <{user_uri}> eco:nom ?nom .
-        }}
-        """
-        
-        name_results = manager.execute_query(name_query)
-        user_name = name_results[0]['nom']['value'] if name_results else "User"
+        result = manager.execute_prepared(MARK_EMAIL_VERIFIED, {
+            'user': record.uri,
+            'verified_at': datetime.datetime.utcnow()
+        })
+        if result.get('error'):
+            return jsonify({'error': result['error']}), 500
+        users.update(email, verified=True)
+        
+        # User name for welcome email
+        user_name = record.nom or "User"
         
         # Send welcome email
         send_welcome_email(email, user_name)
@@ -327,20 +333,12 @@ def resend_verification():
             return jsonify({'error': 'Email is required'}), 400
         
         # Check if user exists
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?user ?nom WHERE {{
-            ?user eco:email "{email}" .
-            ?user eco:nom ?nom .
-        }}
-        """
-        
-        results = manager.execute_query(query)
+        record = users.find(email)
         
-        if not results:
+        if not record or not record.nom:
             return jsonify({'error': 'User not found'}), 404
         
-        user_name = results[0]['nom']['value']
+        user_name = record.nom
         
         # Send verification email
         send_verification_email(email, user_name)
@@ -365,23 +363,15 @@ def forgot_password():
             return jsonify({'error': 'Email is required'}), 400
         
         # Check if user exists
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?user ?nom WHERE {{
-            ?user eco:email "{email}" .
-            ?user eco:nom ?nom .
-        }}
-        """
+        record = users.find(email)
         
-        results = manager.execute_query(query)
-        
-        if not results:
+        if not record or not record.nom:
             # Don't reveal if email exists or not for security
             return jsonify({
                 'message': 'If the email exists, a password reset link has been sent'
             }), 200
         
-        user_name = results[0]['nom']['value']
+        user_name = record.nom
         
         # Send password reset email
         send_password_reset_email(email, user_name)
@@ -408,44 +398,24 @@ def change_password():
         current_password = data['currentPassword']
         new_password = data['newPassword']
         
-        # Find user
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        SELECT ?user ?password WHERE {{
-            ?user eco:email "{email}" .
-            ?user eco:password ?password .
-        }}
-        """
-        results = manager.execute_query(query)
-        
-        if not results:
-            return jsonify({'error': 'User not found'}), 404
+        # Find user (in the store, as for login)
+        record = users.refresh(email)
         
-        user_uri = results[0]['user']['value']
-        stored_password = results[0]['password']['value']
+        if not record:
+            return jsonify({'error': 'User not found'}), 404
         
         # Verify current password
-        hashed_current = hash_password(current_password)
-        if hashed_current != stored_password:
+        if hash_password(current_password) != record.password:
             return jsonify({'error': 'Current password is incorrect'}), 401
         
         # Hash new password
         hashed_new_password = hash_password(new_password)
         
         # Update password
-        update_query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        DELETE {{
-            <{user_uri}> eco:password ?oldPassword .
-        }}
-        INSERT {{
-            <{user_uri}> eco:password "{hashed_new_password}" .
-        }}
-        WHERE {{
-            <{user_uri}> eco:password ?oldPassword .
-        }}
-        """
-        manager.execute_update(update_query)
+        result = manager.execute_prepared(SET_PASSWORD, {'user': record.uri, 'password': hashed_new_password})
+        if result.get('error'):
+            return jsonify({'error': result['error']}), 500
+        users.update(email, password=hashed_new_password)
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
@@ -476,38 +446,20 @@ def reset_password():
         hashed_password = hash_password(new_password)
         
         # Update password in RDF store
-        query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
+        record = users.find(email)
         
-        SELECT ?user WHERE {{
-            ?user eco:email "{email}" .
-        }}
-        """
-        
-        results = manager.execute_query(query)
-        
-        if not results:
+        if not record:
             return jsonify({'error': 'User not found'}), 404
         
-        user_uri = results[0]['user']['value']
-        
         # Delete old password and insert new one
-        update_query = f"""
-        PREFIX eco: <http://example.org/eco-tourism#>
-        
-        DELETE {{
-            <{user_uri}> eco:password ?oldPassword .
-        }}
-        INSERT {{
-            <{user_uri}> eco:password "{hashed_password}" .
-            <{user_uri}> eco:passwordResetAt "{datetime.datetime.utcnow().isoformat()}"^^<http://www.w3.org/2001/XMLSchema#dateTime> .
-        }}
-        WHERE {{
-            <{user_uri}> eco:password ?oldPassword .
-        }}
-        """
-        
-        manager.execute_update(update_query)
+        result = manager.execute_prepared(RESET_PASSWORD, {
+            'user': record.uri,
+            'password': hashed_password,
+            'reset_at': datetime.datetime.utcnow()
+        })
+        if result.get('error'):
+            return jsonify({'error': result['error']}), 500
+        users.update(email, password=hashed_password)
         
         return jsonify({
             'message': 'Password reset successfully'
@@ -0,0 +1,76 @@
+"""
+Benchmark the Fuseki (HTTP) and rdflib (in-process) SPARQL backends side by side.
+The result cache is disabled so every call reaches the backend.
+
+    python benchmark_backends.py            # both backends (Fuseki skipped if unreachable)
+    python benchmark_backends.py --runs 200 --backend rdflib
+"""
+import argparse
+import statistics
+import time
+
+from config import NAMESPACE
+from Mangage import SPARQLManager
+from Mangage.backend import create_backend
+from Mangage.query_cache import QueryCache
+
+
+def operations(manager):
+    """Representative calls made by the API routes"""
+    probe = f"{NAMESPACE}Benchmark_probe"
+    return [
+        ("get_all Transport (triples)", lambda: manager.get_all('Transport')),
+        ("get_all Transport (projected)", lambda: manager.get_all('Transport', projected=True)),
+        ("get_all Touriste (page of 20)", lambda: manager.get_all('Touriste', limit=20)),
+        ("search_by_name", lambda: manager.search_by_name('a')),
+        ("ASK", lambda: manager.execute_ask(f"ASK {{ ?s a <{NAMESPACE}Transport> }}")),
+        ("update + delete", lambda: (
+            manager.update_property(probe, 'nom', 'probe'),
+            manager.delete(probe, incoming=False, count=False)
+        )),
+    ]
+
+
+def run(name, runs):
+    try:
+        backend = create_backend(name)
+        backend.query_json("ASK { ?s ?p ?o }")
+    except Exception as e:
+        print(f"[SKIP] {name}: {e}")
+        return {}
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=False))
+    timings = {}
+    for label, call in operations(manager):
+        call()  # warm-up
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        timings[label] = (statistics.median(samples), samples[int(len(samples) * 0.95) - 1])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SPARQL backend latency")
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--backend', action='append', choices=['fuseki', 'rdflib'],
+                        help="Backend to benchmark (repeatable; default: both)")
+    args = parser.parse_args()
+
+    results = {name: run(name, args.runs) for name in args.backend or ['fuseki', 'rdflib']}
+    labels = [label for label, _ in operations(None)]
+    names = [name for name, timings in results.items() if timings]
+
+    print(f"\n{'operation':32}" + ''.join(f"{name + ' p50/p95 ms':>26}" for name in names))
+    for label in labels:
+        row = f"{label:32}"
+        for name in names:
+            p50, p95 = results[name][label]
+            row += f"{p50:>16.2f} / {p95:<7.2f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure the cost of materializing model instances, as the list endpoints do:
+memory per entity, construction time and to_dict() time. The slotted models are
+compared with an equivalent __dict__-based class (how models were stored before).
+"priced" is the /transport path: build every instance, then call get_price_per_km().
+
+    python benchmark_models.py
+    python benchmark_models.py --count 100000 --runs 5
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from config import NAMESPACE
+from models import Transport
+
+
+class DictModel:
+    """BaseModel as it was before __slots__: kwargs stored with setattr, to_dict filters __dict__"""
+    _id_counter = {}
+
+    def __init__(self, id=None, uri=None, **kwargs):
+        self.id = id if isinstance(id, int) else self._generate_id()
+        self.uri = uri if uri else f"{NAMESPACE}{type(self).__name__}_{self.id}"
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def _generate_id(self):
+        counter = DictModel._id_counter
+        counter[type(self).__name__] = counter.get(type(self).__name__, 0) + 1
+        return counter[type(self).__name__]
+
+    def to_dict(self):
+        return {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+
+
+class DictTransport(DictModel):
+    """Transport as it was before __slots__"""
+
+    def __init__(self, uri=None, nom=None, type_=None, emission_co2_per_km=None, a_empreinte=None, **kwargs):
+        super().__init__(uri=uri, **kwargs)
+        self.nom = nom
+        self.type = type_
+        self.emission_co2_per_km = emission_co2_per_km
+        self.a_empreinte = a_empreinte
+
+    get_price_per_km = Transport.get_price_per_km
+
+
+def documents(count):
+    """Bound rows as RowBinder returns them for /transport"""
+    types = ('Bus', 'Train', 'Velo', 'Voiture', 'Metro')
+    return [{
+        'uri': f"{NAMESPACE}Transport_{i}",
+        'id': i,
+        'nom': f"Transport {i}",
+        'type': types[i % len(types)],
+        'emission_co2_per_km': float(i % 200),
+        'empreinte': None,
+    } for i in range(count)]
+
+
+def build_dict(docs):
+    return [DictTransport(id=d['id'], uri=d['uri'], nom=d['nom'], type_=d['type'],
+                          emission_co2_per_km=d['emission_co2_per_km']) for d in docs]
+
+
+def build_init(docs):
+    return [Transport(id=d['id'], uri=d['uri'], nom=d['nom'], type_=d['type'],
+                      emission_co2_per_km=d['emission_co2_per_km']) for d in docs]
+
+
+def build_bulk(docs):
+    return Transport.from_documents(docs)
+
+
+def memory_per_entity(build, docs):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = build(docs)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del instances
+    return used / len(docs)
+
+
+def median_ms(call, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model materialization")
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    docs = documents(args.count)
+    print(f"{args.count} transports\n")
+    print(f"{'variant':34}{'bytes/entity':>14}{'build ms':>10}{'to_dict ms':>12}{'priced ms':>12}")
+    for label, build in (("__dict__ + __init__ (before)", build_dict),
+                         ("__slots__ + __init__", build_init),
+                         ("__slots__ + from_documents", build_bulk)):
+        instances = build(docs)
+        print(f"{label:34}{memory_per_entity(build, docs):>14.0f}"
+              f"{median_ms(lambda: build(docs), args.runs):>10.2f}"
+              f"{median_ms(lambda: [t.to_dict() for t in instances], args.runs):>12.2f}"
+              f"{median_ms(lambda: [t.get_price_per_km() for t in build(docs)], args.runs):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Compare the SPARQL JSON and TSV result formats on the tabular API queries:
+bytes on the wire and the time to decode them into rows of plain values.
+
+    python benchmark_result_formats.py                    # SPARQL_BACKEND store
+    python benchmark_result_formats.py --backend rdflib --runs 200
+    python benchmark_result_formats.py --synthetic 20000  # generated result, no store needed
+"""
+import argparse
+import json
+import statistics
+import time
+
+from config import NAMESPACE, SPARQL_BACKEND
+from Mangage.backend import create_backend
+from Mangage.sparql_manager import projected_select
+from Mangage.tsv import parse_tsv, format_term
+
+QUERIES = {
+    'users': f"""
+        PREFIX eco: <{NAMESPACE}>
+        SELECT ?user ?nom ?email ?age ?nationalite ?type WHERE {{
+            ?user a ?type .
+            FILTER (?type = eco:Touriste || ?type = eco:Guide)
+            OPTIONAL {{ ?user eco:nom ?nom . }}
+            OPTIONAL {{ ?user eco:email ?email . }}
+            OPTIONAL {{ ?user eco:age ?age . }}
+            OPTIONAL {{ ?user eco:nationalite ?nationalite . }}
+        }}""",
+    'transport': f"""
+        PREFIX eco: <{NAMESPACE}>
+        SELECT ?transport ?nom ?type ?emission ?empreinteURI ?valeurCO2kg WHERE {{
+            ?transport a eco:Transport .
+            OPTIONAL {{ ?transport eco:nom ?nom . }}
+            OPTIONAL {{ ?transport eco:type ?type . }}
+            OPTIONAL {{ ?transport eco:emissionCO2PerKm ?emission . }}
+            OPTIONAL {{
+                ?transport eco:aEmpreinte ?empreinteURI .
+                ?empreinteURI eco:valeurCO2kg ?valeurCO2kg .
+            }}
+        }}""",
+    'hebergements (projected)': projected_select('Hebergement'),
+}
+
+
+def decode_json(payload):
+    """SPARQL JSON to rows of plain (untyped) values, the way the routes unwrapped it"""
+    document = json.loads(payload)
+    names = document['head']['vars']
+    return [{name: binding[name]['value'] if name in binding else None for name in names}
+            for binding in document['results']['bindings']]
+
+
+def decode_tsv(payload):
+    names, rows = parse_tsv(payload.decode('utf-8'))
+    return [dict(zip(names, row)) for row in rows]
+
+
+def payloads(backend, query):
+    """The same result serialized as SPARQL JSON and as TSV (bytes as sent on the wire)"""
+    if hasattr(backend, 'query'):
+        json_payload = backend.query(query).content
+        tsv_payload = backend.query(query, accept='text/tab-separated-values').content
+    else:
+        json_payload = json.dumps(backend.query_json(query)).encode('utf-8')
+        tsv_payload = backend.query_tsv(query).encode('utf-8')
+    return json_payload, tsv_payload
+
+
+def synthetic_payloads(rows):
+    """A users-like result of `rows` rows, for measuring decode cost without a store"""
+    names = ['user', 'nom', 'email', 'age', 'nationalite', 'type']
+    bindings = []
+    for i in range(rows):
+        bindings.append({
+            'user': {'type': 'uri', 'value': f"{NAMESPACE}Touriste_{i}"},
+            'nom': {'type': 'literal', 'value': f"Touriste {i}"},
+            'email': {'type': 'literal', 'value': f"touriste{i}@example.com"},
+            'age': {'type': 'literal', 'datatype': 'http://www.w3.org/2001/XMLSchema#integer', 'value': str(20 + i % 50)},
+            'nationalite': {'type': 'literal', 'value': 'TN'},
+            'type': {'type': 'uri', 'value': f"{NAMESPACE}Touriste"},
+        })
+    json_payload = json.dumps({'head': {'vars': names}, 'results': {'bindings': bindings}}).encode('utf-8')
+    lines = ['\t'.join(f"?{name}" for name in names)]
+    for binding in bindings:
+        lines.append('\t'.join(format_term(cell['type'], cell['value'], cell.get('datatype')) for cell in binding.values()))
+    return json_payload, ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def median_ms(decode, payload, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode(payload)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SPARQL JSON and TSV result formats")
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--backend', choices=['fuseki', 'rdflib'], default=SPARQL_BACKEND)
+    parser.add_argument('--synthetic', type=int, metavar='ROWS',
+                        help="Benchmark a generated result of ROWS rows instead of querying a store")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        cases = {f"synthetic ({args.synthetic} rows)": synthetic_payloads(args.synthetic)}
+    else:
+        backend = create_backend(args.backend)
+        cases = {label: payloads(backend, query) for label, query in QUERIES.items()}
+
+    print(f"{'query':28}{'rows':>7}{'json bytes':>12}{'tsv bytes':>11}{'saved':>8}"
+          f"{'json ms':>10}{'tsv ms':>9}{'speedup':>9}")
+    for label, (json_payload, tsv_payload) in cases.items():
+        rows = len(decode_tsv(tsv_payload))
+        json_ms = median_ms(decode_json, json_payload, args.runs)
+        tsv_ms = median_ms(decode_tsv, tsv_payload, args.runs)
+        saved = 1 - len(tsv_payload) / len(json_payload) if json_payload else 0
+        print(f"{label:28}{rows:>7}{len(json_payload):>12}{len(tsv_payload):>11}{saved:>8.0%}"
+              f"{json_ms:>10.3f}{tsv_ms:>9.3f}{json_ms / tsv_ms if tsv_ms else 0:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,13 +10,84 @@ FUSEKI_DATA_ENDPOINT = f"{FUSEKI_URL}/data"
 FUSEKI_USER = os.getenv('FUSEKI_USER', 'admin')
 FUSEKI_PASSWORD = os.getenv('FUSEKI_PASSWORD', 'admin')
 
+# SPARQL backend: 'fuseki' (HTTP) or 'rdflib' (in-process graph, no Fuseki needed)
+SPARQL_BACKEND = os.getenv('SPARQL_BACKEND', 'fuseki').lower()
+# rdflib backend: ontology loaded at startup and optional N-Triples snapshot (loaded, then saved at exit)
+RDFLIB_ONTOLOGY = os.getenv('RDFLIB_ONTOLOGY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'untitled-ontology-13'))
+RDFLIB_SNAPSHOT = os.getenv('RDFLIB_SNAPSHOT', '')
+
+# Fuseki HTTP connection pool (shared by every SPARQLManager)
+FUSEKI_POOL_CONNECTIONS = int(os.getenv('FUSEKI_POOL_CONNECTIONS', 4))
+FUSEKI_POOL_MAXSIZE = int(os.getenv('FUSEKI_POOL_MAXSIZE', 16))
+FUSEKI_CONNECT_TIMEOUT = float(os.getenv('FUSEKI_CONNECT_TIMEOUT', 3.05))
+FUSEKI_READ_TIMEOUT = float(os.getenv('FUSEKI_READ_TIMEOUT', 30))
+
+# SELECT/ASK result cache, off by default. Writes invalidate it in the writing
+# process only: with several workers, others may serve results up to
+# QUERY_CACHE_TTL seconds old
+QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 512))
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', 60))
+
+# Entities per Graph Store upload of the bulk ingest (POST /bulk/<Class>)
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))
+# Largest NDJSON body the bulk ingest accepts, and rejected records it reports in detail
+BULK_MAX_CONTENT_LENGTH = int(os.getenv('BULK_MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+BULK_MAX_REJECTED = int(os.getenv('BULK_MAX_REJECTED', 1000))
+# Entities per page read by the NDJSON export (GET /export, export_dataset.py)
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', 500))
+
+# Application logging: level (DEBUG, INFO, WARNING...) and format ('json' or 'text')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+
+# Slow-query log: SPARQL requests slower than SLOW_QUERY_MS (0 disables) are logged
+# with their label (the template name for prepared queries) to the 'sparql.slow'
+# logger, and to SLOW_QUERY_LOG_FILE if set. The query text is logged with its
+# string literals redacted, cut at SLOW_QUERY_MAX_CHARS characters (0: no limit)
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 500))
+SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', '')
+SLOW_QUERY_MAX_CHARS = int(os.getenv('SLOW_QUERY_MAX_CHARS', 1000))
+
 NAMESPACE = "http://example.org/eco-tourism#"
 
+# Numeric entity ids: 'store' (counter nodes in the triplestore, safe across hosts),
+# 'file' (ID_COUNTER_FILE under a file lock, safe across processes of one host)
+# or 'memory' (per process, restarts at 1). Ids are leased ID_BLOCK_SIZE at a time.
+ID_ALLOCATOR = os.getenv('ID_ALLOCATOR', 'store').lower()
+ID_BLOCK_SIZE = int(os.getenv('ID_BLOCK_SIZE', 100))
+ID_COUNTER_FILE = os.getenv('ID_COUNTER_FILE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'id_counters.json')
+
+# Cursor pagination of collection endpoints (?limit=&cursor=)
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+
 # AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 AISALHI_API_KEY = os.getenv('AISALHI_API_KEY')
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
+# Seconds during which the auth email index is trusted for unknown emails
+# (duplicate checks without a query); after that a miss reloads it
+AUTH_USER_INDEX_TTL = float(os.getenv('AUTH_USER_INDEX_TTL', 60))
+
+# Reservation admission: seconds before a slot's in-memory ledger is reloaded from
+# the store (bookings made by other workers), and how many slot ledgers are kept
+RESERVATION_LEDGER_TTL = float(os.getenv('RESERVATION_LEDGER_TTL', 30))
+RESERVATION_LEDGER_MAX_SLOTS = int(os.getenv('RESERVATION_LEDGER_MAX_SLOTS', 10000))
+# Length of a meal in minutes: a tourist's reservations conflict when their meals overlap
+RESERVATION_MEAL_DURATION = int(os.getenv('RESERVATION_MEAL_DURATION', 90))
+# Tourist reservation timelines kept in memory
+RESERVATION_TIMELINE_MAX_TOURISTS = int(os.getenv('RESERVATION_TIMELINE_MAX_TOURISTS', 10000))
+# Background cancellation of stale pending reservations (started by the app entrypoint):
+# run every N seconds (0 disables), also cancel those still pending N hours after creation
+# (0, the default: only those whose time has passed), reservations per update
+RESERVATION_EXPIRY_INTERVAL = float(os.getenv('RESERVATION_EXPIRY_INTERVAL', 300))
+RESERVATION_PENDING_TIMEOUT = float(os.getenv('RESERVATION_PENDING_TIMEOUT', 0))
+RESERVATION_EXPIRY_BATCH = int(os.getenv('RESERVATION_EXPIRY_BATCH', 500))
+
+# Largest transports x distances matrix priced by POST /transport/price-matrix
+PRICE_MATRIX_MAX_CELLS = int(os.getenv('PRICE_MATRIX_MAX_CELLS', 100000))
+
 # Transport Pricing Configuration (Realistic pricing model)
 TRANSPORT_PRICING = {
     # Base price (€) - fixed cost per trip
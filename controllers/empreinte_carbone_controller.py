@@ -1,9 +1,22 @@
+import logging
+
 from flask import jsonify, request
 from models.empreinte_carbone import EmpreinteCarbone
 from Mangage.sparql_manager import SPARQLManager
+from Mangage.binder import RowBinder
 from config import NAMESPACE
 from utils.file_upload import save_uploaded_file, delete_file, get_file_url
 
+logger = logging.getLogger(__name__)
+
+EMPREINTE_ROWS = RowBinder(EmpreinteCarbone)
+
+def with_id(empreinte):
+    """Fall back to the numeric suffix of the URI when the entity has no eco:id"""
+    if 'id' not in empreinte and 'EmpreinteCarbone_' in empreinte['uri']:
+        empreinte['id'] = empreinte['uri'].split('EmpreinteCarbone_')[1]
+    return empreinte
+
 class EmpreinteCarboneController:
     def __init__(self):
         
@@ -61,51 +74,23 @@ class EmpreinteCarboneController:
             
             return jsonify(empreinte_dict), 201
         except Exception as e:
-            print(f"Error creating empreinte carbone: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating empreinte carbone: %s", e)
             return jsonify({'error': str(e)}), 400
 
     def get_all(self):
         try:
-            results = self.manager.get_all('EmpreinteCarbone')
+            results = self.manager.get_all('EmpreinteCarbone', projected=True)
             
             if not results:
-                print("No empreinte carbone found")
+                logger.debug("No empreinte carbone found")
                 return jsonify([])
+            if isinstance(results, dict) and 'error' in results:
+                return jsonify(results), 500
             
-            resources = {}
-            for binding in results:
-                subj = binding.get('s', {}).get('value')
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                
-                if not all([subj, pred, obj]):
-                    continue
-                    
-                if subj not in resources:
-                    resources[subj] = {'uri': subj}
-                    if 'EmpreinteCarbone_' in subj:
-                        resources[subj]['id'] = subj.split('EmpreinteCarbone_')[1]
-                
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                if prop_name == 'valeur_co2_kg':
-                    try:
-                        resources[subj][prop_name] = float(obj)
-                    except ValueError:
-                        resources[subj][prop_name] = obj
-                elif prop_name in ['name', 'description', 'image']:
-                    resources[subj][prop_name] = obj
-                elif prop_name != 'type' or 'EmpreinteCarbone' not in obj:
-                    resources[subj][prop_name] = obj
-            
-            empreintes = list(resources.values())
+            empreintes = [with_id(EMPREINTE_ROWS.document(row)) for row in results]
             return jsonify(empreintes)
         except Exception as e:
-            print(f"Error in get_all: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get_all: %s", e)
             return jsonify({'error': str(e)}), 500
 
     def get(self, uri):
@@ -115,28 +100,11 @@ class EmpreinteCarboneController:
             if not results or 'error' in results:
                 return jsonify({'error': 'Empreinte Carbone not found'}), 404
             
-            empreinte_data = {'uri': uri}
-            
-            if 'EmpreinteCarbone_' in uri:
-                empreinte_data['id'] = uri.split('EmpreinteCarbone_')[1]
-            
-            for binding in results:
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                if not pred or not obj:
-                    continue
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                if prop_name in ['name', 'description', 'image']:
-                    empreinte_data[prop_name] = obj
-                elif prop_name != 'type' or 'EmpreinteCarbone' not in obj:
-                    empreinte_data[prop_name] = obj
+            empreinte_data = with_id(EMPREINTE_ROWS.bind_entity(results, uri) or EMPREINTE_ROWS.new(uri))
             
             return jsonify(empreinte_data)
         except Exception as e:
-            print(f"Error in get: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get: %s", e)
             return jsonify({'error': str(e)}), 500
 
     def update(self, uri, image_file=None, form_data=None):
@@ -200,29 +168,13 @@ class EmpreinteCarboneController:
             if not updates:
                 return jsonify({'error': 'No valid fields provided for update'}), 400
 
-            for prop, value in updates:
-                result = self.manager.update_property(uri, prop, value)
-                if 'error' in result:
-                    return jsonify(result), 400
+            result = self.manager.update_properties(uri, dict(updates), is_string=True)
+            if 'error' in result:
+                return jsonify(result), 400
 
             updated_results = self.manager.get_by_uri(uri)
             
-            updated_data = {'uri': uri}
-            
-            if 'EmpreinteCarbone_' in uri:
-                updated_data['id'] = uri.split('EmpreinteCarbone_')[1]
-            
-            for binding in updated_results:
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                if not pred or not obj:
-                    continue
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                if prop_name in ['name', 'description', 'image']:
-                    updated_data[prop_name] = obj
-                elif prop_name != 'type' or 'EmpreinteCarbone' not in obj:
-                    updated_data[prop_name] = obj
+            updated_data = with_id(EMPREINTE_ROWS.bind_entity(updated_results, uri) or EMPREINTE_ROWS.new(uri))
             
             # Return image URL if exists
             if updated_data.get('image'):
@@ -232,9 +184,7 @@ class EmpreinteCarboneController:
 
         except Exception as e:
             error_msg = f'Error updating empreinte carbone: {str(e)}'
-            print(error_msg)
-            import traceback
-            traceback.print_exc()
+            logger.exception(error_msg)
             return jsonify({'error': error_msg}), 500
 
     def delete(self, uri):
@@ -246,7 +196,5 @@ class EmpreinteCarboneController:
                 return jsonify({'error': 'Failed to delete empreinte carbone'}), 400
             return jsonify({'message': 'Empreinte Carbone deleted successfully'})
         except Exception as e:
-            print(f"Error in delete: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in delete: %s", e)
             return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,8 +1,20 @@
+import logging
+
 from flask import jsonify, request
 from models.energie_renouvelable import EnergieRenouvelable
 from Mangage.sparql_manager import SPARQLManager
+from Mangage.binder import RowBinder
 
 manager = SPARQLManager()
+logger = logging.getLogger(__name__)
+
+ENERGIE_ROWS = RowBinder(EnergieRenouvelable)
+
+def with_id(energie):
+    """Fall back to the suffix of the URI when the entity has no eco:id"""
+    if 'id' not in energie and 'EnergieRenouvelable_' in energie['uri']:
+        energie['id'] = energie['uri'].split('EnergieRenouvelable_')[1]
+    return energie
 
 class EnergieRenouvelableController:
     def __init__(self):
@@ -28,96 +40,50 @@ class EnergieRenouvelableController:
             
             return jsonify(energie_dict), 201
         except Exception as e:
-            print(f"Error creating energie: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating energie: %s", e)
             return jsonify({'error': str(e)}), 400
 
     def get_all(self):
         try:
-            results = self.manager.get_all('EnergieRenouvelable')
+            results = self.manager.get_all('EnergieRenouvelable', projected=True)
             
             # If no results, return empty array
             if not results:
-                print("No energies found")
+                logger.debug("No energies found")
                 return jsonify([])
+            if isinstance(results, dict) and 'error' in results:
+                return jsonify(results), 500
             
-            print(f"Raw results from SPARQL: {results}")
-                
-            # Group triples by subject
-            resources = {}
-            for binding in results:
-                subj = binding.get('s', {}).get('value')
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                
-                if not all([subj, pred, obj]):
-                    continue
-                    
-                if subj not in resources:
-                    resources[subj] = {'uri': subj}
-                    # Extract ID from URI
-                    if 'EnergieRenouvelable_' in subj:
-                        resources[subj]['id'] = subj.split('EnergieRenouvelable_')[1]
-                
-                # Extract property name from the predicate URI
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                # Skip the 'type' predicate (rdf:type)
-                if prop_name != 'type' or 'EnergieRenouvelable' not in obj:
-                    resources[subj][prop_name] = obj
-            
-            # Convert to list of dictionaries
-            energies = list(resources.values())
-            print(f"Processed energies: {energies}")
+            # One row per energie, one column per property
+            energies = [with_id(ENERGIE_ROWS.document(row)) for row in results]
+            logger.debug("get_all: %d energies", len(energies))
             return jsonify(energies)
         except Exception as e:
-            print(f"Error in get_all: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get_all: %s", e)
             return jsonify({'error': str(e)}), 500
 
     def get(self, uri):
         try:
-            print(f"Getting energie with URI: {uri}")
+            logger.debug("Getting energie %s", uri)
             results = self.manager.get_by_uri(uri)
             
             if not results or 'error' in results:
-                print(f"Energy source not found for URI: {uri}")
+                logger.info("Energy source not found: %s", uri)
                 return jsonify({'error': 'Energy source not found'}), 404
             
             # Convert SPARQL results to a dictionary
-            energy_data = {'uri': uri}
-            
-            # Extract ID from URI
-            if 'EnergieRenouvelable_' in uri:
-                energy_data['id'] = uri.split('EnergieRenouvelable_')[1]
-            
-            for binding in results:
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                if not pred or not obj:
-                    continue
-                # Extract property name from the predicate URI
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                # Skip the 'type' predicate
-                if prop_name != 'type' or 'EnergieRenouvelable' not in obj:
-                    energy_data[prop_name] = obj
+            energy_data = with_id(ENERGIE_ROWS.bind_entity(results, uri) or ENERGIE_ROWS.new(uri))
             
-            print(f"Retrieved energy data: {energy_data}")
+            logger.debug("Retrieved energie %s", uri, extra={'energie': energy_data})
             return jsonify(energy_data)
         except Exception as e:
-            print(f"Error in get: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in get: %s", e)
             return jsonify({'error': str(e)}), 500
 
     def update(self, uri):
         try:
-            print(f"Updating energie with URI: {uri}")
             data = request.get_json()
-            print(f"Update data: {data}")
+            logger.debug("Updating energie %s", uri, extra={'data': data})
             
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
@@ -125,7 +91,7 @@ class EnergieRenouvelableController:
             # Get the current energy resource
             current = self.manager.get_by_uri(uri)
             if not current or 'error' in current:
-                print(f"Energy source not found for update: {uri}")
+                logger.info("Energy source not found for update: %s", uri)
                 return jsonify({'error': 'Energy source not found'}), 404
 
             # Update the properties
@@ -137,56 +103,35 @@ class EnergieRenouvelableController:
             if 'description' in data:
                 updates.append(('description', data['description']))
 
-            # Apply updates
-            for prop, value in updates:
-                print(f"Updating property {prop} to {value}")
-                result = self.manager.update_property(uri, prop, value)
-                if 'error' in result:
-                    print(f"Error updating property: {result}")
-                    return jsonify(result), 400
+            # Apply updates in a single request
+            result = self.manager.update_properties(uri, dict(updates), is_string=True)
+            if 'error' in result:
+                logger.error("Error updating energie %s: %s", uri, result['error'])
+                return jsonify(result), 400
 
             # Return the updated resource
             updated_results = self.manager.get_by_uri(uri)
             
             # Convert SPARQL results to dictionary
-            updated_data = {'uri': uri}
-            
-            # Extract ID from URI
-            if 'EnergieRenouvelable_' in uri:
-                updated_data['id'] = uri.split('EnergieRenouvelable_')[1]
-            
-            for binding in updated_results:
-                pred = binding.get('p', {}).get('value')
-                obj = binding.get('o', {}).get('value')
-                if not pred or not obj:
-                    continue
-                prop_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                
-                # Skip the 'type' predicate
-                if prop_name != 'type' or 'EnergieRenouvelable' not in obj:
-                    updated_data[prop_name] = obj
+            updated_data = with_id(ENERGIE_ROWS.bind_entity(updated_results, uri) or ENERGIE_ROWS.new(uri))
             
-            print(f"Update successful: {updated_data}")
+            logger.debug("Updated energie %s", uri)
             return jsonify(updated_data)
 
         except Exception as e:
             error_msg = f'Error updating energy source: {str(e)}'
-            print(error_msg)
-            import traceback
-            traceback.print_exc()
+            logger.exception(error_msg)
             return jsonify({'error': error_msg}), 500
 
     def delete(self, uri):
         try:
-            print(f"Deleting energie with URI: {uri}")
+            logger.debug("Deleting energie %s", uri)
             success = self.manager.delete(uri)
             if not success:
-                print(f"Failed to delete energy source: {uri}")
+                logger.error("Failed to delete energie %s", uri)
                 return jsonify({'error': 'Failed to delete energy source'}), 400
-            print(f"Successfully deleted: {uri}")
+            logger.info("Deleted energie %s", uri)
             return jsonify({'message': 'Energy source deleted successfully'})
         except Exception as e:
-            print(f"Error in delete: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in delete: %s", e)
             return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Export the knowledge base to a file without loading it into memory.
+
+    python export_dataset.py backup.nt.gz
+    python export_dataset.py entities.ndjson.gz --format ndjson --class Transport --class Restaurant
+    python export_dataset.py backup.nt --no-gzip
+"""
+import argparse
+import sys
+
+from Mangage import SPARQLManager
+from Mangage.export import export_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream the Fuseki dataset to a file")
+    parser.add_argument('output', help="Output file ('-' for stdout)")
+    parser.add_argument('--format', choices=['ntriples', 'ndjson'], default='ntriples')
+    parser.add_argument('--class', dest='classes', action='append',
+                        help="Class to export (ndjson only, repeatable; default: every model)")
+    parser.add_argument('--no-gzip', action='store_true', help="Write uncompressed output")
+    parser.add_argument('--private', action='store_true',
+                        help="Keep private properties such as password hashes (ntriples only, for backups)")
+    args = parser.parse_args()
+
+    manager = SPARQLManager()
+    chunks = export_dataset(manager, args.format, args.classes, compress=not args.no_gzip, private=args.private)
+
+    out = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    written = 0
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"[OK] {written} bytes written to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
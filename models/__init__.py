@@ -25,3 +25,13 @@ from .festival import Festival
 from .foire import Foire
 from .reservation_restaurant import ReservationRestaurant
 
+
+# Model classes by RDF class name (local name in NAMESPACE)
+MODELS = {
+    cls.__name__: cls for cls in (
+        User, Touriste, Guide, Destination, Ville, Region, Hebergement, Hotel, MaisonHote,
+        Activite, Randonnee, Transport, EcoTransport, TransportNonMotorise, Restaurant,
+        RestaurantEco, ProduitLocal, ProduitLocalBio, CertificationEco, EmpreinteCarbone,
+        EnergieRenouvelable, ZoneNaturelle, Evenement, Festival, Foire, ReservationRestaurant
+    )
+}
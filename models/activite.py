@@ -1,29 +1,20 @@
-from models.base_model import BaseModel
-from config import NAMESPACE
+from models.base_model import BaseModel, Property
 
 class Activite(BaseModel):
+    __slots__ = ('nom', 'difficulte', 'duree_heures', 'prix', 'est_dans_zone')
+    properties = BaseModel.properties + (
+        Property('nom', 'nom'),
+        Property('difficulte', 'difficulte'),
+        Property('duree_heures', 'dureeHeures', 'double'),
+        Property('prix', 'prix', 'double'),
+        Property('est_dans_zone', 'estDansZone', 'uri'),
+    )
+    
     def __init__(self, uri=None, nom=None, difficulte=None, duree_heures=None, 
                  prix=None, est_dans_zone=None, **kwargs):
-        super().__init__(uri, **kwargs)
+        super().__init__(uri=uri, **kwargs)
         self.nom = nom
         self.difficulte = difficulte
         self.duree_heures = duree_heures
         self.prix = prix
         self.est_dans_zone = est_dans_zone
-    
-    def to_sparql_insert(self):
-        triples = f"<{self.uri}> a <{NAMESPACE}Activite> .\n"
-        if self.id is not None:
-            triples += f'<{self.uri}> <{NAMESPACE}id> "{self.id}"^^xsd:integer .\n'
-        if self.nom:
-            triples += f'<{self.uri}> <{NAMESPACE}nom> "{self.nom}"^^xsd:string .\n'
-        if self.difficulte:
-            triples += f'<{self.uri}> <{NAMESPACE}difficulte> "{self.difficulte}"^^xsd:string .\n'
-        if self.duree_heures is not None:
-            triples += f'<{self.uri}> <{NAMESPACE}dureeHeures> "{self.duree_heures}"^^xsd:double .\n'
-        if self.prix is not None:
-            triples += f'<{self.uri}> <{NAMESPACE}prix> "{self.prix}"^^xsd:double .\n'
-        if self.est_dans_zone:
-            triples += f'<{self.uri}> <{NAMESPACE}estDansZone> <{self.est_dans_zone}> .\n'
-        return triples
-
@@ -1,31 +1,111 @@
 from config import NAMESPACE
+from Mangage.triples import TripleWriter, terms
+from Mangage.templates import iri
+from Mangage.ids import next_id
+from collections import namedtuple
+from operator import attrgetter
 import uuid
 
+# RDF property of a model: Python attribute, predicate local name in NAMESPACE,
+# xsd datatype (or 'uri' for links to other entities) and whether it is multi-valued
+Property = namedtuple('Property', ['attr', 'predicate', 'datatype', 'multi'], defaults=('string', False))
+
+def _compile_builder(fields):
+    """Bulk constructor assigning `fields` from each document, generated once per class (as namedtuple does)"""
+    lines = [
+        "def build(cls, documents):",
+        "    new = object.__new__",
+        "    instances = []",
+        "    for document in documents:",
+        "        instance = new(cls)",
+        "        get = document.get",
+    ]
+    lines += [f"        instance.{name} = get({name!r})" for name in fields]
+    lines += ["        instances.append(instance)", "    return instances"]
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    return namespace['build']
+
 class BaseModel:
-    _id_counter = {}
+    # Every model declares the attributes it adds in __slots__, so instances
+    # carry no per-instance __dict__; `fields` lists them all, base class first
+    # (slots starting with '_' are internal state, not fields)
+    __slots__ = ('id', 'uri')
+    fields = ('id', 'uri')
+    properties = (
+        Property('id', 'id', 'integer'),
+    )
+    # Predicates linking to child entities that are deleted along with this one
+    owns = ()
+    # Predicates never included in dataset exports (e.g. password hashes)
+    private = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name not in fields and not name.startswith('_'):
+                    fields.append(name)
+        cls.fields = tuple(fields)
+        cls._get_fields = attrgetter(*cls.fields)
+        cls._build = staticmethod(_compile_builder(cls.fields))
     
     def __init__(self, id=None, uri=None, **kwargs):
-        # Generate ID first (always an integer)
-        self.id = id if isinstance(id, int) else self._generate_id()
-        # Generate URI - if uri is provided, use it directly
-        self.uri = uri if uri else self.generate_uri()
+        # The id (and the URI derived from it) is allocated by assign_id, when
+        # the entity is stored, so constructing a model never queries the store
+        self.id = id if isinstance(id, int) else None
+        self.uri = uri if uri else None
         # Set other attributes
         for key, value in kwargs.items():
+            if key not in self.fields:
+                raise TypeError(f"{type(self).__name__} has no field {key!r}")
             setattr(self, key, value)
     
+    @classmethod
+    def from_documents(cls, documents):
+        """
+        Instances built from documents bound by Mangage.binder.RowBinder (key='attr'),
+        without going through __init__: missing fields are None and no id is generated.
+        """
+        return cls._build(cls, documents)
+    
+    def assign_id(self):
+        """Allocate the id if missing, and the URI from it if missing; returns self"""
+        if self.id is None:
+            self.id = self._generate_id()
+        if not self.uri:
+            self.uri = self.generate_uri()
+        return self
+    
     def _generate_id(self):
-        class_name = self.__class__.__name__
-        if class_name not in BaseModel._id_counter:
-            BaseModel._id_counter[class_name] = 0
-        BaseModel._id_counter[class_name] += 1
-        return BaseModel._id_counter[class_name]
+        # Durable and unique across workers (see Mangage.ids)
+        return next_id(self.__class__.__name__)
     
     def generate_uri(self):
         return f"{NAMESPACE}{self.__class__.__name__}_{self.id}"
     
+    def validate(self):
+        """Raise ValueError if the URI or a property value cannot be written as RDF (allocates no id)"""
+        if self.uri:
+            iri(self.uri)
+        for prop in self.properties:
+            terms(getattr(self, prop.attr), prop.datatype)
+        return self
+    
+    def write_triples(self, writer):
+        """Add this entity's rdf:type and property triples to a Mangage.triples.TripleWriter"""
+        writer.type(self.uri, f"{NAMESPACE}{type(self).__name__}")
+        for prop in self.properties:
+            writer.value(self.uri, NAMESPACE + prop.predicate, getattr(self, prop.attr), prop.datatype)
+    
     def to_sparql_insert(self):
-        raise NotImplementedError
+        """Triples of this entity as INSERT DATA content (N-Triples), allocating its id first"""
+        return TripleWriter().model(self.assign_id()).text()
     
     def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if not k.startswith('_')}
+        return dict(zip(self.fields, self._get_fields(self)))
+
 
+BaseModel._get_fields = attrgetter(*BaseModel.fields)
+BaseModel._build = staticmethod(_compile_builder(BaseModel.fields))
@@ -1,20 +1,15 @@
-from models.base_model import BaseModel
-from config import NAMESPACE
+from models.base_model import BaseModel, Property
 
 class CertificationEco(BaseModel):
+    __slots__ = ('label_nom', 'organisme', 'annee_obtention')
+    properties = BaseModel.properties + (
+        Property('label_nom', 'labelNom'),
+        Property('organisme', 'organisme'),
+        Property('annee_obtention', 'anneeObtention', 'date'),
+    )
+    
     def __init__(self, uri=None, label_nom=None, organisme=None, annee_obtention=None, **kwargs):
-        super().__init__(uri, **kwargs)
+        super().__init__(uri=uri, **kwargs)
         self.label_nom = label_nom
         self.organisme = organisme
         self.annee_obtention = annee_obtention
-    
-    def to_sparql_insert(self):
-        triples = f"<{self.uri}> a <{NAMESPACE}CertificationEco> .\n"
-        triples += f'<{self.uri}> <{NAMESPACE}id> {self.id} .\n'
-        if self.label_nom:
-            triples += f'<{self.uri}> <{NAMESPACE}labelNom> "{self.label_nom}"^^xsd:string .\n'
-        if self.organisme:
-            triples += f'<{self.uri}> <{NAMESPACE}organisme> "{self.organisme}"^^xsd:string .\n'
-        if self.annee_obtention:
-            triples += f'<{self.uri}> <{NAMESPACE}anneeObtention> "{self.annee_obtention}"^^xsd:date .\n'
-        return triples
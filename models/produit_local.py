@@ -1,21 +1,15 @@
-from models.base_model import BaseModel
-from config import NAMESPACE
+from models.base_model import BaseModel, Property
 
 class ProduitLocal(BaseModel):
+    __slots__ = ('nom', 'saison', 'bio')
+    properties = BaseModel.properties + (
+        Property('nom', 'nom'),
+        Property('saison', 'saison'),
+        Property('bio', 'bio', 'boolean'),
+    )
+    
     def __init__(self, id=None, uri=None, nom=None, saison=None, bio=None, **kwargs):
         super().__init__(id=id, uri=uri, **kwargs)
         self.nom = nom
         self.saison = saison
         self.bio = bio
-    
-    def to_sparql_insert(self):
-        triples = f"<{self.uri}> a <{NAMESPACE}ProduitLocal> .\n"
-        triples += f'<{self.uri}> <{NAMESPACE}id> {self.id} .\n'
-        if self.nom:
-            triples += f'<{self.uri}> <{NAMESPACE}nom> "{self.nom}"^^xsd:string .\n'
-        if self.saison:
-            triples += f'<{self.uri}> <{NAMESPACE}saison> "{self.saison}"^^xsd:string .\n'
-        if self.bio is not None:
-            bio_val = "true" if self.bio else "false"
-            triples += f'<{self.uri}> <{NAMESPACE}bio> {bio_val} .\n'
-        return triples
@@ -1,18 +1,13 @@
-from models.base_model import BaseModel
-from config import NAMESPACE
+from models.base_model import BaseModel, Property
 
 class ZoneNaturelle(BaseModel):
+    __slots__ = ('nom', 'type')
+    properties = BaseModel.properties + (
+        Property('nom', 'nom'),
+        Property('type', 'type'),
+    )
+    
     def __init__(self, uri=None, nom=None, type_=None, **kwargs):
-        super().__init__(uri, **kwargs)
+        super().__init__(uri=uri, **kwargs)
         self.nom = nom
         self.type = type_
-    
-    def to_sparql_insert(self):
-        triples = f"<{self.uri}> a <{NAMESPACE}ZoneNaturelle> .\n"
-        if self.id is not None:
-            triples += f'<{self.uri}> <{NAMESPACE}id> "{self.id}"^^xsd:integer .\n'
-        if self.nom:
-            triples += f'<{self.uri}> <{NAMESPACE}nom> "{self.nom}"^^xsd:string .\n'
-        if self.type:
-            triples += f'<{self.uri}> <{NAMESPACE}type> "{self.type}"^^xsd:string .\n'
-        return triples
@@ -0,0 +1,168 @@
+"""
+Concurrency stress test of restaurant reservation admission: hundreds of
+parallel requests for the same slots must never overbook a restaurant nor give
+a tourist two reservations at the same time.
+
+Phase 1 posts to POST /reservation-restaurant through the Flask app from many
+threads. Phase 2 drives several independent ReservationAdmission instances (one
+per simulated worker process, each with its own ledgers) against one slot, so
+only the store's conditional insert keeps them consistent.
+
+    python stress_reservations.py                      # SPARQL_BACKEND from .env
+    python stress_reservations.py --backend rdflib --requests 500
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--backend', choices=['fuseki', 'rdflib'], help="SPARQL backend (default: SPARQL_BACKEND)")
+    parser.add_argument('--requests', type=int, default=300, help="reservation attempts per phase")
+    parser.add_argument('--threads', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4, help="admission instances in phase 2")
+    parser.add_argument('--capacity', type=int, default=40)
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.backend:
+    os.environ['SPARQL_BACKEND'] = args.backend
+
+from config import NAMESPACE  # noqa: E402  (after SPARQL_BACKEND is set)
+from app import app, manager  # noqa: E402
+from models import ReservationRestaurant  # noqa: E402
+from Mangage.admission import ReservationAdmission  # noqa: E402
+from Mangage.templates import SPARQLTemplate  # noqa: E402
+
+RUN = uuid.uuid4().hex[:8]
+RESTAURANT = f"{NAMESPACE}Restaurant_stress_{RUN}"
+DATE = '2030-06-15'
+
+SLOT_RESERVATIONS = SPARQLTemplate("""
+    SELECT ?reservation ?guests ?touriste
+    WHERE {
+        ?reservation a eco:ReservationRestaurant .
+        ?reservation eco:reservePour ${restaurant:iri} .
+        ?reservation eco:heureReservation ${heure} .
+        ?reservation eco:nombrePersonnes ?guests .
+        ?reservation eco:statut ?statut .
+        OPTIONAL { ?reservation eco:reservePar ?touriste . }
+        FILTER(STR(?statut) != "annulee")
+    }
+""", name='stress_slot_reservations')
+
+
+def touriste(i):
+    # A few tourists try several times, to exercise the conflict check as well
+    return f"{NAMESPACE}Touriste_stress_{RUN}_{i % (args.requests * 3 // 4)}"
+
+
+def attempt(i, heure):
+    return {
+        'touriste': touriste(i),
+        'restaurant': RESTAURANT,
+        'date_reservation': DATE,
+        'heure': heure,
+        'nombre_personnes': random.randint(1, 4),
+    }
+
+
+def post(client, data):
+    response = client.post('/reservation-restaurant', json=data)
+    return response.status_code, data
+
+
+def http_phase(heure):
+    client = app.test_client()
+    with ThreadPoolExecutor(args.threads) as pool:
+        return list(pool.map(lambda i: post(client, attempt(i, heure)), range(args.requests)))
+
+
+def worker_phase(heure):
+    workers = [ReservationAdmission(manager, ttl=3600) for _ in range(args.workers)]
+
+    def admit(i):
+        data = attempt(i, heure)
+        result = workers[i % len(workers)].admit(ReservationRestaurant(**data))
+        if result.get('error'):
+            return 500, data
+        return (201 if result['success'] else 409), data
+
+    with ThreadPoolExecutor(args.threads) as pool:
+        return list(pool.map(admit, range(args.requests)))
+
+
+def check(name, heure, results):
+    rows = manager.execute_prepared(SLOT_RESERVATIONS, {'restaurant': RESTAURANT, 'heure': heure}, use_cache=False)
+    if isinstance(rows, dict):
+        print(f"[FAIL] {name}: {rows['error']}")
+        return False
+
+    statuses = [status for status, _ in results]
+    admitted = statuses.count(201)
+    refused = statuses.count(409)
+    stored_guests = sum(int(float(row['guests']['value'])) for row in rows)
+    admitted_guests = sum(data['nombre_personnes'] for status, data in results if status == 201)
+    tourists = [row['touriste']['value'] for row in rows if 'touriste' in row]
+
+    print(f"{name}: {admitted} admitted, {refused} refused, {len(statuses) - admitted - refused} errors; "
+          f"{stored_guests}/{args.capacity} seats taken by {len(rows)} reservations")
+
+    failures = []
+    if stored_guests > args.capacity:
+        failures.append(f"overbooked: {stored_guests} guests for {args.capacity} seats")
+    if len(rows) != admitted or stored_guests != admitted_guests:
+        failures.append(f"{admitted} admitted ({admitted_guests} guests) but {len(rows)} stored ({stored_guests} guests)")
+    if len(tourists) != len(set(tourists)):
+        failures.append("a tourist has two reservations in the same slot")
+    if admitted + refused != len(statuses):
+        failures.append(f"{len(statuses) - admitted - refused} requests failed")
+    if not refused:
+        failures.append("no request was refused: raise --requests or lower --capacity")
+    for failure in failures:
+        print(f"[FAIL] {name}: {failure}")
+    if not failures:
+        print(f"[OK] {name}")
+    return not failures
+
+
+def cleanup():
+    manager.execute_update(f"""
+        DELETE WHERE {{
+            ?reservation <{NAMESPACE}reservePour> <{RESTAURANT}> .
+            ?reservation ?p ?o .
+        }}
+    """)
+    manager.execute_update(f"DELETE WHERE {{ <{RESTAURANT}> ?p ?o . }}")
+
+
+def main():
+    manager.execute_update(f"""
+        INSERT DATA {{
+            <{RESTAURANT}> a <{NAMESPACE}Restaurant> .
+            <{RESTAURANT}> <{NAMESPACE}nom> "Stress test {RUN}" .
+            <{RESTAURANT}> <{NAMESPACE}capaciteMax> {args.capacity} .
+        }}
+    """)
+    try:
+        ok = check("POST /reservation-restaurant", '19:00', http_phase('19:00'))
+        ok = check(f"{args.workers} independent workers", '20:00', worker_phase('20:00')) and ok
+
+        # A party as large as the restaurant no longer fits in the slot
+        data = dict(attempt(args.requests * 10, '19:00'), nombre_personnes=args.capacity)
+        response = app.test_client().post('/reservation-restaurant', json=data)
+        if response.status_code != 409:
+            print(f"[FAIL] full slot accepted a reservation ({response.status_code})")
+            ok = False
+    finally:
+        cleanup()
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
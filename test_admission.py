@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests of restaurant reservation admission (Mangage.admission) with several workers, on the rdflib backend"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.admission import ReservationAdmission
+from Mangage.binder import RowBinder, Field, RDF_TYPE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.timeline import TimelineIndex
+from Mangage.user_index import UserIndex
+from models import ReservationRestaurant
+
+RESTAURANT = f"{NAMESPACE}Restaurant_adm"
+DATE = '2030-06-15'
+BINDER = RowBinder(ReservationRestaurant, key='predicate', extra=(Field('type', None, RDF_TYPE),))
+
+
+def new_manager(capacity=4):
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    manager.execute_update(f'INSERT DATA {{ <{RESTAURANT}> a <{NAMESPACE}Restaurant> ; '
+                           f'<{NAMESPACE}capaciteMax> {capacity} . }}')
+    return manager
+
+
+def worker(manager):
+    """One worker process: its own ledgers and timelines over the shared store"""
+    return ReservationAdmission(manager, TimelineIndex(manager, BINDER, ttl=3600), ttl=3600)
+
+
+def reservation(touriste, heure='19:00', guests=4):
+    return ReservationRestaurant(touriste=f"{NAMESPACE}Touriste_{touriste}", restaurant=RESTAURANT,
+                                 date_reservation=DATE, heure=heure, nombre_personnes=guests,
+                                 statut='en_attente')
+
+
+def cancel(manager, uri):
+    """Cancellation written by another worker, behind this one's ledgers"""
+    manager.execute_update(f'DELETE {{ <{uri}> <{NAMESPACE}statut> ?s }} INSERT {{ <{uri}> <{NAMESPACE}statut> "annulee" }} '
+                           f'WHERE {{ <{uri}> <{NAMESPACE}statut> ?s }}')
+
+
+def test_full_slot_is_refused():
+    manager = new_manager()
+    first, second = worker(manager), worker(manager)
+    assert first.admit(reservation('a'))['success']
+    refused = second.admit(reservation('b'))
+    assert refused['success'] is False and refused['reason'] == 'full'
+    assert refused['current_reserved'] == 4 and refused['max_capacity'] == 4
+
+
+def test_cancellation_elsewhere_frees_a_cached_full_slot():
+    manager = new_manager()
+    first, second = worker(manager), worker(manager)
+    booked = reservation('a')
+    assert first.admit(booked)['success']
+    assert second.admit(reservation('b'))['reason'] == 'full'
+    # `second` still holds a full ledger for the slot, loaded before the cancellation
+    cancel(manager, booked.uri)
+    result = second.admit(reservation('b'))
+    assert result['success'] and result['current_reserved'] == 4, result
+
+
+def test_cancellation_elsewhere_frees_a_cached_timeline():
+    manager = new_manager()
+    first, second = worker(manager), worker(manager)
+    booked = reservation('a', guests=1)
+    assert first.admit(booked)['success']
+    assert second.admit(reservation('a', heure='19:30', guests=1))['reason'] == 'tourist_conflict'
+    cancel(manager, booked.uri)
+    result = second.admit(reservation('a', heure='19:30', guests=1))
+    assert result['success'], result
+    assert second.admit(reservation('a', heure='20:00', guests=1))['reason'] == 'tourist_conflict'
+
+
+def test_parallel_workers_never_overbook():
+    manager = new_manager(capacity=20)
+    workers = [worker(manager) for _ in range(4)]
+    # 30 tourists try 60 times in all, so both the capacity and the tourist checks refuse some
+    attempts = [reservation(f'p{i % 30}', guests=1 + i % 3) for i in range(60)]
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda i: workers[i % len(workers)].admit(attempts[i]), range(len(attempts))))
+    assert not [result for result in results if result.get('error')], results
+    admitted = {booked.uri: booked for booked, result in zip(attempts, results) if result['success']}
+    rows = manager.execute_query(f"""
+        SELECT ?reservation ?guests ?touriste WHERE {{
+            ?reservation <{NAMESPACE}reservePour> <{RESTAURANT}> ; <{NAMESPACE}nombrePersonnes> ?guests ;
+                         <{NAMESPACE}reservePar> ?touriste ; <{NAMESPACE}statut> ?statut .
+            FILTER(STR(?statut) != "annulee")
+        }}""", use_cache=False)
+    stored = {row['reservation']['value']: int(row['guests']['value']) for row in rows}
+    tourists = [row['touriste']['value'] for row in rows]
+    assert stored == {uri: booked.nombre_personnes for uri, booked in admitted.items()}
+    assert sum(stored.values()) <= 20 and len(tourists) == len(set(tourists))
+    assert len(admitted) < len(attempts)
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
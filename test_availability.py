@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests of restaurant slot availability (ReservationAdmission.availability and its endpoint), on the rdflib backend"""
+import os
+import sys
+import uuid
+from urllib.parse import quote
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+from config import NAMESPACE
+from Mangage.admission import ReservationAdmission
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+
+
+def store(manager, restaurant, reservations, capacity=10):
+    """`reservations`: (date, heure, guests, statut) of each reservation"""
+    triples = [f'<{restaurant}> a <{NAMESPACE}Restaurant> ; <{NAMESPACE}capaciteMax> {capacity} .']
+    for i, (day, heure, guests, statut) in enumerate(reservations):
+        triples.append(f'<{restaurant}_r{i}> a <{NAMESPACE}ReservationRestaurant> ; <{NAMESPACE}reservePour> <{restaurant}> ; '
+                       f'<{NAMESPACE}dateReservation> "{day}" ; <{NAMESPACE}heureReservation> "{heure}" ; '
+                       f'<{NAMESPACE}nombrePersonnes> {guests} ; <{NAMESPACE}statut> "{statut}" .')
+    manager.execute_update("INSERT DATA {\n" + "\n".join(triples) + "\n}")
+
+
+RESERVATIONS = [
+    ('2030-06-15', '19:00', 4, 'confirmee'),
+    ('2030-06-15', '19:00', 3, 'en_attente'),
+    ('2030-06-15', '19:00', 5, 'annulee'),
+    ('2030-06-15', '21:00', 12, 'confirmee'),
+    ('2030-06-16', '12:00', 2, 'annulee'),
+    ('2030-06-20', '19:00', 1, 'confirmee'),
+]
+
+
+def new_admission():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    restaurant = f"{NAMESPACE}Restaurant_av"
+    store(manager, restaurant, RESERVATIONS)
+    return restaurant, ReservationAdmission(manager)
+
+
+def test_capacity_left_per_slot():
+    restaurant, admission = new_admission()
+    result = admission.availability(restaurant, '2030-06-15', '2030-06-30')
+    assert (result['from'], result['to'], result['max_capacity']) == ('2030-06-15', '2030-06-30', 10)
+    # Cancelled reservations do not count; an overbooked slot has nothing left
+    assert [(s['date'], s['heure'], s['reserved'], s['reservations'], s['remaining']) for s in result['slots']] == [
+        ('2030-06-15', '19:00', 7, 2, 3),
+        ('2030-06-15', '21:00', 12, 1, 0),
+        ('2030-06-20', '19:00', 1, 1, 9),
+    ]
+
+
+def test_date_range():
+    restaurant, admission = new_admission()
+    assert [s['date'] for s in admission.availability(restaurant, '2030-06-16', '2030-06-20')['slots']] == ['2030-06-20']
+    assert len(admission.availability(restaurant, '2030-06-15', '2030-06-15')['slots']) == 2
+    assert admission.availability(restaurant, '2030-06-16', '2030-06-19')['slots'] == []
+    assert admission.availability(restaurant, '2030-06-01')['to'] == '2030-07-01'
+
+
+def test_invalid_ranges():
+    restaurant, admission = new_admission()
+    for args in (('15/06/2030', None), ('2030-06-15', '2030-06-14'), ('2030-02-30', None)):
+        try:
+            admission.availability(restaurant, *args)
+            assert False, f"{args} must be refused"
+        except ValueError:
+            pass
+
+
+def test_endpoint():
+    from app import app, manager
+    restaurant = f"{NAMESPACE}Restaurant_av_{uuid.uuid4().hex[:8]}"
+    store(manager, restaurant, RESERVATIONS)
+    client = app.test_client()
+    path = f"/restaurant/{quote(restaurant, safe='')}/availability"
+    response = client.get(f"{path}?from=2030-06-15&to=2030-06-15")
+    assert response.status_code == 200, response.get_json()
+    assert [(s['heure'], s['remaining']) for s in response.get_json()['slots']] == [('19:00', 3), ('21:00', 0)]
+    for query in ('from=tomorrow', 'from=2030-06-15&to=2030-13-01', 'from=2030-06-15&to=2030-06-01'):
+        response = client.get(f"{path}?{query}")
+        assert response.status_code == 400 and 'error' in response.get_json(), query
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Tests of the schema-driven row binder (Mangage.binder), on the rdflib backend"""
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.binder import RowBinder, Field, RDF_TYPE, local_name, join
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager, projected_select
+from Mangage.user_index import UserIndex
+from models import Touriste, Transport, EmpreinteCarbone, Destination, Hebergement
+
+T1, T2 = f"{NAMESPACE}Touriste_b1", f"{NAMESPACE}Touriste_b2"
+A1, A2 = f"{NAMESPACE}Activite_b1", f"{NAMESPACE}Activite_b2"
+
+
+def cell(value):
+    return {'type': 'literal', 'value': value}
+
+
+def new_manager():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    manager.execute_update(f"""INSERT DATA {{
+        <{T1}> a <{NAMESPACE}Touriste> ; <{NAMESPACE}nom> "Ali" ; <{NAMESPACE}age> 30 ;
+               <{NAMESPACE}participeA> <{A1}>, <{A2}> .
+        <{T2}> a <{NAMESPACE}Touriste> ; <{NAMESPACE}nom> "Béa" .
+    }}""")
+    return manager
+
+
+def test_multi_valued_from_triples():
+    rows = new_manager().execute_query(f"SELECT ?s ?p ?o WHERE {{ ?s a <{NAMESPACE}Touriste> ; ?p ?o }}")
+    documents = {d['uri']: d for d in RowBinder(Touriste).bind_triples(rows)}
+    assert documents[T1]['nom'] == 'Ali' and documents[T1]['age'] == 30
+    assert sorted(documents[T1]['participe_a']) == [A1, A2]
+    # OMIT: unbound fields are left out, even multi-valued ones
+    assert 'participe_a' not in documents[T2] and 'age' not in documents[T2]
+
+
+def test_projected_rows_and_defaults():
+    manager = new_manager()
+    rows = manager.execute_query(projected_select('Touriste'))
+    binder = RowBinder(Touriste, default=None)
+    documents = {d['uri']: d for d in (binder.document(row) for row in rows)}
+    # Projected rows concatenate multi-valued properties with spaces
+    assert sorted(documents[T1]['participe_a']) == [A1, A2]
+    assert documents[T2]['participe_a'] == [] and documents[T2]['age'] is None
+    predicate_keys = RowBinder(Touriste, key='predicate', only=('nom', 'participeA')).document(rows[0])
+    assert set(predicate_keys) <= {'uri', 'nom', 'participeA'}
+
+
+def test_nested_and_repeated_rows():
+    binder = RowBinder(
+        Transport, only=('nom', 'emission_co2_per_km'), subject='transport', default=None,
+        columns={'emission_co2_per_km': 'emission'},
+        nested={'empreinte': RowBinder(EmpreinteCarbone, only=('valeur_co2_kg',), subject='empreinteURI',
+                                       columns={'valeur_co2_kg': 'valeurCO2kg'})})
+    rows = [
+        {'transport': {'value': 'tr1'}, 'nom': cell('Bus'), 'emission': cell('68.5'),
+         'empreinteURI': {'value': 'e1'}, 'valeurCO2kg': cell('0.0685')},
+        {'transport': {'value': 'tr1'}, 'nom': cell('Bus')},
+        {'transport': {'value': 'tr2'}, 'nom': cell('Vélo')},
+        {'nom': cell('no subject')},
+    ]
+    bus, velo = binder.bind(rows)
+    assert bus == {'uri': 'tr1', 'nom': 'Bus', 'emission_co2_per_km': 68.5,
+                   'empreinte': {'uri': 'e1', 'valeur_co2_kg': 0.0685}}
+    assert velo == {'uri': 'tr2', 'nom': 'Vélo', 'emission_co2_per_km': None, 'empreinte': None}
+
+
+def test_tsv_values_typed_and_untyped():
+    rows = [{'s': 'h1', 'prix': '80.0', 'nbChambres': 12}, {'s': 'h2', 'prix': None}]
+    typed = RowBinder(Hebergement, key='predicate', only=('prix', 'nbChambres')).bind(rows)
+    assert typed == [{'uri': 'h1', 'prix': 80.0, 'nbChambres': 12}, {'uri': 'h2'}]
+    raw = RowBinder(Hebergement, key='predicate', only=('prix',), default='', typed=False).bind(rows)
+    assert raw == [{'uri': 'h1', 'prix': '80.0'}, {'uri': 'h2', 'prix': ''}]
+
+
+def test_extra_fields_entity_and_join():
+    binder = RowBinder(Touriste, only=('nom',), extra=(Field('type', None, RDF_TYPE, local_name),))
+    rows = [{'p': {'value': f'{NAMESPACE}nom'}, 'o': cell('Ali')},
+            {'p': {'value': RDF_TYPE}, 'o': {'value': f'{NAMESPACE}Touriste'}},
+            {'p': {'value': f'{NAMESPACE}unknown'}, 'o': cell('ignored')}]
+    assert binder.bind_entity(rows, T1) == {'uri': T1, 'nom': 'Ali', 'type': 'Touriste'}
+    assert binder.bind_entity([], T1) is None
+    destinations = [{'uri': 'd1', 'nom': 'Tabarka'}]
+    hebergements = join([{'uri': 'h1', 'situe_dans': 'd1'}, {'uri': 'h2', 'situe_dans': 'dx'}],
+                        'situe_dans', destinations, 'destination')
+    assert hebergements[0]['destination']['nom'] == 'Tabarka' and 'destination' not in hebergements[1]
+    assert RowBinder(Destination).new('d2') == {'uri': 'd2'}
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests of NDJSON bulk ingest (POST /bulk/<class_name>), on the rdflib backend"""
+import json
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+from config import NAMESPACE
+from models import Evenement
+
+
+def new_client():
+    import auth_routes
+    from app import app, manager
+    token = auth_routes.generate_token({'uri': f"{NAMESPACE}Touriste_bulk", 'email': 'bulk@example.org'})
+    return manager, app.test_client(), {'Authorization': f'Bearer {token}'}
+
+
+def post(client, headers, records, chunk_size=10):
+    body = "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records)
+    response = client.post(f'/bulk/Evenement?chunk_size={chunk_size}', data=body, headers=headers,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_validate_allocates_nothing():
+    event = Evenement(nom='Concert', event_prix='gratuit')
+    try:
+        event.validate()
+        assert False, "must be refused"
+    except ValueError:
+        pass
+    assert event.id is None and event.uri is None
+    assert Evenement(nom='Concert', event_prix='12.5').validate().id is None
+
+
+def test_invalid_record_rejects_only_its_line():
+    manager, client, headers = new_client()
+    lines = post(client, headers, [
+        {'nom': 'Bulk A', 'event_prix': '10'},
+        {'nom': 'Bulk B', 'event_prix': 'gratuit'},
+        'not json',
+        {'nom': 'Bulk C', 'event_date': '2030-06-15'},
+    ])
+    rejected = [line['rejected']['line'] for line in lines if 'rejected' in line]
+    chunks = [line for line in lines if 'chunk' in line]
+    summary = lines[-1]['summary']
+    assert rejected == [2, 3]
+    # The valid records still go up together, in one chunk
+    assert len(chunks) == 1 and chunks[0]['success'] and chunks[0]['count'] == 2
+    assert (summary['created'], summary['failed'], summary['rejected']) == (2, 0, 2)
+    rows = manager.execute_query(
+        f'SELECT ?nom WHERE {{ ?e a <{NAMESPACE}Evenement> ; <{NAMESPACE}nom> ?nom . '
+        f'FILTER(STRSTARTS(STR(?nom), "Bulk ")) }}', use_cache=False)
+    assert sorted(row['nom']['value'] for row in rows) == ['Bulk A', 'Bulk C']
+
+
+def test_unauthenticated_or_unknown_class():
+    manager, client, headers = new_client()
+    assert client.post('/bulk/Evenement', data='{}').status_code == 401
+    assert client.post('/bulk/Nothing', data='{}', headers=headers).status_code == 404
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
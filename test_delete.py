@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests of SPARQLManager.delete (cascades and not-found results), on the rdflib backend"""
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+
+T1, H1 = f"{NAMESPACE}Touriste_del1", f"{NAMESPACE}Hebergement_del1"
+
+
+class NoDeltaBackend(RdflibBackend):
+    """A backend that does not report what an update changed (as Fuseki)"""
+
+    def update(self, query, timeout=None):
+        super().update(query, timeout=timeout)
+        return None
+
+
+def new_manager(backend_class=RdflibBackend):
+    backend = backend_class(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    manager.execute_update(f"""INSERT DATA {{
+        <{T1}> a <{NAMESPACE}Touriste> ; <{NAMESPACE}nom> "Ali" ; <{NAMESPACE}sejourneDans> <{H1}> .
+        <{H1}> a <{NAMESPACE}Hebergement> ; <{NAMESPACE}nom> "Dar" .
+    }}""")
+    return manager
+
+
+def triples_of(manager, uri):
+    return manager.execute_query(f"SELECT ?p ?o WHERE {{ <{uri}> ?p ?o }}", use_cache=False)
+
+
+def test_delete_reports_removed_triples():
+    manager = new_manager()
+    result = manager.delete(H1)
+    assert result == {"success": True, "removed_triples": 3}
+    assert triples_of(manager, H1) == [] and len(triples_of(manager, T1)) == 2
+
+
+def test_delete_keeps_incoming_references_on_request():
+    manager = new_manager()
+    assert manager.delete(H1, incoming=False)['removed_triples'] == 2
+    assert len(triples_of(manager, T1)) == 3
+
+
+def test_delete_unknown_entity():
+    for backend_class in (RdflibBackend, NoDeltaBackend):
+        manager = new_manager(backend_class)
+        result = manager.delete(f"{NAMESPACE}Touriste_missing")
+        assert result == {"success": False, "error": "Entity not found"}, (backend_class, result)
+        assert len(triples_of(manager, T1)) == 3
+
+
+def test_delete_without_delta():
+    manager = new_manager(NoDeltaBackend)
+    assert manager.delete(T1) == {"success": True}
+    assert triples_of(manager, T1) == []
+    assert manager.delete(T1) == {"success": False, "error": "Entity not found"}
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
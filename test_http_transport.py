@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests of the shared Fuseki connection pool (Mangage.http_transport) against a local HTTP stub, and of backend selection"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from Mangage.backend import BackendError, create_backend
+from Mangage.http_transport import FusekiTransport
+from Mangage.rdflib_backend import RdflibBackend
+
+RESULT = {'head': {'vars': ['s']}, 'results': {'bindings': [
+    {'s': {'type': 'uri', 'value': 'http://example.org/eco-tourism#Touriste_1'}},
+    {'s': {'type': 'uri', 'value': 'http://example.org/eco-tourism#Touriste_2'}},
+]}}
+
+
+class Stub(BaseHTTPRequestHandler):
+    """Answers /query with RESULT, accepts /update, rejects /fail; records every request"""
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        Stub.requests.append((self.path, dict(self.headers), body))
+        if self.path == '/query':
+            self._reply(200, json.dumps(RESULT).encode('utf-8'), 'application/sparql-results+json')
+        elif self.path == '/update':
+            self._reply(204, b'')
+        else:
+            self._reply(400, b'bad update', 'text/plain')
+
+    def _reply(self, status, body, content_type=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    transport = FusekiTransport(query_url=f"{base}/query", update_url=f"{base}/update", data_url=f"{base}/data",
+                                user='admin', password='secret', pool_connections=1, pool_maxsize=2)
+    return server, base, transport
+
+
+def test_pool_is_bounded_and_shared_by_thread_sessions():
+    transport = FusekiTransport(user='admin', password='secret', pool_connections=2, pool_maxsize=3)
+    assert transport._adapter._pool_connections == 2
+    assert transport._adapter._pool_maxsize == 3
+    assert transport._adapter._pool_block is True
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(transport._session()))
+    thread.start()
+    thread.join()
+    main = transport._session()
+    assert main is transport._session()
+    assert sessions[0] is not main
+    assert sessions[0].get_adapter('http://fuseki/') is main.get_adapter('http://fuseki/') is transport._adapter
+    assert main.headers['Authorization'] == 'Basic YWRtaW46c2VjcmV0'
+    transport.close()
+
+
+def test_query_update_and_errors():
+    server, base, transport = serve()
+    Stub.requests.clear()
+    try:
+        assert transport.query_json('SELECT ?s WHERE { ?s ?p ?o }') == RESULT
+        assert transport.response_size() == len(json.dumps(RESULT))
+        path, headers, body = Stub.requests[-1]
+        assert parse_qs(body.decode('utf-8'))['query'] == ['SELECT ?s WHERE { ?s ?p ?o }']
+        assert headers['Accept'] == 'application/sparql-results+json'
+        assert headers['Authorization'] == 'Basic YWRtaW46c2VjcmV0'
+
+        transport.update('INSERT DATA { <a:x> <a:y> "é" }')
+        path, headers, body = Stub.requests[-1]
+        assert path == '/update' and body.decode('utf-8') == 'INSERT DATA { <a:x> <a:y> "é" }'
+        assert headers['Content-Type'].startswith('application/sparql-update')
+
+        transport.update_url = f"{base}/fail"
+        try:
+            transport.update('CLEAR ALL')
+            assert False, "a rejected update must raise"
+        except BackendError as e:
+            assert '400' in str(e)
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_iter_bindings_streams_the_result():
+    server, _, transport = serve()
+    try:
+        names, bindings = transport.iter_bindings('SELECT ?s WHERE { ?s ?p ?o }', chunk_size=7)
+        assert names == ['s']
+        assert list(bindings) == RESULT['results']['bindings']
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_create_backend():
+    assert isinstance(create_backend('rdflib'), RdflibBackend)
+    try:
+        create_backend('sqlite')
+        assert False, "an unknown backend must be refused"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
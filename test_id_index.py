@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests of the (class, id) -> URI index (Mangage.id_index) and the by-id lookups, on the rdflib backend"""
+import os
+import sys
+from urllib.parse import quote
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+
+C1, C2 = f"{NAMESPACE}CertificationEco_x1", f"{NAMESPACE}CertificationEco_x2"
+
+
+def new_manager():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    manager.execute_update(f"""INSERT DATA {{
+        <{C1}> a <{NAMESPACE}CertificationEco> ; <{NAMESPACE}id> 1 ; <{NAMESPACE}label_nom> "Clef verte" .
+    }}""")
+    manager.id_index.warm(['CertificationEco'])
+    return manager
+
+
+def renumber(manager):
+    """Another process moves id 1 from C1 to C2, behind the index's back"""
+    manager.backend.update(f"""DELETE WHERE {{ <{C1}> <{NAMESPACE}id> ?id }} ;
+        INSERT DATA {{ <{C1}> <{NAMESPACE}id> 9 .
+                       <{C2}> a <{NAMESPACE}CertificationEco> ; <{NAMESPACE}id> 1 . }}""")
+
+
+def test_uri_hits_are_verified():
+    manager = new_manager()
+    assert manager.uri_for_id('CertificationEco', 1) == C1
+    renumber(manager)
+    assert manager.uri_for_id('CertificationEco', 1, verify=False) == C1
+    assert manager.uri_for_id('CertificationEco', 1) == C2
+    assert manager.uri_for_id('CertificationEco', 9) == C1
+    assert manager.id_for_uri(C2) == 1 and manager.id_for_uri(f"{NAMESPACE}Nothing") is None
+
+
+def test_get_by_id_discards_renumbered_entries():
+    manager = new_manager()
+    assert manager.get_by_id('CertificationEco', 1)[0] == C1
+    renumber(manager)
+    manager.cache.clear()
+    uri, rows = manager.get_by_id('CertificationEco', 1)
+    assert uri == C2 and rows
+    manager.backend.update(f"DELETE WHERE {{ <{C2}> ?p ?o }}")
+    manager.cache.clear()
+    assert manager.get_by_id('CertificationEco', 1) == (None, [])
+    assert len(manager.id_index) == 0
+
+
+def test_put_by_uri_keeps_the_id():
+    os.environ.setdefault('GEMINI_API_KEY', 'test')
+    from app import app, manager
+    client = app.test_client()
+    created = client.post('/certification', json={'label_nom': 'Avant'}).get_json()
+    uri = created['uri']
+    cert_id = manager.id_for_uri(uri)
+    try:
+        updated = client.put(f"/certification/{quote(uri, safe='')}", json={'label_nom': 'Après'}).get_json()
+        assert updated['success'] and updated['id'] == cert_id
+        found = client.get(f'/certification/id/{cert_id}').get_json()
+        assert found['uri'] == uri and found['label_nom'] == 'Après'
+    finally:
+        manager.delete(uri)
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -117,7 +117,7 @@ assert '<http://example.org/eco-tourism#id>' in sparql, "ID manquant dans SPARQL
 print(f"   - SPARQL contient ID: OUI")
 
 # Test auto-increment
-t2 = Touriste(nom="Test2", age=30, nationalite="TN")
+t2 = Touriste(nom="Test2", age=30, nationalite="TN").assign_id()
 print(f"\n12. Auto-increment test:")
 print(f"   - Touriste 1 ID: {t.id}")
 print(f"   - Touriste 2 ID: {t2.id}")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Tests of the id allocators (Mangage.ids) and of lazy id assignment in models, on the rdflib backend"""
+import json
+import os
+import sys
+import tempfile
+import threading
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.ids import MemoryIdAllocator, FileIdAllocator, StoreIdAllocator, max_existing_id
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+from models import Touriste, Transport
+
+
+class RacingBackend:
+    """Backend whose first `races` updates are preceded by a lease of a competing allocator"""
+
+    def __init__(self, backend, competitor, races=1):
+        self.backend = backend
+        self.competitor = competitor
+        self.races = races
+        self.updates = 0
+
+    def query_json(self, query):
+        return self.backend.query_json(query)
+
+    def update(self, query):
+        self.updates += 1
+        if self.races:
+            self.races -= 1
+            self.competitor.next_id('Touriste')
+        return self.backend.update(query)
+
+
+class StuckBackend(RacingBackend):
+    """Backend dropping every update, as if another process always won"""
+
+    def update(self, query):
+        self.updates += 1
+
+
+def test_memory_allocator_blocks():
+    allocator = MemoryIdAllocator(block_size=3)
+    assert [allocator.next_id('Touriste') for _ in range(5)] == [1, 2, 3, 4, 5]
+    assert allocator.next_id('Guide') == 1
+    assert allocator._next == {'Touriste': 7, 'Guide': 4}
+
+
+def test_memory_allocator_threads():
+    allocator = MemoryIdAllocator(block_size=4)
+    ids = []
+
+    def work():
+        for _ in range(200):
+            ids.append(allocator.next_id('Touriste'))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ids) == list(range(1, 1601))
+
+
+def test_file_allocator_shared_file():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'counters.json')
+        seeded = []
+
+        def seed(class_name):
+            seeded.append(class_name)
+            return 41
+
+        first = FileIdAllocator(path=path, block_size=10, seed=seed)
+        second = FileIdAllocator(path=path, block_size=10, seed=seed)
+        assert first.next_id('Touriste') == 42 and first.next_id('Touriste') == 43
+        # The second process leases the next block, after the first one's
+        assert second.next_id('Touriste') == 52
+        assert seeded == ['Touriste']
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == {'Touriste': 62}
+        assert not os.path.exists(f"{path}.tmp")
+
+
+def test_store_allocator_seeds_from_existing_ids():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    backend.update(f'INSERT DATA {{ <{NAMESPACE}Touriste_7> a <{NAMESPACE}Touriste> ; <{NAMESPACE}id> 7 . }}')
+    assert max_existing_id('Touriste', backend) == 7 and max_existing_id('Guide', backend) == 0
+    first = StoreIdAllocator(block_size=5, backend=backend)
+    second = StoreIdAllocator(block_size=5, backend=backend)
+    assert [first.next_id('Touriste') for _ in range(3)] == [8, 9, 10]
+    assert second.next_id('Touriste') == 13
+    assert first.next_id('Touriste') == 11 and first.next_id('Touriste') == 12
+    assert first.next_id('Touriste') == 18
+
+
+def test_store_allocator_cas_retry():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    competitor = StoreIdAllocator(block_size=10, backend=backend)
+    competitor.next_id('Touriste')
+    # The competitor leases 11-20 between our read of the counter and our update
+    racing = RacingBackend(backend, StoreIdAllocator(block_size=10, backend=backend))
+    allocator = StoreIdAllocator(block_size=10, backend=racing)
+    assert allocator.next_id('Touriste') == 21
+    assert racing.updates == 2
+    assert competitor.next_id('Touriste') == 2
+
+
+def test_store_allocator_gives_up():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    StoreIdAllocator(block_size=10, backend=backend).next_id('Touriste')
+    stuck = StuckBackend(backend, None)
+    allocator = StoreIdAllocator(block_size=10, backend=stuck, max_attempts=3)
+    try:
+        allocator.next_id('Touriste')
+        assert False, "the lease must fail"
+    except RuntimeError:
+        pass
+    assert stuck.updates == 3
+
+
+def test_ids_are_assigned_when_stored():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    touriste = Touriste(nom="Ali")
+    transport = Transport(uri=f"{NAMESPACE}Transport_Bus", nom="Bus", type_="Bus", emission_co2_per_km=68)
+    assert touriste.id is None and touriste.uri is None
+    assert transport.id is None and transport.a_empreinte is None
+    assert manager.create_many([touriste, transport]).get('success')
+    assert isinstance(touriste.id, int) and touriste.uri == f"{NAMESPACE}Touriste_{touriste.id}"
+    assert transport.uri == f"{NAMESPACE}Transport_Bus" and transport.a_empreinte
+    rows = manager.execute_query(f"SELECT ?id WHERE {{ <{transport.a_empreinte}> <{NAMESPACE}id> ?id }}")
+    assert len(rows) == 1
+    # An explicit id is kept
+    assert Touriste(id=5, nom="B").assign_id().uri == f"{NAMESPACE}Touriste_5"
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
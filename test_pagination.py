@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests of keyset pagination (Mangage.pagination, SPARQLManager.get_all pages), on the rdflib backend"""
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.pagination import encode_cursor, decode_cursor, keyset_filter, next_cursor
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+
+COUNT = 7
+
+
+def new_manager():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    triples = ''.join(f'<{NAMESPACE}Destination_{i}> a <{NAMESPACE}Destination> ; '
+                      f'<{NAMESPACE}nom> "Destination {i}" ; <{NAMESPACE}id> {i} .\n' for i in range(COUNT))
+    assert manager.execute_update(f"INSERT DATA {{ {triples} }}").get('success')
+    return manager
+
+
+def pages(manager, limit, projected):
+    """Walk every page; returns the subjects of each page"""
+    cursor, walked = None, []
+    while True:
+        rows = manager.get_all('Destination', projected=projected, limit=limit, cursor=cursor)
+        assert isinstance(rows, list), rows
+        walked.append(list(dict.fromkeys(row['s']['value'] for row in rows)))
+        cursor = next_cursor(rows, limit)
+        if cursor is None:
+            return walked
+
+
+def test_cursor_round_trip():
+    uri = f"{NAMESPACE}Destination_3"
+    cursor = encode_cursor(uri)
+    assert '#' not in cursor and '=' not in cursor
+    assert decode_cursor(cursor) == uri
+    for bad in ('a', '_w'):
+        try:
+            decode_cursor(bad)
+            assert False, f"{bad!r} must be refused"
+        except ValueError:
+            pass
+
+
+def test_keyset_filter_escapes_the_cursor():
+    assert keyset_filter('s', None) == ''
+    assert keyset_filter('s', encode_cursor('a"b\\c')) == 'FILTER(STR(?s) > "a\\"b\\\\c")'
+
+
+def test_next_cursor():
+    rows = [{'s': {'value': 'a'}}, {'s': {'value': 'a'}}, {'s': {'value': 'b'}}]
+    assert decode_cursor(next_cursor(rows, 2)) == 'b'
+    assert next_cursor(rows, 3) is None
+    assert next_cursor(rows, None) is None
+    assert next_cursor({'error': 'x'}, 2) is None
+    assert decode_cursor(next_cursor([{'user': 'u1'}, {'user': 'u2'}], 2, 'user')) == 'u2'
+
+
+def test_pages_cover_every_entity_once():
+    manager = new_manager()
+    expected = sorted(f"{NAMESPACE}Destination_{i}" for i in range(COUNT))
+    for projected in (False, True):
+        for limit in (1, 3, COUNT, COUNT + 5):
+            walked = pages(manager, limit, projected)
+            flat = [uri for page in walked for uri in page]
+            assert flat == expected, (projected, limit, walked)
+            assert all(len(page) <= limit for page in walked)
+
+
+def test_triple_pages_keep_every_property():
+    manager = new_manager()
+    rows = manager.get_all('Destination', limit=2)
+    subjects = {row['s']['value'] for row in rows}
+    assert len(subjects) == 2
+    assert len(rows) == 2 * 3
+
+
+def test_endpoint_pages():
+    os.environ.setdefault('GEMINI_API_KEY', 'test')
+    from app import app, manager
+    manager.execute_update(f'INSERT DATA {{ <{NAMESPACE}Ville_page1> a <{NAMESPACE}Ville> . '
+                           f'<{NAMESPACE}Ville_page2> a <{NAMESPACE}Ville> . }}')
+    client = app.test_client()
+    try:
+        first = client.get('/ville?limit=1').get_json()
+        assert len(first['results']) >= 1 and first['next_cursor']
+        second = client.get(f"/ville?limit=1&cursor={first['next_cursor']}").get_json()
+        assert second['results'][0]['s'] != first['results'][0]['s']
+        assert client.get('/ville?limit=0').status_code == 400
+        assert client.get('/ville?cursor=abc').status_code == 400
+        assert client.get('/ville?limit=2&cursor=_w').status_code == 400
+    finally:
+        manager.execute_update(f'DELETE WHERE {{ <{NAMESPACE}Ville_page1> ?p ?o }}')
+        manager.execute_update(f'DELETE WHERE {{ <{NAMESPACE}Ville_page2> ?p ?o }}')
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
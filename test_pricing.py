@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests of the vectorized transport pricing (utils.pricing) against the per-transport formula"""
+import math
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import TRANSPORT_PRICING
+from utils.pricing import TransportPricing, PRICING
+
+TYPES = list(TRANSPORT_PRICING['base_prices']) + ['Trottinette', '', None]
+EMISSIONS = [0, None, 12.5, 68, 250.75]
+DISTANCES = [-5, 0, 0.4, 1, 17.3, 100, 2500]
+
+
+def scalar_price(transport_type, emission, distance_km):
+    """The formula Transport.calculate_price applied to one transport and one distance"""
+    if not transport_type or distance_km <= 0:
+        return {'total': 0.0, 'base_price': 0.0, 'distance_cost': 0.0, 'carbon_tax': 0.0, 'co2_kg': 0.0}
+    base_price = TRANSPORT_PRICING['base_prices'].get(transport_type, 2.0)
+    price_per_km = TRANSPORT_PRICING['price_per_km'].get(transport_type, 0.15)
+    distance_cost = price_per_km * distance_km
+    co2_kg = (emission / 1000.0) * distance_km if emission else 0
+    carbon_tax = co2_kg * TRANSPORT_PRICING['carbon_tax_per_kg']
+    return {
+        'total': round(base_price + distance_cost + carbon_tax, 2),
+        'base_price': round(base_price, 2),
+        'distance_cost': round(distance_cost, 2),
+        'carbon_tax': round(carbon_tax, 2),
+        'co2_kg': round(co2_kg, 4),
+    }
+
+
+def raises(*args):
+    try:
+        PRICING.matrix(*args)
+    except ValueError:
+        return True
+    return False
+
+
+def test_matrix_matches_scalar_formula():
+    types = [t for t in TYPES for _ in EMISSIONS]
+    emissions = [e for _ in TYPES for e in EMISSIONS]
+    prices = PRICING.matrix(types, emissions, DISTANCES)
+    assert prices['total'].shape == (len(types), len(DISTANCES))
+    for row, (transport_type, emission) in enumerate(zip(types, emissions)):
+        for column, distance in enumerate(DISTANCES):
+            expected = scalar_price(transport_type, emission, distance)
+            for name, value in expected.items():
+                # Both round to the cent (co2 to the gram); allow one unit of rounding difference
+                tolerance = 1e-4 if name == 'co2_kg' else 0.01
+                assert math.isclose(prices[name][row, column], value, abs_tol=tolerance), \
+                    (transport_type, emission, distance, name, prices[name][row, column], value)
+
+
+def test_custom_pricing_and_unknown_types():
+    pricing = TransportPricing({'base_prices': {'Bus': 1.0}, 'price_per_km': {'Train': 0.1},
+                                'carbon_tax_per_kg': 0.5})
+    prices = pricing.matrix(['Bus', 'Train', 'Avion'], [100, 0, 0], [10])
+    assert prices['total'][:, 0].tolist() == [1.0 + 1.5 + 0.5, 2.0 + 1.0, 2.0 + 1.5]
+
+
+def test_invalid_input_is_refused():
+    assert raises([['Bus']], [0], [10]) and raises([{'type': 'Bus'}], [0], [10]) and raises([3], [0], [10])
+    assert raises(['Bus'], ['abc'], [10]) and raises(['Bus'], [[1]], [10])
+    assert raises(['Bus'], [float('nan')], [10]) and raises(['Bus'], ['NaN'], [10])
+    assert raises(['Bus'], [0], [float('inf')]) and raises(['Bus'], [0], ['-Infinity'])
+    assert raises(['Bus'], [0], [True]) and raises(['Bus'], [0], [None])
+
+
+def test_price_matrix_endpoint():
+    os.environ.setdefault('GEMINI_API_KEY', 'test')
+    from app import app
+    client = app.test_client()
+    response = client.post('/transport/price-matrix', json={
+        'transports': [{'type': 'Bus', 'emission': 68}, {'type': 'Train', 'emission': 14}],
+        'distances_km': [10, 100]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['total'][0][1] == scalar_price('Bus', 68, 100)['total']
+    for bad in ({'transports': [{'type': ['Bus']}], 'distances_km': [10]},
+                {'transports': [{'type': 'Bus', 'emission': 'NaN'}], 'distances_km': [10]},
+                {'transports': [{'type': 'Bus'}], 'distances_km': [{'km': 10}]}):
+        assert client.post('/transport/price-matrix', json=bad).status_code == 400, bad
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
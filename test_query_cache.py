@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Tests of Mangage.query_cache (key normalization, class invalidation, generations), on the rdflib backend"""
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache, normalize_query, detect_classes, class_from_uri
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.templates import PREFIXES
+from Mangage.user_index import UserIndex
+
+CLASSES = {'Touriste', 'Guide', 'Hebergement'}
+
+
+def new_manager():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    return SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                         id_index=IdIndex(backend), user_index=UserIndex(backend))
+
+
+def test_normalize_collapses_whitespace_outside_literals():
+    assert normalize_query("SELECT ?s\n  WHERE {\t?s ?p ?o }  ") == "SELECT ?s WHERE { ?s ?p ?o }"
+    assert normalize_query('SELECT * WHERE { ?s ?p "a  b" }') == 'SELECT * WHERE { ?s ?p "a  b" }'
+    assert normalize_query("ASK { ?s ?p 'x\\'  y' }") == "ASK { ?s ?p 'x\\'  y' }"
+    assert normalize_query('SELECT * WHERE { ?s ?p "a b" }') != normalize_query('SELECT * WHERE { ?s ?p "a  b" }')
+
+
+def test_detect_classes():
+    assert detect_classes("SELECT ?t WHERE { ?t a eco:Touriste . }", CLASSES) == {'Touriste'}
+    assert detect_classes(f"SELECT ?t WHERE {{ ?t rdf:type <{NAMESPACE}Guide> }}", CLASSES) == {'Guide'}
+    assert detect_classes(f"SELECT ?p WHERE {{ <{NAMESPACE}Hebergement_3> ?p ?o }}", CLASSES) == {'Hebergement'}
+    assert detect_classes("SELECT ?x WHERE { ?x a eco:Inconnu }", CLASSES) == set()
+    assert class_from_uri(f"{NAMESPACE}Touriste_12") == 'Touriste'
+
+
+def test_invalidate_by_class():
+    cache = QueryCache(enabled=True)
+    cache.put('touristes', [1], {'Touriste'})
+    cache.put('guides', [2], {'Guide'})
+    cache.put('untagged', [3], set())
+    cache.invalidate({'Touriste'})
+    assert cache.get('touristes') is None
+    assert cache.get('guides') == [2]
+    assert cache.get('untagged') is None
+    cache.invalidate()
+    assert cache.get('guides') is None
+
+
+def test_put_from_an_older_generation_is_dropped():
+    cache = QueryCache(enabled=True)
+    generation = cache.generation
+    cache.invalidate({'Guide'})
+    cache.put('guides', [1], {'Guide'}, generation)
+    assert cache.get('guides') is None
+    cache.put('guides', [1], {'Guide'}, cache.generation)
+    assert cache.get('guides') == [1]
+
+
+def test_values_are_copied():
+    cache = QueryCache(enabled=True)
+    rows = [{'s': {'value': 'a'}}]
+    cache.put('rows', rows, set())
+    rows[0]['s']['value'] = 'changed'
+    got = cache.get('rows')
+    assert got == [{'s': {'value': 'a'}}]
+    got.append('extra')
+    got[0]['s']['value'] = 'changed'
+    assert cache.get('rows') == [{'s': {'value': 'a'}}]
+
+
+def test_manager_invalidates_after_update():
+    manager = new_manager()
+    query = PREFIXES + "SELECT ?t WHERE { ?t a eco:Touriste . }"
+    assert manager.execute_query(query) == []
+    manager.execute_update(f"INSERT DATA {{ <{NAMESPACE}Touriste_cache1> a <{NAMESPACE}Touriste> . }}")
+    rows = manager.execute_query(query)
+    assert [row['t']['value'] for row in rows] == [f"{NAMESPACE}Touriste_cache1"]
+    rows.clear()
+    assert len(manager.execute_query(query)) == 1
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
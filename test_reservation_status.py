@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Tests of batched reservation status changes and stale reservation expiry (Mangage.reservation_status), on the rdflib backend"""
+import os
+import sys
+from datetime import datetime
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.reservation_status import ReservationExpiry, set_statuses
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.user_index import UserIndex
+
+NOW = datetime(2030, 6, 15, 20, 0)
+
+
+class CountingManager(SPARQLManager):
+    """Counts the updates sent to the store"""
+
+    updates = 0
+
+    def execute_update(self, *args, **kwargs):
+        self.updates += 1
+        return super().execute_update(*args, **kwargs)
+
+
+class RecordingAdmission:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, *uris):
+        self.invalidated.extend(uris)
+
+
+def uri(i):
+    return f"{NAMESPACE}ReservationRestaurant_st{i}"
+
+
+def new_manager(reservations):
+    """`reservations`: (statut, date, heure, created) of each reservation, numbered from 0"""
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = CountingManager(backend=backend, cache=QueryCache(enabled=True),
+                              id_index=IdIndex(backend), user_index=UserIndex(backend))
+    triples = []
+    for i, (statut, day, heure, created) in enumerate(reservations):
+        triples.append(f'<{uri(i)}> a <{NAMESPACE}ReservationRestaurant> ; <{NAMESPACE}statut> "{statut}" ; '
+                       f'<{NAMESPACE}dateReservation> "{day}" ; <{NAMESPACE}heureReservation> "{heure}" .')
+        if created:
+            triples.append(f'<{uri(i)}> <{NAMESPACE}dateCreation> "{created}" .')
+    manager.execute_update("INSERT DATA {\n" + "\n".join(triples) + "\n}")
+    manager.updates = 0
+    return manager
+
+
+def statuses(manager, count):
+    rows = manager.execute_query(f"SELECT ?s ?statut WHERE {{ ?s <{NAMESPACE}statut> ?statut }}", use_cache=False)
+    found = {row['s']['value']: row['statut']['value'] for row in rows}
+    return [found.get(uri(i)) for i in range(count)]
+
+
+def test_set_statuses_batches_and_counts_changes():
+    manager = new_manager([('en_attente', '2030-07-01', '19:00', None)] * 5
+                          + [('confirmee', '2030-07-01', '19:00', None)] * 2)
+    uris = [uri(i) for i in range(7)] + [uri(0), f"{NAMESPACE}ReservationRestaurant_missing"]
+    result = set_statuses(manager, uris, 'confirmee', batch_size=3)
+    # Duplicates, unknown URIs and reservations already confirmed are not counted
+    assert result == {'success': True, 'changed': 5}
+    # 8 distinct URIs in batches of 3: the last batch has nothing to change
+    assert manager.updates == 2
+    assert statuses(manager, 7) == ['confirmee'] * 7
+    assert set_statuses(manager, uris, 'confirmee', batch_size=3) == {'success': True, 'changed': 0}
+    assert manager.updates == 2
+
+
+def test_set_statuses_only_from():
+    manager = new_manager([('en_attente', '2030-07-01', '19:00', None), ('confirmee', '2030-07-01', '19:00', None),
+                           ('annulee', '2030-07-01', '19:00', None)])
+    result = set_statuses(manager, [uri(i) for i in range(3)], 'annulee', only_from='en_attente')
+    assert result['changed'] == 1
+    assert statuses(manager, 3) == ['annulee', 'confirmee', 'annulee']
+    for bad in (lambda: set_statuses(manager, [uri(0)], 'perdue'), lambda: set_statuses(manager, ['a b'], 'annulee')):
+        try:
+            bad()
+            assert False, "must be refused"
+        except ValueError:
+            pass
+
+
+def test_run_once_cancels_stale_pending_reservations():
+    manager = new_manager([
+        ('en_attente', '2030-06-14', '19:00', None),              # 0: yesterday
+        ('en_attente', '2030-06-15', '19:30', None),              # 1: earlier today
+        ('en_attente', '2030-06-15', '21:00', None),              # 2: later today
+        ('confirmee', '2030-06-14', '19:00', None),               # 3: confirmed
+        ('en_attente', '2030-07-01', '19:00', '2030-06-10T12:00:00'),  # 4: pending for days
+        ('en_attente', '2030-07-01', '19:00', '2030-06-15T19:00:00'),  # 5: pending for an hour
+    ])
+    admission = RecordingAdmission()
+    # Without a pending timeout (the default), only reservations whose time has passed
+    expiry = ReservationExpiry(manager, admission, interval=0, timeout=0, batch_size=500)
+    assert expiry.run_once(NOW) == 2
+    assert statuses(manager, 6) == ['annulee', 'annulee', 'en_attente', 'confirmee', 'en_attente', 'en_attente']
+    assert sorted(admission.invalidated) == [uri(0), uri(1)]
+    assert expiry.run_once(NOW) == 0
+    assert ReservationExpiry(manager, admission, interval=0, timeout=24).run_once(NOW) == 1
+    assert statuses(manager, 6)[4:] == ['annulee', 'en_attente']
+
+
+def test_run_once_in_batches():
+    manager = new_manager([('en_attente', '2030-06-14', '19:00', None)] * 7)
+    expiry = ReservationExpiry(manager, interval=0, timeout=0, batch_size=3)
+    assert expiry.run_once(NOW) == 7
+    assert manager.updates == 3
+    assert statuses(manager, 7) == ['annulee'] * 7
+
+
+def test_start_is_a_no_op_without_interval():
+    expiry = ReservationExpiry(new_manager([]), interval=0)
+    expiry.start()
+    assert expiry._thread is None
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
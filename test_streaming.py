@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests of streaming SPARQL JSON decoding (Mangage.streaming, SPARQLManager.iter_query), on the rdflib backend"""
+import json
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.streaming import BindingsDecoder, compact_rows
+from Mangage.user_index import UserIndex
+
+BINDINGS = [
+    {'s': {'type': 'uri', 'value': f'{NAMESPACE}Restaurant_1'},
+     'nom': {'type': 'literal', 'value': 'Café "bindings": [1, 2] }, {'}},
+    {'s': {'type': 'uri', 'value': f'{NAMESPACE}Restaurant_2'}},
+    {'s': {'type': 'uri', 'value': f'{NAMESPACE}Restaurant_3'},
+     'nom': {'type': 'literal', 'value': 'Dar 日本 ✓', 'xml:lang': 'fr'}},
+]
+DOCUMENT = {'head': {'vars': ['s', 'nom']}, 'results': {'bindings': BINDINGS}}
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def decode(data, size):
+    decoder = BindingsDecoder(chunked(data, size))
+    return decoder.vars, list(decoder)
+
+
+def test_decoder_any_chunk_size():
+    for indent in (None, 2):
+        data = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False).encode('utf-8')
+        # Size 1 splits every multi-byte UTF-8 character and every token
+        for size in (1, 2, 3, 7, 64, len(data)):
+            assert decode(data, size) == (['s', 'nom'], BINDINGS), (indent, size)
+
+
+def test_decoder_empty_and_malformed():
+    assert decode(b'{"head": {"vars": ["s"]}, "results": {"bindings": []}}', 5) == (['s'], [])
+    for data in (b'{"head": {"vars": ["s"]}}', b'{"head": {"vars": ["s"]}, "results": {"bindings": [{"s": 1}'):
+        try:
+            decode(data, 4)
+            assert False, f"{data!r} must be refused"
+        except ValueError:
+            pass
+
+
+def test_compact_rows():
+    rows = list(compact_rows(['s', 'nom'], BINDINGS))
+    assert rows[1] == (f'{NAMESPACE}Restaurant_2', None)
+    assert rows[2] == (f'{NAMESPACE}Restaurant_3', 'Dar 日本 ✓')
+
+
+def test_iter_query_matches_execute_query():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    triples = ''.join(f'<{NAMESPACE}Restaurant_{i}> <{NAMESPACE}nom> "R{i}" .\n' for i in range(20))
+    manager.execute_update(f"INSERT DATA {{ {triples} <{NAMESPACE}Restaurant_x> a <{NAMESPACE}Restaurant> . }}")
+    query = f"SELECT ?s ?nom WHERE {{ ?s ?p ?o . OPTIONAL {{ ?s <{NAMESPACE}nom> ?nom }} }} ORDER BY ?s"
+    expected = [(row['s']['value'], row['nom']['value'] if 'nom' in row else None)
+                for row in manager.execute_query(query)]
+    rows = manager.iter_query(query)
+    assert rows.vars == ['s', 'nom']
+    assert list(rows) == expected and len(expected) == 21
+    rows = manager.iter_query(query)
+    next(iter(rows))
+    rows.close()
+    assert 'error' in manager.iter_query("SELECT ?s WHERE {")
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Tests of prepared SPARQL templates (Mangage.templates): formatting, escaping and binding on the rdflib backend"""
+import os
+import sys
+from datetime import date
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.templates import SPARQLTemplate, XSD, escape, iri, string, integer, decimal, boolean, date_
+from Mangage.user_index import UserIndex
+
+BY_NAME = SPARQLTemplate("""
+    SELECT ?s
+    WHERE {
+        ?s eco:nom ${nom} .
+        ?s eco:age ?age .
+        FILTER(?age >= ${age:integer})
+    }
+""", name='test_by_name')
+
+SET_NAME = SPARQLTemplate("""
+    INSERT DATA { ${uri:iri} eco:nom ${nom} . }
+""", name='test_set_name')
+
+
+def raises(function, *args):
+    try:
+        function(*args)
+    except ValueError:
+        return True
+    return False
+
+
+def test_escape():
+    assert escape('a"b\\c\nd\re\tf') == 'a\\"b\\\\c\\nd\\re\\tf'
+    assert string('x"y') == f'"x\\"y"^^<{XSD}string>'
+
+
+def test_formatters():
+    assert iri(f"{NAMESPACE}Touriste_1") == f"<{NAMESPACE}Touriste_1>"
+    for bad in ('', 'a b', 'a>b', 'a"b', 'a{b}'):
+        assert raises(iri, bad), bad
+    assert integer(' 42 ') == '42' and integer(7) == '7'
+    assert raises(integer, '4.2') and raises(integer, True) and raises(integer, '1 } ; DROP ALL')
+    # Integral floats (e.g. a JSON 3.0) are integers; fractions are not
+    assert integer(3.0) == integer('3.0') == integer(' 3.00 ') == '3'
+    assert raises(integer, 2.5) and raises(integer, 'nan') and raises(integer, 'inf')
+    assert decimal('1.50') == f'"1.50"^^<{XSD}decimal>'
+    assert raises(decimal, 'nan') and raises(decimal, 'inf') and raises(decimal, False)
+    assert boolean('yes') == 'true' and boolean('no') == 'false' and boolean(0) == 'false'
+    assert date_(date(2030, 6, 15)) == date_('2030-06-15') == f'"2030-06-15"^^<{XSD}date>'
+    assert raises(date_, '15/06/2030')
+
+
+def test_event_duration_accepts_fractional_hours():
+    from models import Evenement
+    for hours, literal in ((3.0, '3.0'), (2.5, '2.5'), ('4', '4')):
+        event = Evenement(uri=f"{NAMESPACE}Evenement_tpl", nom='Atelier', event_duree_heures=hours)
+        assert f'<{NAMESPACE}eventDureeHeures> "{literal}"^^<{XSD}decimal>' in event.validate().to_sparql_insert()
+
+
+def test_template_parsing():
+    assert BY_NAME.form == 'SELECT' and not BY_NAME.is_update
+    assert SET_NAME.form == 'INSERT' and SET_NAME.is_update
+    assert BY_NAME.params == ('nom', 'age')
+    assert raises(SPARQLTemplate, 'SELECT ?s WHERE { ?s ?p ${x:unknown} }')
+    assert raises(SPARQLTemplate, '${x}')
+
+
+def test_bind():
+    text = BY_NAME.bind(nom='Ali "le" Grand', age='30')
+    assert text.startswith('PREFIX eco:')
+    assert '"Ali \\"le\\" Grand"^^' in text
+    assert '>= 30)' in text
+    assert '\n' not in text and '  ' not in text
+    assert text == BY_NAME.bind(nom='Ali "le" Grand', age=30)
+    assert raises(BY_NAME.bind) and raises(lambda: BY_NAME.bind(nom='x', age=None))
+    assert raises(lambda: BY_NAME.bind(nom='x', age='30 } ; DROP ALL ; #'))
+
+
+def test_execute_prepared_round_trip():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    uri = f"{NAMESPACE}Touriste_tpl"
+    tricky = 'O\'Brien "quoted" \\ back\nslash'
+    assert manager.execute_prepared(SET_NAME, {'uri': uri, 'nom': tricky}).get('success')
+    assert manager.execute_update(f'INSERT DATA {{ <{uri}> <{NAMESPACE}age> 40 }}').get('success')
+    rows = manager.execute_prepared(BY_NAME, {'nom': tricky, 'age': 18})
+    assert [row['s']['value'] for row in rows] == [uri]
+    assert manager.execute_prepared(BY_NAME, {'nom': tricky, 'age': 41}) == []
+    assert 'error' in manager.execute_prepared(BY_NAME, {'nom': tricky, 'age': 'old'})
+    assert 'error' in manager.execute_prepared(SET_NAME, {'uri': 'not an iri', 'nom': 'x'})
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Tests of tourist reservation timelines (Mangage.timeline): overlaps and upcoming meals, on the rdflib backend"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.binder import RowBinder, Field, RDF_TYPE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.timeline import TimelineIndex, TouristTimeline, minutes_of, normalize_time, start_of
+from Mangage.user_index import UserIndex
+from models import ReservationRestaurant
+
+TOURISTE = f"{NAMESPACE}Touriste_tl"
+DURATION = timedelta(minutes=90)
+BINDER = RowBinder(ReservationRestaurant, key='predicate', extra=(Field('type', None, RDF_TYPE),))
+
+
+def document(uri, day, heure, statut='confirmee'):
+    return {'uri': uri, 'dateReservation': day, 'heureReservation': heure, 'statut': statut}
+
+
+def new_index():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    index = TimelineIndex(manager, BINDER, duration=90, ttl=3600, max_tourists=2)
+    return manager, index
+
+
+def store(manager, uri, day, heure, touriste=TOURISTE, statut='confirmee'):
+    manager.execute_update(f"""INSERT DATA {{
+        <{uri}> a <{NAMESPACE}ReservationRestaurant> ; <{NAMESPACE}reservePar> <{touriste}> ;
+                <{NAMESPACE}dateReservation> "{day}" ; <{NAMESPACE}heureReservation> "{heure}" ;
+                <{NAMESPACE}statut> "{statut}" .
+    }}""")
+
+
+def test_time_parsing():
+    assert minutes_of('19:30') == minutes_of('19h30') == 1170 and minutes_of('7') == 420
+    assert normalize_time('9h') == '09:00' and normalize_time('19:05:00') == '19:05'
+    for bad in ('24:00', '19:60', 'soir', ''):
+        try:
+            minutes_of(bad)
+            assert False, f"{bad!r} must be refused"
+        except ValueError:
+            pass
+    assert start_of('2030-06-15', '19:30') == datetime(2030, 6, 15, 19, 30)
+
+
+def test_overlapping_bookings():
+    timeline = TouristTimeline()
+    for doc in (document('r2', '2030-06-15', '21:00'), document('r1', '2030-06-15', '19:00'),
+                document('r3', '2030-06-16', '12:00'), document('cancelled', '2030-06-15', '20:00', 'annulee'),
+                document('no-time', '2030-06-15', 'soir')):
+        timeline.add(doc, DURATION)
+    # Sorted by start; cancelled and unparsable reservations are documents only
+    assert [booking.uri for booking in timeline.bookings] == ['r1', 'r2', 'r3']
+    assert len(timeline.documents) == 5
+
+    def overlapping(day, heure):
+        start = start_of(day, heure)
+        return [booking.uri for booking in timeline.overlapping(start, start + DURATION, DURATION)]
+
+    assert overlapping('2030-06-15', '19:00') == ['r1']
+    # A meal at 20:00 overlaps the end of r1 (until 20:30) and the start of r2 (21:00)
+    assert overlapping('2030-06-15', '20:00') == ['r1', 'r2']
+    # Meals touching end to start do not overlap
+    assert overlapping('2030-06-15', '17:30') == [] and overlapping('2030-06-15', '22:30') == []
+    assert overlapping('2030-06-16', '11:00') == ['r3'] and overlapping('2030-06-17', '12:00') == []
+
+
+def test_upcoming():
+    timeline = TouristTimeline()
+    now = datetime(2030, 6, 15, 20, 0)
+    for doc in (document('past', '2030-06-15', '12:00'), document('ongoing', '2030-06-15', '19:00'),
+                document('later', '2030-06-16', '12:00'), document('tonight', '2030-06-15', '21:00'),
+                document('cancelled', '2030-06-16', '13:00', 'annulee')):
+        timeline.add(doc, DURATION)
+    assert [doc['uri'] for doc in timeline.upcoming(now, DURATION)] == ['ongoing', 'tonight', 'later']
+    assert [doc['uri'] for doc in timeline.upcoming(now + timedelta(days=2), DURATION)] == []
+
+
+def test_index_conflicts_and_reservations():
+    manager, index = new_index()
+    tomorrow = (datetime.now() + timedelta(days=1)).date().isoformat()
+    store(manager, f"{NAMESPACE}ReservationRestaurant_tl1", tomorrow, '19:00')
+    store(manager, f"{NAMESPACE}ReservationRestaurant_tl2", '2000-01-01', '19:00')
+    store(manager, f"{NAMESPACE}ReservationRestaurant_tl3", tomorrow, '20:00', statut='annulee')
+    assert index.conflicts(TOURISTE, tomorrow, '20:00') == [f"{NAMESPACE}ReservationRestaurant_tl1"]
+    assert index.conflicts(TOURISTE, tomorrow, '20:00', exclude=f"{NAMESPACE}ReservationRestaurant_tl1") == []
+    assert index.conflicts(TOURISTE, tomorrow, '21:00') == []
+    assert len(index.reservations(TOURISTE)) == 3
+    upcoming = index.reservations(TOURISTE, upcoming=True)
+    assert [doc['uri'] for doc in upcoming] == [f"{NAMESPACE}ReservationRestaurant_tl1"]
+
+
+def test_index_add_invalidate_and_eviction():
+    manager, index = new_index()
+    day = '2030-06-15'
+    index.timeline(TOURISTE)
+    added = ReservationRestaurant(id=7, uri=f"{NAMESPACE}ReservationRestaurant_tl7", touriste=TOURISTE,
+                                  restaurant=f"{NAMESPACE}Restaurant_tl", date_reservation=day,
+                                  heure='19:00', nombre_personnes=2, statut='en_attente')
+    # Recorded in memory without a reload (the store does not have it)
+    index.add(added)
+    assert index.conflicts(TOURISTE, day, '19:30') == [added.uri]
+    index.invalidate(added.uri)
+    assert index.conflicts(TOURISTE, day, '19:30') == []
+    # A conflict found in a timeline loaded before `since` is confirmed on a reload
+    index.add(added)
+    since = index.timeline(TOURISTE).loaded_at + 1
+    assert index.conflicts(TOURISTE, day, '19:30', since=since) == []
+    # At most max_tourists timelines are kept, least recently used dropped first
+    for i in range(3):
+        index.timeline(f"{NAMESPACE}Touriste_tl_other{i}")
+    assert TOURISTE not in index._timelines and len(index._timelines) == 2
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
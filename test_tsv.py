@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Tests of the TSV result fast path (Mangage.tsv, result_format='tsv'/'tsv-text'), on the rdflib backend"""
+import os
+import sys
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+
+from config import NAMESPACE
+from Mangage.id_index import IdIndex
+from Mangage.query_cache import QueryCache
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.sparql_manager import SPARQLManager
+from Mangage.templates import XSD
+from Mangage.tsv import term_value, parse_tsv, format_term
+from Mangage.user_index import UserIndex
+
+
+def test_term_value_escapes():
+    assert term_value('"a\\tb\\nc\\"d\\\\e"') == 'a\tb\nc"d\\e'
+    assert term_value('"caf\\u00E9 \\U0001F600"') == 'café \U0001F600'
+    assert term_value('"it\\\'s"') == "it's"
+    assert term_value('"tab\\there"@fr') == 'tab\there'
+
+
+def test_term_value_typed_literals():
+    assert term_value(f'"30"^^<{XSD}integer>') == 30
+    assert term_value(f'"7"^^<{XSD}nonNegativeInteger>') == 7
+    assert term_value(f'"1.5"^^<{XSD}decimal>') == 1.5
+    assert term_value(f'"1.0E3"^^<{XSD}double>') == 1000.0
+    assert term_value(f'"true"^^<{XSD}boolean>') is True
+    assert term_value(f'"0"^^<{XSD}boolean>') is False
+    assert term_value(f'"2030-06-15"^^<{XSD}date>') == '2030-06-15'
+    assert term_value(f'"x"^^<{XSD}string>') == 'x'
+    # An invalid lexical form stays a string
+    assert term_value(f'"abc"^^<{XSD}integer>') == 'abc'
+
+
+def test_term_value_abbreviated_literals_and_terms():
+    assert term_value('42') == 42 and term_value('-3') == -3
+    assert term_value('1.5') == 1.5 and term_value('1.0e3') == 1000.0
+    assert term_value('true') is True and term_value('false') is False
+    assert term_value(f'<{NAMESPACE}Touriste_1>') == f'{NAMESPACE}Touriste_1'
+    assert term_value('_:b0') == 'b0'
+
+
+def test_term_value_untyped():
+    assert term_value(f'"30"^^<{XSD}integer>', typed=False) == '30'
+    assert term_value('42', typed=False) == '42'
+    assert term_value('true', typed=False) == 'true'
+    assert term_value('"a\\nb"', typed=False) == 'a\nb'
+    assert term_value('', typed=False) is None
+
+
+def test_parse_tsv_unbound_cells():
+    text = f'?s\t?age\t?nom\n<{NAMESPACE}T_1>\t30\t\n<{NAMESPACE}T_2>\t\t"B"\n'
+    names, rows = parse_tsv(text)
+    assert names == ['s', 'age', 'nom']
+    assert rows == [(f'{NAMESPACE}T_1', 30, None), (f'{NAMESPACE}T_2', None, 'B')]
+    assert parse_tsv(text, typed=False)[1][0] == (f'{NAMESPACE}T_1', '30', None)
+    assert parse_tsv('?s\n') == (['s'], [])
+    assert parse_tsv('?a\t?b\r\n"x"\t1\r\n') == (['a', 'b'], [('x', 1)])
+
+
+def test_format_term_round_trip():
+    for value in ('plain', 'tab\tnew\nline "q" \\', 'é ✓'):
+        assert term_value(format_term('literal', value)) == value
+    assert term_value(format_term('literal', '5', XSD + 'integer')) == 5
+    assert term_value(format_term('literal', 'x', language='fr')) == 'x'
+    assert term_value(format_term('uri', f'{NAMESPACE}A')) == f'{NAMESPACE}A'
+
+
+def test_tsv_rows_match_json_rows():
+    backend = RdflibBackend(ontology_path=None, snapshot_path='')
+    manager = SPARQLManager(backend=backend, cache=QueryCache(enabled=True),
+                            id_index=IdIndex(backend), user_index=UserIndex(backend))
+    manager.execute_update(f'''INSERT DATA {{
+        <{NAMESPACE}Touriste_t1> <{NAMESPACE}nom> "Ali\\t\\"A\\"" ; <{NAMESPACE}age> 30 .
+        <{NAMESPACE}Touriste_t2> <{NAMESPACE}nom> "Béa" ; <{NAMESPACE}prix> 12.50 .
+    }}''')
+    query = f"""SELECT ?s ?nom ?age ?prix WHERE {{ ?s <{NAMESPACE}nom> ?nom .
+        OPTIONAL {{ ?s <{NAMESPACE}age> ?age }} OPTIONAL {{ ?s <{NAMESPACE}prix> ?prix }} }} ORDER BY ?s"""
+    json_rows = [{name: cell['value'] for name, cell in row.items()} for row in manager.execute_query(query)]
+    text_rows = manager.execute_query(query, result_format='tsv-text')
+    assert [{k: v for k, v in row.items() if v is not None} for row in text_rows] == json_rows
+    typed_rows = manager.execute_query(query, result_format='tsv')
+    assert typed_rows[0]['age'] == 30 and typed_rows[0]['prix'] is None
+    assert typed_rows[1]['prix'] == 12.5 and typed_rows[1]['nom'] == 'Béa'
+    try:
+        manager.execute_query(query, result_format='csv')
+        assert False, "an unknown format must be refused"
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Tests of the email -> account index (Mangage.user_index) and of registration and login, on the rdflib backend"""
+import os
+import sys
+import uuid
+
+os.environ.setdefault('SPARQL_BACKEND', 'rdflib')
+os.environ.setdefault('RDFLIB_SNAPSHOT', '')
+os.environ.setdefault('GEMINI_API_KEY', 'test')
+
+from config import NAMESPACE
+from Mangage.rdflib_backend import RdflibBackend
+from Mangage.user_index import UserIndex
+
+ALI = f"{NAMESPACE}Touriste_ui1"
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+
+
+class CountingBackend:
+    """Counts the queries sent to the store"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.queries = 0
+
+    def query_json(self, query):
+        self.queries += 1
+        return self.backend.query_json(query)
+
+    def update(self, query):
+        return self.backend.update(query)
+
+
+def new_index(ttl=60):
+    backend = CountingBackend(RdflibBackend(ontology_path=None, snapshot_path=''))
+    backend.update(f"""INSERT DATA {{
+        <{ALI}> a <{NAMESPACE}Touriste> ; <{NAMESPACE}nom> "Ali" ; <{NAMESPACE}age> 30 ;
+                <{NAMESPACE}email> "ali@example.org"^^<{XSD_STRING}> ; <{NAMESPACE}password> "h1" .
+        <{NAMESPACE}Guide_ui2> a <{NAMESPACE}Guide> ; <{NAMESPACE}nom> "Béa" ;
+                <{NAMESPACE}email> "bea@example.org"^^<{XSD_STRING}> ; <{NAMESPACE}password> "h2" ;
+                <{NAMESPACE}emailVerified> true .
+    }}""")
+    index = UserIndex(backend, ttl=ttl)
+    assert index.warm()
+    backend.queries = 0
+    return backend, index
+
+
+def test_warm_and_fresh_lookups():
+    backend, index = new_index()
+    assert len(index) == 2
+    ali = index.find('ali@example.org')
+    assert (ali.uri, ali.type, ali.nom, ali.age, ali.verified) == (ALI, 'Touriste', 'Ali', '30', False)
+    assert index.find('bea@example.org').type == 'Guide' and index.find('bea@example.org').verified
+    # Fresh index: hits and misses cost no query
+    assert index.find('nobody@example.org') is None
+    assert backend.queries == 0
+
+
+def test_expired_hits_are_checked_again():
+    backend, index = new_index()
+    backend.update(f'DELETE WHERE {{ <{ALI}> <{NAMESPACE}password> ?p }} ; '
+                   f'INSERT DATA {{ <{ALI}> <{NAMESPACE}password> "h3" }}')
+    assert index.find('ali@example.org').password == 'h1'
+    index._checked_at['ali@example.org'] -= 120
+    assert index.find('ali@example.org').password == 'h3' and backend.queries == 1
+    # Deleted elsewhere: gone once the hit expires
+    backend.update(f'DELETE WHERE {{ <{ALI}> ?p ?o }}')
+    index._checked_at['ali@example.org'] -= 120
+    assert index.find('ali@example.org') is None and len(index) == 1
+
+
+def test_expired_index_reloads_on_a_miss():
+    backend, index = new_index(ttl=0)
+    backend.update(f'INSERT DATA {{ <{NAMESPACE}Touriste_ui3> a <{NAMESPACE}Touriste> ; <{NAMESPACE}nom> "C" ; '
+                   f'<{NAMESPACE}email> "c@example.org"^^<{XSD_STRING}> ; <{NAMESPACE}password> "h" . }}')
+    assert index.find('c@example.org').uri == f"{NAMESPACE}Touriste_ui3"
+    assert len(index) == 3
+
+
+def test_update_and_discard():
+    backend, index = new_index()
+    index.update('ali@example.org', verified=True)
+    assert index.find('ali@example.org').verified
+    index.update('nobody@example.org', verified=True)
+    index.discard(ALI)
+    assert 'ali@example.org' not in index._records and index._loaded_at is None
+    # No longer fresh: the next lookup reads the store again
+    assert index.find('ali@example.org').uri == ALI and backend.queries >= 1
+
+
+def new_client():
+    import auth_routes
+    from app import app
+    auth_routes.send_verification_email = lambda email, name: None
+    return auth_routes, app.test_client()
+
+
+def register(client, email, password='secret1', nom='Test'):
+    return client.post('/auth/register', json={'nom': nom, 'email': email, 'password': password, 'age': 20})
+
+
+def test_register_and_login():
+    auth_routes, client = new_client()
+    email = f"{uuid.uuid4().hex}@example.org"
+    created = register(client, email)
+    assert created.status_code == 201, created.get_json()
+    uri = created.get_json()['user']['uri']
+    assert auth_routes.users.find(email).uri == uri
+    assert register(client, email).status_code == 400
+    login = client.post('/auth/login', json={'email': email, 'password': 'secret1'})
+    assert login.status_code == 200 and login.get_json()['user']['uri'] == uri
+    assert client.post('/auth/login', json={'email': email, 'password': 'wrong'}).status_code == 401
+    assert client.post('/auth/login', json={'email': 'nobody@example.org', 'password': 'x'}).status_code == 401
+    assert client.post('/auth/login', json={'email': email}).status_code == 400
+
+
+def test_concurrent_registration_is_refused_by_the_store():
+    auth_routes, client = new_client()
+    email = f"{uuid.uuid4().hex}@example.org"
+    assert register(client, email, nom='First').status_code == 201
+    # Another worker whose index does not know the account yet
+    auth_routes.users.clear()
+    auth_routes.users._loaded_at = float('inf')
+    try:
+        response = register(client, email, nom='Second')
+    finally:
+        auth_routes.users._loaded_at = None
+    assert response.status_code == 400, response.get_json()
+    rows = auth_routes.manager.execute_query(
+        f'SELECT ?user WHERE {{ ?user <{NAMESPACE}email> ?email . FILTER(STR(?email) = "{email}") }}', use_cache=False)
+    assert len(rows) == 1
+
+
+def test_failed_password_write_keeps_the_index():
+    auth_routes, client = new_client()
+    email = f"{uuid.uuid4().hex}@example.org"
+    user = register(client, email).get_json()['user']
+    token = auth_routes.generate_token(user)
+    before = auth_routes.users.find(email).password
+    execute_prepared = auth_routes.manager.execute_prepared
+    auth_routes.manager.execute_prepared = lambda template, values, **kwargs: {'error': 'store unavailable'}
+    try:
+        response = client.post('/auth/change-password', headers={'Authorization': f'Bearer {token}'},
+                               json={'email': email, 'currentPassword': 'secret1', 'newPassword': 'secret2'})
+    finally:
+        auth_routes.manager.execute_prepared = execute_prepared
+    assert response.status_code == 500
+    assert auth_routes.users.find(email).password == before
+    response = client.post('/auth/change-password', headers={'Authorization': f'Bearer {token}'},
+                           json={'email': email, 'currentPassword': 'secret1', 'newPassword': 'secret2'})
+    assert response.status_code == 200
+    assert client.post('/auth/login', json={'email': email, 'password': 'secret2'}).status_code == 200
+
+
+def test_password_reset_by_another_worker():
+    auth_routes, client = new_client()
+    from email_service import generate_reset_token
+    email = f"{uuid.uuid4().hex}@example.org"
+    assert register(client, email).status_code == 201
+    assert client.post('/auth/login', json={'email': email, 'password': 'secret1'}).status_code == 200
+    # Another worker: its own index over the same store resets the password
+    this_worker, other_worker = auth_routes.users, UserIndex(auth_routes.manager.backend)
+    auth_routes.users = other_worker
+    try:
+        response = client.post('/auth/reset-password', json={'token': generate_reset_token(email), 'password': 'secret2'})
+    finally:
+        auth_routes.users = this_worker
+    assert response.status_code == 200, response.get_json()
+    # This worker's index still holds the old hash, within its TTL
+    assert this_worker.find(email).password == auth_routes.hash_password('secret1')
+    assert client.post('/auth/login', json={'email': email, 'password': 'secret1'}).status_code == 401
+    assert client.post('/auth/login', json={'email': email, 'password': 'secret2'}).status_code == 200
+    token = auth_routes.generate_token({'uri': this_worker.find(email).uri, 'email': email})
+    response = client.post('/auth/change-password', headers={'Authorization': f'Bearer {token}'},
+                           json={'email': email, 'currentPassword': 'secret1', 'newPassword': 'secret3'})
+    assert response.status_code == 401
+
+
+if __name__ == '__main__':
+    failed = 0
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"[OK] {name}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from config import TRANSPORT_PRICING
+
+# Prices of types missing from TRANSPORT_PRICING
+DEFAULT_BASE_PRICE = 2.0
+DEFAULT_PRICE_PER_KM = 0.15
+
+
+class TransportPricing:
+    """
+    TRANSPORT_PRICING as arrays indexed by transport type, to price
+    transports x distances in one vectorized evaluation (Transport.calculate_price
+    prices a single cell with it): base price + per-km cost + carbon tax on the
+    CO2 emitted (emission in g/km); an empty type or a distance <= 0 costs 0.
+    """
+
+    def __init__(self, pricing=TRANSPORT_PRICING):
+        types = list(dict.fromkeys(list(pricing['base_prices']) + list(pricing['price_per_km'])))
+        # One extra slot at the end for unknown types
+        self.index = {transport_type: i for i, transport_type in enumerate(types)}
+        self.base_prices = np.array(
+            [pricing['base_prices'].get(t, DEFAULT_BASE_PRICE) for t in types] + [DEFAULT_BASE_PRICE])
+        self.prices_per_km = np.array(
+            [pricing['price_per_km'].get(t, DEFAULT_PRICE_PER_KM) for t in types] + [DEFAULT_PRICE_PER_KM])
+        self.carbon_tax_per_kg = float(pricing['carbon_tax_per_kg'])
+
+    def type_indices(self, types):
+        unknown = len(self.index)
+        return np.fromiter((self.index.get(t, unknown) for t in types), dtype=np.intp, count=len(types))
+
+    def matrix(self, types, emissions, distances):
+        """
+        Price every transport (`types`, `emissions` in g/km, None for unknown)
+        for every distance in km. Returns a dict of (len(types), len(distances))
+        arrays: total, base_price, distance_cost, carbon_tax and co2_kg.
+        Raises ValueError for types that are not strings (or None), and for
+        emissions or distances that are not finite numbers.
+        """
+        if not all(t is None or isinstance(t, str) for t in types):
+            raise ValueError("transport types must be strings")
+        indices = self.type_indices(types)
+        emission = _finite([e if e else 0.0 for e in emissions], "emissions")
+        distance = _finite(distances, "distances")
+
+        # Rows without a type and columns with a distance <= 0 are free
+        priced = np.array([bool(t) for t in types])[:, None] & (distance > 0)[None, :]
+
+        base_price = np.where(priced, self.base_prices[indices][:, None], 0.0)
+        distance_cost = np.where(priced, np.outer(self.prices_per_km[indices], distance), 0.0)
+        co2_kg = np.where(priced, np.outer(emission / 1000.0, distance), 0.0)
+        carbon_tax = co2_kg * self.carbon_tax_per_kg
+        total = base_price + distance_cost + carbon_tax
+        return {
+            'total': total.round(2),
+            'base_price': base_price.round(2),
+            'distance_cost': distance_cost.round(2),
+            'carbon_tax': carbon_tax.round(2),
+            'co2_kg': co2_kg.round(4),
+        }
+
+
+def _finite(values, name):
+    """Float array of `values`, which must all be finite numbers (bools excluded)"""
+    try:
+        if any(isinstance(value, bool) for value in values):
+            raise ValueError
+        array = np.array([float(value) for value in values], dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be numbers") from None
+    if not np.isfinite(array).all():
+        raise ValueError(f"{name} must be finite")
+    return array
+
+
+PRICING = TransportPricing()